@@ -3,6 +3,7 @@ from __future__ import annotations
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import field_validator
+from functools import lru_cache
 from pathlib import Path
 from typing import List
 import os, json, sys
@@ -36,7 +37,12 @@ def _app_dir() -> Path:
     return Path(__file__).resolve().parents[2]  # backend/
 
 
-USER_BASE = _documents_dir() / "PlotLight"  # 문서/PlotLight (사용자용 결과만)
+@lru_cache(maxsize=None)
+def user_base() -> Path:
+    """문서/PlotLight (사용자용 결과만). OneDrive/문서 폴더 확인은 처음 필요할 때 한 번만 한다."""
+    return _documents_dir() / "PlotLight"
+
+
 APP_BASE  = _app_dir()                      # 프로그램 폴더 (시스템성 파일)
 
 
@@ -58,29 +64,53 @@ class Settings(BaseSettings):
     # 사용자에게 보이는 저장소: 문서/PlotLight/원문, 리포트
     manuscript_dir: str = "원문"
     report_dir: str     = "리포트"
+    compress_reports: bool = False  # True면 리포트를 공백 없는 JSON + gzip(<id>.json.gz)으로 저장
 
     # 시스템성 저장소(문서에 두지 않음) 
     log_file: str = "logs/plotlight.log"                 # APP_BASE/logs/plotlight.log
+    enable_metrics: bool = True                          # 단계별 소요 시간 히스토그램 (/metrics)
+    timing_log: bool = True                              # 요청마다 단계별 시간을 log_file에 JSON 한 줄로
     enable_embeddings: bool = False                      # 기본: 비활성화
     persist_embeddings: bool = False                     # 기본: 저장 안 함
     embedding_dir: str = "cache/embeddings"              # APP_BASE 하위
     corpus_dir: str    = "cache/corpus"                  # APP_BASE 하위
     chroma_persist_dir: str = "cache/embeddings/chroma"  # APP_BASE 하위"
+    result_cache_dir: str = "cache/results"              # APP_BASE 하위 (분석 결과 디스크 캐시)
+    persist_result_cache: bool = False                   # 기본: 메모리 캐시만 사용
+    db_file: str = "cache/plotlight.db"                  # APP_BASE 하위 (작업 큐/원고 목록 SQLite)
+    segment_cache_dir: str = "cache/segments"            # APP_BASE 하위 (증분 분석용 구간 요약)
+    persist_segment_cache: bool = True                   # 워커 프로세스끼리 공유하려면 디스크 필요
+    baseline_dir: str = "cache/baselines"                # APP_BASE 하위 (코퍼스 원고의 장르별 지표 분포)
+    baseline_min_docs: int = 5                           # 장르 기준은 문서가 이만큼 모여야 사용 (아니면 전체 기준)
+    blob_dir: str = "cache/blobs"                        # APP_BASE 하위 (저장한 원문, 내용 해시로 한 번만)
+    compress_blobs: bool = True                          # 텍스트(txt/md) 원문은 gzip으로 저장
+    blob_compress_level: int = 6
+    structure_index: bool = True                         # 저장한 원고의 화/문단/문장 위치 색인을 blob 옆에 만듦
+    near_duplicate_check: bool = True                    # 분석할 때 저장된 원고 중 거의 같은 원고/화를 찾음 (MinHash LSH)
+    near_duplicate_threshold: float = 0.5                # 추정 자카드 유사도(5글자 조각 기준)가 이 이상이면 보고
+    near_duplicate_max_results: int = 10
 
     # Security / CORS
     cors_origins: List[str] = ["http://localhost:5173", "http://127.0.0.1:5173"]
 
     # Limits
     max_upload_size_mb: int = 10
+    max_batch_upload_size_mb: int = 500  # /files/analyze/batch 요청(zip 포함) 전체 한도
     allowed_extensions: List[str] = ["txt", "docx", "pdf", "md"]
+    pdf_extract_workers: int = 0  # 분석 하나가 쓰는 PDF 페이지 추출 프로세스 수 (0이면 CPU 수 // worker_count, 1 이하면 순차 추출)
+    pdf_pages_per_task: int = 16  # 추출 프로세스 하나가 한 번에 맡는 페이지 수
 
     # RAG/Embedding (자리만 유지)
     chroma_persist_dir: str = "data/embeddings/chroma"
-    embedding_model: str = "BAAI/bge-small-ko-v1.5"
+    embedding_model: str = "BAAI/bge-small-ko-v1.5"  # "hashing"이면 모델 없이 결정적 해시 임베더 사용
+    embedding_batch_size: int = 64
     embedding_dimension: int = 384
     max_embedding_tokens: int = 512
     rag_top_k: int = 5
     rag_similarity_threshold: float = 0.7
+    rag_index_mode: str = "exact"  # "exact"(전수 검색) | "ivf"(근사 검색)
+    rag_ivf_nlist: int = 0         # 0이면 sqrt(청크 수)
+    rag_ivf_nprobe: int = 8
     chunk_size: int = 700
     chunk_overlap: int = 70
 
@@ -91,8 +121,23 @@ class Settings(BaseSettings):
     default_plausibility_weight: float = 0.20
     default_marketability_weight: float = 0.15
     worker_count: int = 2
+    warmup_on_startup: bool = True               # 시작 직후 백그라운드에서 파서/분석기/워커 풀을 미리 준비
     max_concurrent_analyses: int = 3
+    analysis_queue_size: int = 16                # 동시 분석이 꽉 찼을 때 기다릴 수 있는 요청 수
+    analysis_queue_timeout_seconds: float = 30.0 # 대기열에서 기다리는 최대 시간
+    retry_after_seconds: int = 5                 # 429 응답의 Retry-After
+    batch_max_wait_seconds: float = 300.0        # 배치 항목 하나가 429로 다시 시도하며 기다리는 최대 시간 (넘으면 그 항목은 429 실패)
     cache_ttl_seconds: int = 3600
+    result_cache_max_items: int = 256
+    result_cache_max_disk_items: int = 10000        # 디스크 캐시 파일 수 상한 (넘으면 오래 안 쓴 것부터 지움, 0이면 제한 없음)
+    segment_cache_max_items: int = 50000
+    segment_cache_max_disk_items: int = 200000
+    segment_cache_ttl_seconds: int = 7 * 24 * 3600
+    segment_min_chars: int = 2000   # 증분 분석 구간 최소 길이 (이후 첫 빈 줄에서 자름)
+    segment_max_chars: int = 16000  # 빈 줄이 없을 때 강제로 자르는 길이
+
+    # 장르 어휘 (<장르명>.txt, 한 줄에 하나). 비우면 앱에 포함된 기본 어휘(app/data/genre_lexicons)
+    genre_lexicon_dir: str = ""
 
     # ---------- Validators ----------
     @field_validator("cors_origins", mode="before")
@@ -127,7 +172,7 @@ class Settings(BaseSettings):
     def _user_abs(self, p: str) -> Path:
         """상대경로 → Documents/PlotLight 기준"""
         q = Path(p);  
-        return q if q.is_absolute() else (USER_BASE / q).resolve()
+        return q if q.is_absolute() else (user_base() / q).resolve()
 
     def _app_abs(self, p: str) -> Path:
         """상대경로 → 프로그램 폴더(APP_DIR) 기준 (로그 등 시스템성 파일)"""
@@ -152,9 +197,26 @@ class Settings(BaseSettings):
     def corpus_path(self)    -> Path: return self._app_abs(self.corpus_dir)
     @property
     def chroma_path(self)    -> Path: return self._app_abs(self.chroma_persist_dir)
+    @property
+    def result_cache_path(self) -> Path: return self._app_abs(self.result_cache_dir)
+    @property
+    def db_path(self)        -> Path: return self._app_abs(self.db_file)
+    @property
+    def segment_cache_path(self) -> Path: return self._app_abs(self.segment_cache_dir)
+    @property
+    def blob_path(self)      -> Path: return self._app_abs(self.blob_dir)
+    @property
+    def baseline_path(self)  -> Path: return self._app_abs(self.baseline_dir)
+    @property
+    def genre_lexicon_path(self) -> Path:
+        if not self.genre_lexicon_dir:
+            return Path(__file__).resolve().parent / "data" / "genre_lexicons"
+        return self._app_abs(self.genre_lexicon_dir)
 
 
     # ---------- Ensure dirs ----------
+    # import 시점에는 만들지 않는다: 앱 시작 직후 백그라운드(warmup.py)에서 호출하고,
+    # 파일을 쓰는 쪽(리포트/DB/로그/캐시)은 각자 필요한 폴더를 직접 만든다.
     def ensure_dirs(self) -> None:
         # ─ 사용자 폴더(문서/PlotLight): 원문/리포트만 생성 ─
         self.manuscript_path.mkdir(parents=True, exist_ok=True)
@@ -162,6 +224,12 @@ class Settings(BaseSettings):
 
         # ─ 시스템/프로그램 폴더(APP_BASE): 로그 및 (옵션) 캐시/임베딩 ─
         self.log_path.mkdir(parents=True, exist_ok=True)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.blob_path.mkdir(parents=True, exist_ok=True)
+        if self.persist_result_cache:
+            self.result_cache_path.mkdir(parents=True, exist_ok=True)
+        if self.persist_segment_cache:
+            self.segment_cache_path.mkdir(parents=True, exist_ok=True)
         # 임베딩/코퍼스/크로마는 필요할 때만 생성
         if self.enable_embeddings:
             self.embedding_path.mkdir(parents=True, exist_ok=True)
@@ -171,4 +239,3 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
-settings.ensure_dirs()
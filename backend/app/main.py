@@ -1,12 +1,60 @@
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from .config import settings
-from .routes import files
-
-from .models.schemas import AnalyzeRunRequest, AnalyzeRunResponse, SectionScore, Metric, EvidenceItem
+from .routes import files, analyze, rag, reports, baselines, manuscripts
+from .services.cache import result_cache
+from .services.metrics import render_prometheus, shutdown_metrics
+from .services.workers import gate, shutdown_pool, start_pool
+from .services.jobs import job_runner
+from .services import warmup
 
 app = FastAPI(title="PlotLight API", version="0.1.0")
 
+
+# 단일 파일 업로드 경로: Content-Length만 보고도 한도를 넘는 게 확실하면 본문을 받기 전에 413
+# (Content-Length가 없는 chunked 본문은 받은 바이트를 세다가 한도를 넘는 순간 413)
+_SINGLE_UPLOAD_PATHS = {"/files/analyze/quick", "/files/analyze/stream"}
+_MULTIPART_SLACK = 64 * 1024  # multipart 경계/헤더 여유분
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File too large (>{settings.max_upload_size_mb} MB)")
+
+
+class UploadSizeGuard:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in _SINGLE_UPLOAD_PATHS:
+            await self.app(scope, receive, send)
+            return
+        limit = settings.max_upload_size_mb * 1024 * 1024 + _MULTIPART_SLACK
+        length = dict(scope["headers"]).get(b"content-length")
+        if length and length.isdigit() and int(length) > limit:
+            response = JSONResponse(status_code=413, content={"detail": _too_large().detail})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            # multipart 파서가 본문을 다 받아 두기 전에 끊는다. HTTPException은 본문 파싱 오류(400)로 바뀌지 않고 그대로 413
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise _too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+app.add_middleware(UploadSizeGuard)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -15,6 +63,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+_warmup_task = None
+
+@app.on_event("startup")
+async def _startup():
+    global _warmup_task
+    # 워커 프로세스는 백그라운드 스레드가 생기기 전에 띄운다 (fork 시 import 잠금 문제 방지)
+    start_pool()
+    # 재시작 전에 남아 있던 작업을 다시 큐에 넣고 작업 워커 시작
+    await job_runner.start()
+    # 폴더 생성/파서·분석기·워커 풀/가이드 인덱스(memmap) 준비는 기다리지 않고 백그라운드에서
+    # → /health는 바로 응답하고, 준비 상태는 /health의 warmup으로 확인
+    _warmup_task = asyncio.create_task(asyncio.to_thread(warmup.prepare))
+
+@app.on_event("shutdown")
+async def _shutdown():
+    await job_runner.stop()
+    shutdown_pool()
+    shutdown_metrics()
+
 @app.get("/health")
 def health():
     return {
@@ -22,30 +89,38 @@ def health():
         "manuscript_path": str(settings.manuscript_path),
         "report_path": str(settings.report_path),
         "log_path": str(settings.log_path),
+        "warmup": warmup.status["state"],
     }
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # Prometheus 수집용: 단계별 소요 시간 히스토그램 + 분석 대기열/결과 캐시 상태
+    q, c = gate.stats(), result_cache.stats()
+    body = render_prometheus({
+        "plotlight_analysis_running": ("Analysis worker slots in use.", q["running"]),
+        "plotlight_analysis_waiting": ("Analyses waiting for a slot.", q["waiting"]),
+        "plotlight_analysis_rejected": ("Analyses rejected with 429 since start.", q["rejected"]),
+        "plotlight_result_cache_items": ("Items in the in-memory result cache.", c["items"]),
+        "plotlight_result_cache_hit_rate": ("Result cache hit rate since start.", c["hit_rate"]),
+    })
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
 # 업로드 라우터 등록
 app.include_router(files.router)
 
-@app.post("/analyze/run", response_model=AnalyzeRunResponse)
-def analyze_run(req: AnalyzeRunRequest):
-    # MVP 목업
-    genre = SectionScore(label="genre", score=78.0,
-        metrics=[Metric(name="장르 확률-로맨스", value=0.62), Metric(name="장르 확률-판타지", value=0.28)],
-        evidences=[EvidenceItem(source_id="guide_romance", snippet="초반 갈등 제시", score=0.83)]
-    )
-    style = SectionScore(label="style", score=72.0,
-        metrics=[Metric(name="평균 문장 길이", value=13.4, unit="어절", zscore=0.6),
-                 Metric(name="대사 비율", value=41.0, unit="%"),
-                 Metric(name="어휘 다양도", value=0.47)]
-    )
-    return AnalyzeRunResponse(
-        manuscript_id=req.manuscript_id,
-        title="(MVP) 샘플 원고",
-        total_score=72.8,
-        strengths=["초반 갈등 명확", "대사 비율이 장르 평균과 근접"],
-        improvements=["3~5화 동기 보강 필요", "조연 말투 차별성 약함"],
-        sections=[genre, style]
-    )
+# 분석 작업 라우터 등록 (/analyze/run, /analyze/jobs/...)
+app.include_router(analyze.router)
+
+# RAG 검색 라우터 등록 (/rag/query, /rag/reindex)
+app.include_router(rag.router)
+
+# 저장된 리포트 목록/조회 라우터 등록 (/reports, /reports/{id})
+app.include_router(reports.router)
+
+# 장르별 기준 분포 라우터 등록 (/baselines, /baselines/update)
+app.include_router(baselines.router)
+
+# 저장한 원고의 구조 색인 라우터 등록 (/manuscripts/{id}/structure, /manuscripts/{id}/span)
+app.include_router(manuscripts.router)
 
 # 개발 실행: uvicorn app.main:app --reload --port 8000
@@ -14,6 +14,7 @@ class Metric(BaseModel):
     value: float
     unit: Optional[str] = None
     zscore: Optional[float] = None
+    percentile: Optional[float] = None  # 같은 장르(또는 전체) 코퍼스 원고 중 백분위 (0~100)
     note: Optional[str] = None
 
 class SectionScore(BaseModel):
@@ -35,6 +36,8 @@ class AnalyzeRunResponse(BaseModel):
     manuscript_id: Optional[str] = None
     title: Optional[str] = None
     processing_ms: Optional[int] = None
+    processing_breakdown: Dict[str, float] = {}  # processing_ms 내역 (단계 → ms, analyze.<단계> = 분석 파이프라인 단계)
+    duplicates: List[EvidenceItem] = []  # 저장된 원고 중 원고 전체/화가 거의 같은 것 (MinHash LSH)
 
 
 class FileUploadResponse(BaseModel):
@@ -43,4 +46,45 @@ class FileUploadResponse(BaseModel):
     size_bytes: int
     saved_as: str
     saved_dir: str
-    ext: str
\ No newline at end of file
+    ext: str
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    manuscript_id: str
+    status: JobStatus
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    manuscript_id: str
+    status: JobStatus
+    progress: List[str] = []          # 끝난 단계 (분석 파이프라인 단계 stats, dialogue, ..., result, 마지막 report)
+    total_steps: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class ReportSummary(BaseModel):
+    report_id: str
+    manuscript_id: Optional[str] = None
+    title: Optional[str] = None
+    content_sha1: Optional[str] = None
+    total_score: float
+    scores: Dict[str, Optional[float]] = {}   # genre, style, character, market, causality
+    analyzed_at: datetime
+    file_name: str
+    size_bytes: Optional[int] = None
+
+class ReportListResponse(BaseModel):
+    items: List[ReportSummary]
+    next_cursor: Optional[str] = None         # 다음 페이지 요청에 그대로 넘김 (없으면 마지막 페이지)
+
+
+class RagQueryRequest(BaseModel):
+    query: str
+    top_k: Optional[int] = None
+    threshold: Optional[float] = None
+    mode: Optional[Literal["exact", "ivf"]] = None
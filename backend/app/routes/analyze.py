@@ -0,0 +1,53 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from ..models.schemas import AnalyzeRunRequest, AnalyzeRunResponse, JobSubmitResponse, JobStatusResponse
+from ..services.jobs import job_runner
+
+import asyncio
+import json
+
+router = APIRouter(prefix="/analyze", tags=["analyze"])
+
+
+def _get_job(job_id: str) -> dict:
+    job = job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return job
+
+
+@router.post("/run", response_model=JobSubmitResponse, status_code=202, summary="Submit an analysis job")
+async def analyze_run(req: AnalyzeRunRequest):
+    # 저장(persist)된 원고를 분석하는 작업을 큐에 넣고 바로 반환
+    job = await job_runner.submit(req.manuscript_id, req.options)
+    return JobSubmitResponse(job_id=job["job_id"], manuscript_id=job["manuscript_id"], status=job["status"])
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse, summary="Job status")
+def job_status(job_id: str):
+    return JobStatusResponse(**_get_job(job_id))
+
+
+@router.get("/jobs/{job_id}/result", response_model=AnalyzeRunResponse, summary="Job result")
+def job_result(job_id: str):
+    job = _get_job(job_id)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=422, detail=job["error"])
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"작업이 아직 끝나지 않았습니다. (status={job['status']})")
+    return job_runner.result(job_id)
+
+
+@router.get("/jobs/{job_id}/events", summary="Job progress (Server-Sent Events)")
+async def job_events(job_id: str):
+    await asyncio.to_thread(_get_job, job_id)
+
+    async def stream():
+        async for event, data in job_runner.events(job_id):
+            if event == "ping":
+                yield ": ping\n\n"
+            else:
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,29 @@
+import asyncio
+
+from fastapi import APIRouter
+from ..services.workers import run_blocking
+
+router = APIRouter(prefix="/baselines", tags=["baselines"])
+_update_lock = asyncio.Lock()  # 갱신은 한 번에 하나씩 (meta.json을 읽고 다시 쓰므로)
+
+
+@router.get("", summary="Genre baseline summary (documents per genre)")
+def baselines_summary():
+    from ..services.baselines import get_baselines  # numpy는 처음 쓸 때 불러온다
+
+    store = get_baselines()
+    if store is None:
+        return {"built": False, "genres": {}}
+    return {"built": True, "metrics": store.meta["metrics"],
+            "genres": {g: store.count(g) for g in store.meta["genres"]}}
+
+
+@router.post("/update", summary="Fold new/changed corpus manuscripts into the genre baselines")
+async def baselines_update(rebuild: bool = False):
+    from ..services.baselines import get_baselines, update_baselines
+
+    # 새/바뀐 원고만 워커 프로세스에서 분석해 반영하고, 끝나면 이 프로세스에서 memmap으로 다시 연다
+    async with _update_lock:
+        summary = await run_blocking(update_baselines, None, None, rebuild)
+        get_baselines(reload=True)
+    return summary
@@ -1,22 +1,34 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi.responses import Response, StreamingResponse
 from ..config import settings
-from ..models.schemas import AnalyzeRunResponse, SectionScore, Metric, EvidenceItem
-from ..services.preprocess import extract_text_from_upload
-from ..services.analysis import rule_based_analyze
-
-import os, json, time, re, unicodedata, hashlib
+from ..models.schemas import AnalyzeRunResponse
+from ..services.cache import result_cache, cache_key
+from ..services.report import SECTION_NEEDS, build_response, build_sections, save_report_json
+from ..services.blobs import REF_SUFFIX, put_file, spool_dir, write_ref
+from ..services.manuscripts import register_manuscript
+from ..services.metrics import RequestTimer
+from ..services.structure import schedule_structure
+from ..services.duplicates import find_duplicates, index_signatures
+from ..services.workers import (run_analysis, iter_analysis_parts, combine_parts, gate,
+                                ExtractionError, AnalysisBusy)
+
+import os, json, time, re, unicodedata, hashlib, tempfile, asyncio, zipfile
+from contextlib import aclosing
 from datetime import datetime
-from typing import Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 router = APIRouter(prefix="/files", tags=["files"])
 
+# 업로드는 이 크기 단위로 읽어서 임시 파일로 흘려보낸다
+UPLOAD_CHUNK_BYTES = 1 << 20
+
 # Windows 예약/제어 문자 제거용
 _INVALID = re.compile(r'[<>:"/\\|?*\x00-\x1F]')
 
-def _check_size(n_bytes: int):
-    limit = settings.max_upload_size_mb * 1024 * 1024
-    if n_bytes > limit:
-        raise HTTPException(status_code=413, detail=f"File too large (>{settings.max_upload_size_mb} MB)")
+def _check_size(n_bytes: int, limit_mb: Optional[int] = None):
+    limit_mb = limit_mb or settings.max_upload_size_mb
+    if n_bytes > limit_mb * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"File too large (>{limit_mb} MB)")
 
 def _check_ext(filename: str):
     # 확장자 검사 (없으면 통과)
@@ -25,6 +37,9 @@ def _check_ext(filename: str):
         if settings.allowed_extensions and ext not in settings.allowed_extensions:
             raise HTTPException(status_code=400, detail=f"Extension .{ext} is not allowed")
 
+def _ext_of(filename: str) -> str:
+    return filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+
 def sanitize_filename(name: str) -> str:
     # 양끝 공백/점 제거, 제어문자 제거
     name = unicodedata.normalize("NFC", name).strip().strip(".")
@@ -33,7 +48,7 @@ def sanitize_filename(name: str) -> str:
     return name[:120] or "untitled"
 
 
-def build_storage_name(original: str, content_bytes: bytes) -> Tuple[str, str]:
+def build_storage_name(original: str, content_sha1: str) -> Tuple[str, str]:
     """
     저장용 파일명과(타임스탬프+원본명) 충돌 방지용 짧은 해시를 반환
     """
@@ -45,159 +60,446 @@ def build_storage_name(original: str, content_bytes: bytes) -> Tuple[str, str]:
     base = sanitize_filename(base)
     ts = datetime.now().strftime("%y.%m.%d")
     fname = f"{ts}_{base}.{ext}"
-    short = hashlib.sha1(content_bytes).hexdigest()[:6]
+    short = content_sha1[:6]
     return fname, short
 
+
+async def _spool_upload(file: UploadFile, dest_dir: Optional[str] = None,
+                        limit_mb: Optional[int] = None,
+                        timer: Optional[RequestTimer] = None) -> Tuple[str, str, int]:
+    """
+    업로드를 UPLOAD_CHUNK_BYTES 단위로 읽어 임시 파일(dest_dir 또는 시스템 임시 폴더)에 쓴다.
+    - 읽는 도중 크기 한도를 넘으면 바로 413 (나머지는 읽지 않음)
+    - SHA-1은 읽으면서 한 번만 계산
+    - timer를 주면 해시 계산 시간은 hash, 나머지(읽기/쓰기)는 read로 기록
+    반환: (임시 파일 경로, sha1 hex, 바이트 수)
+    """
+    started = time.perf_counter()
+    hash_s = 0.0
+    fd, tmp_path = tempfile.mkstemp(prefix=".upload-", suffix=".part", dir=dest_dir)
+    h = hashlib.sha1()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                _check_size(size, limit_mb)
+                t0 = time.perf_counter()
+                h.update(chunk)
+                hash_s += time.perf_counter() - t0
+                out.write(chunk)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    if timer is not None:
+        timer.size_bytes = size
+        timer.add("hash", hash_s)
+        timer.add("read", time.perf_counter() - started - hash_s)
+    return tmp_path, h.hexdigest(), size
+
 @router.post("/analyze/quick", response_model=AnalyzeRunResponse, summary="Analyze without saving")
 async def analyze_quick(
     file: UploadFile = File(...),
     persist: bool = Form(False),      # 저장 여부 (기본: 미저장)
     save_report: bool = Form(False),  # 리포트 저장 여부
+    incremental: bool = Form(False),  # 이전에 분석한 원고의 바뀐 구간만 다시 계산
 ):
-    # 1) 기본 검증
+    # 1) 기본 검증 + 임시 파일로 받기
+    # persist면 원문 저장소(blob) 안에 임시 파일을 만들어, 저장할 때 이름만 바꾸면 되게 한다
     _check_ext(file.filename or "")
-    contents = await file.read()  # 디스크에 저장하지 않음(옵션)
-    _check_size(len(contents))
-
-    started = time.perf_counter()
-
-    # 2) 텍스트 추출 (메모리에서)
+    timer = RequestTimer("/files/analyze/quick", file.filename or "")
+    tmp_path = None
     try:
-        text = await extract_text_from_upload(filename=file.filename or "", data=contents)
-    except Exception as e:
-        # 텍스트 추출 실패는 400으로 돌려서 프론트에서 메세지 확인 가능하게
-        raise HTTPException(status_code=400, detail=f"텍스트 추출 실패: {e}")
-
-    # 3) 규칙 기반 분석 (하드코딩 로직)
-    result = rule_based_analyze(text)
-
+        tmp_path, digest, _ = await _spool_upload(
+            file, str(spool_dir()) if persist else None, timer=timer
+        )
+        resp = await _analyze_spooled(file.filename or "", tmp_path, digest,
+                                      persist, save_report, incremental, timer)
+        # 응답 직렬화까지 재기 위해 JSON을 직접 만들어 돌려준다 (스키마는 response_model 그대로)
+        with timer.stage("serialize"):
+            body = resp.model_dump_json()
+        timer.finish(200)
+        return Response(content=body, media_type="application/json")
+    except HTTPException as e:
+        timer.finish(e.status_code)
+        raise
+    except Exception:
+        timer.finish(500)
+        raise
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+async def _analyze_spooled(filename: str, tmp_path: str, digest: str,
+                           persist: bool, save_report: bool,
+                           incremental: bool = False,
+                           timer: Optional[RequestTimer] = None) -> AnalyzeRunResponse:
+    started = time.perf_counter()
+    timer = timer or RequestTimer("")  # 기록하지 않는 빈 타이머 (finish를 부르지 않음)
+
+    # 같은 내용을 이미 분석했다면 캐시된 결과를 그대로 사용
+    key = cache_key(digest, _ext_of(filename))
+    result = result_cache.get(key)
+    timer.fields["cache"] = "miss" if result is None else "hit"
+    if result is None:
+        # 2) 텍스트 추출 + 3) 규칙 기반 분석 (프로세스 풀에서, 이벤트 루프를 막지 않음)
+        try:
+            result = await run_analysis(filename, tmp_path, incremental, timer, digest)
+        except ExtractionError as e:
+            # 텍스트 추출 실패는 400으로 돌려서 프론트에서 메세지 확인 가능하게
+            raise HTTPException(status_code=400, detail=f"텍스트 추출 실패: {e}")
+        except AnalysisBusy as e:
+            raise HTTPException(status_code=429, detail="분석 요청이 많습니다. 잠시 후 다시 시도하세요.",
+                                headers={"Retry-After": str(e.retry_after)})
+        result_cache.put(key, result)
+
+    return await _finish_spooled(filename, tmp_path, digest, result, persist, save_report, timer, started)
+
+
+async def _finish_spooled(filename: str, tmp_path: str, digest: str, result: Dict[str, Any],
+                          persist: bool, save_report: bool, timer: RequestTimer,
+                          started: float) -> AnalyzeRunResponse:
+    """분석이 끝난 업로드의 원문 저장(persist) + 응답 생성 + 리포트 저장 (quick/stream 공통)"""
     # 4) 원문/리포트 저장 준비
     stored_filename: str | None = None
 
     # 내용 해시 + 타임스탬프로 사람이 보기 좋은 ID 하나는 항상 만들어 둔다
-    content_hash = hashlib.sha1(contents).hexdigest()[:10]
+    content_hash = digest[:10]
     manuscript_id = f"{content_hash}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
 
+    # 3-1) 저장된 원고 중 원고 전체/화가 거의 같은 것 (저장하기 전에 찾으므로 같은 내용을 이미 저장해 뒀으면 그것도 나옴)
+    duplicates = []
+    if settings.near_duplicate_check and result.get("shingles"):
+        with timer.stage("dedup"):
+            duplicates = await asyncio.to_thread(find_duplicates, result["shingles"])
+
     # 4-1) 원문 저장 (persist가 true일 때만)
+    persist_started = time.perf_counter()
     if persist:
-        os.makedirs(settings.manuscript_path, exist_ok=True)
-
-        # 원본 파일명을 바탕으로 저장용 파일명 생성
-        fname, short = build_storage_name(file.filename or "upload", contents)
-        fullpath = os.path.join(settings.manuscript_path, fname)
+        # 내용은 해시로 한 번만 저장하고(같은 원고를 다시 올려도 쓰지 않음),
+        # 원문 폴더에는 원본 파일명을 바탕으로 한 이름의 참조 파일만 만든다
+        fname, _ = build_storage_name(filename or "upload", digest)
+        size = os.path.getsize(tmp_path)
+        await asyncio.to_thread(put_file, tmp_path, digest, _ext_of(fname))
+        ref_name = write_ref(fname, digest, filename, size)
+
+        stored_filename = ref_name[:-len(REF_SUFFIX)]
+        # /analyze/run 작업이 manuscript_id로 원문을 찾을 수 있게 등록
+        register_manuscript(manuscript_id, digest, ref_name, filename, size)
+        # 다음 업로드부터 이 원고와도 비교되도록 서명을 유사 원고 색인에 넣는다
+        await asyncio.to_thread(index_signatures, digest, result.get("shingles"))
+        # 화/문단/문장 위치 색인은 응답을 기다리게 하지 않고 워커에서 만든다
+        schedule_structure(digest, fname)
+        timer.add("persist", time.perf_counter() - persist_started)
 
-        # 파일명이 이미 존재하면 짧은 해시 꼬리표 추가
-        if os.path.exists(fullpath):
-            if "." in fname:
-                stem, ext = fname.rsplit(".", 1)
-                fname = f"{stem}_{short}.{ext}"
-            else:
-                fname = f"{fname}_{short}"
-            fullpath = os.path.join(settings.manuscript_path, fname)
+    elapsed_ms = int((time.perf_counter() - started) * 1000)
 
-        with open(fullpath, "wb") as f:
-            f.write(contents)
+    # 5) 응답용 섹션 구성 + 6) 응답 객체 생성
+    with timer.stage("build"):
+        resp = build_response(result, manuscript_id=manuscript_id, title=(filename or "(업로드)"),
+                              processing_ms=elapsed_ms, duplicates=duplicates, breakdown=timer.breakdown_ms())
 
-        stored_filename = fname
+    # 7) 리포트 JSON 저장 (save_report가 true면, persist 여부와 상관 없이)
+    if save_report:
+        with timer.stage("report"):
+            save_report_json(resp, content_sha1=digest)
 
-    elapsed_ms = int((time.perf_counter() - started) * 1000)
+    # 8) 클라이언트로 응답 반환
+    return resp
 
-    # 5) 응답용 섹션 구성 (하드코딩/규칙 기반)
-    genre = SectionScore(
-        label="genre",
-        score=result["scores"]["genre"],
-        metrics=[
-            Metric(name="문장 수", value=result["stats"]["num_sentences"]),
-            # Metric(name="추정 장르", value=None, note=result.get("genre_label")),
-        ],
-        evidences=[
-            EvidenceItem(source_id="rule", snippet="키워드 기반 장르 추정", score=0.7)
-        ],
-    )
 
-    style = SectionScore(
-        label="style",
-        score=result["scores"]["style"],
-        metrics=[
-            Metric(name="평균 문장 길이", value=result["stats"]["avg_sentence_len"]),
-            Metric(name="문단 수", value=result["stats"]["num_paragraphs"]),
-        ],
-        evidences=[
-            EvidenceItem(
-                source_id="rule",
-                snippet="문장 길이/문단 수 기반 스타일 점수",
-                score=0.8,
-            )
-        ],
-    )
+# ---------- 점진 분석 (Server-Sent Events) ----------
+def _sse(event: str, data: str) -> bytes:
+    """SSE 이벤트 한 건 (data는 줄바꿈 없는 JSON)"""
+    return f"event: {event}\ndata: {data}\n\n".encode("utf-8")
 
-    character = SectionScore(
-        label="character",
-        score=result["scores"]["character"],
-        metrics=[
-            Metric(name="대사 비율", value=result["stats"]["quote_ratio"]),
-        ],
-        evidences=[
-            EvidenceItem(
-                source_id="rule",
-                snippet="대사 비율을 캐릭터성에 반영",
-                score=0.6,
-            )
-        ],
-    )
 
-    market = SectionScore(
-        label="market",
-        score=result["scores"]["marketability"],
-        metrics=[],
-        evidences=[
-            EvidenceItem(
-                source_id="rule",
-                snippet="AI 연동 전 임시 시장성 점수",
-                score=0.3,
-            )
-        ],
-    )
+@router.post("/analyze/stream", summary="Analyze without saving, streaming sections as they are ready")
+async def analyze_stream(
+    file: UploadFile = File(...),
+    persist: bool = Form(False),
+    save_report: bool = Form(False),
+    incremental: bool = Form(False),
+):
+    """
+    /analyze/quick과 같은 입력을 받아 text/event-stream으로 돌려준다.
+    - accepted: 업로드를 다 받음 ({"filename", "size_bytes"})
+    - section: 필요한 분석 단계가 끝난 섹션부터 하나씩 (SectionScore). 같은 label이 다시 오면 바꿔 끼운다
+      (장르가 정해진 뒤 비교 기준 분포가 바뀌어 먼저 보낸 지표의 백분위가 달라진 경우)
+    - result: /analyze/quick과 같은 최종 응답 (AnalyzeRunResponse)
+    - error: {"status", "detail", "retry_after"} (추출 실패 400, 대기열 초과 429)
+    캐시에 있거나 incremental이면 한꺼번에 계산해서 섹션을 바로 모두 보낸다.
+    """
+    filename = file.filename or ""
+    _check_ext(filename)
+    timer = RequestTimer("/files/analyze/stream", filename)
+    tmp_path = None
+    try:
+        tmp_path, digest, _ = await _spool_upload(
+            file, str(spool_dir()) if persist else None, timer=timer
+        )
+    except HTTPException as e:
+        timer.finish(e.status_code)
+        raise
+    except Exception:
+        timer.finish(500)
+        raise
+
+    async def events():
+        started = time.perf_counter()
+        status = 499  # 끝까지 보내기 전에 클라이언트가 끊으면 그대로 남음
+        sent: Dict[str, Any] = {}
+
+        def section_event(section) -> bytes:
+            if not sent:
+                timer.fields["ttfr_ms"] = int((time.perf_counter() - timer.started) * 1000)
+            sent[section.label] = section
+            return _sse("section", section.model_dump_json())
+
+        try:
+            yield _sse("accepted", json.dumps({"filename": filename, "size_bytes": timer.size_bytes},
+                                              ensure_ascii=False))
+            key = cache_key(digest, _ext_of(filename))
+            result = result_cache.get(key)
+            timer.fields["cache"] = "miss" if result is None else "hit"
+            if result is None and incremental:
+                # 증분 분석은 이전 구간 결과와 맞춰 보는 한 덩어리 작업이라 나눠 돌리지 않는다
+                result = await run_analysis(filename, tmp_path, True, timer, digest)
+                result_cache.put(key, result)
+            elif result is None:
+                parts: Dict[str, Dict[str, Any]] = {}
+                async with aclosing(iter_analysis_parts(filename, tmp_path, timer, digest)) as stream:
+                    async for part, out in stream:
+                        parts[part] = out
+                        have = {name for done in parts.values() for name in done}
+                        ready = [label for label, needs in SECTION_NEEDS.items()
+                                 if label not in sent and needs <= have]
+                        if ready:
+                            for section in build_sections(combine_parts(parts), ready):
+                                yield section_event(section)
+                result = combine_parts(parts, timer)
+                result_cache.put(key, result)
+
+            resp = await _finish_spooled(filename, tmp_path, digest, result, persist, save_report, timer, started)
+            for section in resp.sections:
+                if sent.get(section.label) != section:
+                    yield section_event(section)
+            with timer.stage("serialize"):
+                body = resp.model_dump_json()
+            status = 200
+            yield _sse("result", body)
+        except ExtractionError as e:
+            status = 400
+            yield _sse("error", json.dumps({"status": 400, "detail": f"텍스트 추출 실패: {e}"}, ensure_ascii=False))
+        except AnalysisBusy as e:
+            status = 429
+            yield _sse("error", json.dumps({"status": 429, "detail": "분석 요청이 많습니다. 잠시 후 다시 시도하세요.",
+                                            "retry_after": e.retry_after}, ensure_ascii=False))
+        except Exception:
+            status = 500
+            yield _sse("error", json.dumps({"status": 500, "detail": "분석 중 오류가 났습니다."}, ensure_ascii=False))
+            raise
+        finally:
+            timer.finish(status)
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    # 프록시가 이벤트를 모아 두지 않도록
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/cache/stats", summary="Analysis result cache counters")
+def cache_stats():
+    return result_cache.stats()
+
+@router.get("/analyze/queue", summary="Analysis admission queue state")
+def queue_stats():
+    return gate.stats()
+
+
+# ---------- 배치 분석 ----------
+def _spool_zip_entry(zf: zipfile.ZipFile, info: zipfile.ZipInfo, dest_dir: Optional[str],
+                     timer: Optional[RequestTimer] = None) -> Tuple[str, str]:
+    """zip 항목 하나를 임시 파일로 풀면서 해시를 계산한다 (스레드에서 실행). 한도를 넘으면 413."""
+    _check_size(info.file_size)
+    started = time.perf_counter()
+    hash_s = 0.0
+    fd, tmp_path = tempfile.mkstemp(prefix=".upload-", suffix=".part", dir=dest_dir)
+    h = hashlib.sha1()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out, zf.open(info) as src:
+            while True:
+                chunk = src.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                _check_size(size)  # 선언된 크기와 실제가 다른 zip 대비
+                t0 = time.perf_counter()
+                h.update(chunk)
+                hash_s += time.perf_counter() - t0
+                out.write(chunk)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    if timer is not None:
+        timer.add("hash", hash_s)
+        timer.add("read", time.perf_counter() - started - hash_s)
+    return tmp_path, h.hexdigest()
+
+
+async def _batch_item(source, zf: Optional[zipfile.ZipFile], dest_dir: Optional[str],
+                      persist: bool, save_report: bool) -> Tuple[str, int, float, int]:
+    """
+    배치 항목 하나를 분석해서 (NDJSON 한 줄, 상태 코드, 걸린 ms, 바이트 수)를 돌려준다.
+    source: zip이면 ZipInfo, 아니면 미리 받아 둔 (파일명, 임시 경로, sha1, 크기)
+    대기열이 꽉 차서 429가 나면 잠시 쉬었다가 다시 시도한다 (batch_max_wait_seconds가 지나면 그 항목은 429 실패 줄).
+    """
+    started = time.perf_counter()
+    tmp_path = None
+    # 성공/실패 줄 모두 같은 이름 (zip 항목은 폴더 경로를 뺀 파일명)
+    if zf is not None:
+        filename, size = os.path.basename(source.filename), source.file_size
+    else:
+        filename, size = source[0], source[3]
+    timer = None
+    try:
+        if zf is not None:
+            _check_ext(filename)
+            timer = RequestTimer("/files/analyze/batch", filename, size)
+            tmp_path, digest = await asyncio.to_thread(_spool_zip_entry, zf, source, dest_dir, timer)
+        else:
+            _, tmp_path, digest, _ = source
+            timer = RequestTimer("/files/analyze/batch", filename, size)
+        deadline = time.perf_counter() + settings.batch_max_wait_seconds
+        while True:
+            try:
+                resp = await _analyze_spooled(filename, tmp_path, digest, persist, save_report, timer=timer)
+                break
+            except HTTPException as e:
+                if e.status_code != 429 or time.perf_counter() >= deadline:
+                    raise
+                await asyncio.sleep(0.2)
+        with timer.stage("serialize"):
+            line = resp.model_dump_json()
+        status = 200
+    except HTTPException as e:
+        line = json.dumps({"filename": filename, "status": e.status_code, "error": e.detail}, ensure_ascii=False)
+        status = e.status_code
+    except Exception as e:
+        # 깨진 zip 항목 등: 배치 전체를 멈추지 않고 해당 항목만 실패로 기록
+        line = json.dumps({"filename": filename, "status": 500, "error": str(e)}, ensure_ascii=False)
+        status = 500
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    if timer is not None:
+        timer.finish(status)
+    return line, status, (time.perf_counter() - started) * 1000, size
+
+
+async def _stream_batch(sources: list, zip_path: Optional[str], dest_dir: Optional[str],
+                        persist: bool, save_report: bool):
+    """
+    항목들을 최대 max_concurrent_analyses개씩 동시에 분석하고, 끝나는 대로 한 줄씩 내보낸다.
+    동시에 떠 있는 항목 수가 제한되므로 파일이 아무리 많아도 메모리 사용량은 일정하다.
+    """
+    started = time.perf_counter()
+    zf = zipfile.ZipFile(zip_path) if zip_path else None
+    items = iter(sources if zf is None else (i for i in zf.infolist() if not i.is_dir()))
+    parallel = gate.max_concurrent
+    pending: set = set()
+    timings: list = []
+    n_ok = n_bytes = 0
+
+    def refill():
+        while len(pending) < parallel:
+            src = next(items, None)
+            if src is None:
+                return
+            pending.add(asyncio.create_task(_batch_item(src, zf, dest_dir, persist, save_report)))
 
-    plaus = SectionScore(
-        label="causality",
-        score=result["scores"]["plausibility"],
-        metrics=[],
-        evidences=[
-            EvidenceItem(
-                source_id="rule",
-                snippet="AI 연동 전 임시 개연성 점수",
-                score=0.3,
-            )
-        ],
-    )
+    try:
+        refill()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.discard(task)
+                line, status, ms, size = task.result()
+                timings.append({"status": status, "ms": round(ms, 1), "bytes": size})
+                n_ok += status == 200
+                n_bytes += size
+                yield line + "\n"
+            refill()
+
+        elapsed = time.perf_counter() - started
+        summary = {
+            "files": len(timings),
+            "succeeded": n_ok,
+            "failed": len(timings) - n_ok,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "files_per_sec": round(len(timings) / elapsed, 2) if elapsed else None,
+            "mb_per_sec": round(n_bytes / 2**20 / elapsed, 2) if elapsed else None,
+            "timings": timings,
+        }
+        yield json.dumps({"summary": summary}, ensure_ascii=False) + "\n"
+    finally:
+        for task in pending:
+            task.cancel()
+        if zf is not None:
+            zf.close()
+        if zip_path:
+            os.unlink(zip_path)
+        for src in sources:
+            if os.path.exists(src[1]):
+                os.unlink(src[1])
+
+
+@router.post("/analyze/batch", summary="Analyze many files (or one zip) and stream NDJSON results")
+async def analyze_batch(
+    files: List[UploadFile] = File(...),
+    persist: bool = Form(False),
+    save_report: bool = Form(False),
+):
+    """
+    여러 파일 또는 zip 하나를 받아 병렬로 분석한다.
+    응답은 application/x-ndjson: 끝나는 순서대로 AnalyzeRunResponse 한 줄씩
+    (실패한 항목은 {"filename", "status", "error"}), 마지막 줄은 {"summary": {...}}.
+    """
+    dest_dir = str(spool_dir()) if persist else None
 
-    # 6) 응답 객체 생성
-    resp = AnalyzeRunResponse(
-        total_score=result["scores"]["total"],
-        strengths=result["strengths"],
-        improvements=result["improvements"],
-        sections=[genre, style, character, market, plaus],
-        manuscript_id=manuscript_id,
-        analyzed_at=datetime.now(),
-        processing_ms=elapsed_ms,
-        title=(file.filename or "(업로드)"),
+    # 응답을 스트리밍하는 동안 업로드 객체는 닫히므로, 본문은 먼저 임시 파일로 받아 둔다
+    sources: list = []
+    zip_path = None
+    total = 0
+    try:
+        if len(files) == 1 and _ext_of(files[0].filename or "") == "zip":
+            zip_path, _, _ = await _spool_upload(files[0], None, settings.max_batch_upload_size_mb)
+            if not zipfile.is_zipfile(zip_path):
+                raise HTTPException(status_code=400, detail="zip 파일을 읽을 수 없습니다.")
+        else:
+            for f in files:
+                _check_ext(f.filename or "")
+                tmp_path, digest, size = await _spool_upload(f, dest_dir)
+                sources.append((f.filename or "", tmp_path, digest, size))
+                total += size
+                _check_size(total, settings.max_batch_upload_size_mb)
+    except BaseException:
+        for src in sources:
+            os.unlink(src[1])
+        if zip_path:
+            os.unlink(zip_path)
+        raise
+
+    return StreamingResponse(
+        _stream_batch(sources, zip_path, dest_dir, persist, save_report),
+        media_type="application/x-ndjson",
     )
 
-    # 7) 리포트 JSON 저장 (save_report가 true면, persist 여부와 상관 없이)
-    if save_report:
-        os.makedirs(settings.report_path, exist_ok=True)
-        report_data = resp.model_dump()
-        with open(
-            os.path.join(settings.report_path, f"{manuscript_id}.json"),
-            "w",
-            encoding="utf-8",
-        ) as jf:
-            json.dump(report_data, jf, ensure_ascii=False, indent=2)
-
-    # 8) 클라이언트로 응답 반환
-    return resp
-
 # @router.post("/analyze/quick", response_model=AnalyzeRunResponse, summary="Analyze with optional persist")
 # async def analyze_quick(
 #     file: UploadFile = File(...),
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Literal, Optional
+from ..services.manuscripts import get_manuscript
+from ..services.workers import run_blocking
+
+import asyncio
+
+router = APIRouter(prefix="/manuscripts", tags=["manuscripts"])
+
+
+async def _open_structure(manuscript_id: str):
+    from ..services.structure import StructureIndex, ensure_structure  # numpy는 처음 쓸 때 불러온다
+
+    # SQLite 조회/색인 파일 열기는 이벤트 루프 밖에서
+    info = await asyncio.to_thread(get_manuscript, manuscript_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="원고를 찾을 수 없습니다.")
+    index = await asyncio.to_thread(StructureIndex.open, info["content_sha1"])
+    if index is None:
+        # 저장 직후라 아직 만드는 중이거나, 색인 기능 이전에 저장한 원고 → 지금 만든다
+        await run_blocking(ensure_structure, info["content_sha1"], info["name"])
+        index = await asyncio.to_thread(StructureIndex.open, info["content_sha1"])
+        if index is None:
+            raise HTTPException(status_code=404, detail="원문 파일을 찾을 수 없습니다.")
+    return index
+
+
+@router.get("/{manuscript_id}/structure", summary="Chapter/paragraph/sentence counts and chapter offsets")
+async def manuscript_structure(manuscript_id: str):
+    index = await _open_structure(manuscript_id)
+    return {"manuscript_id": manuscript_id, "content_sha1": index.sha1, "num_chars": index.num_chars,
+            "counts": index.counts, "chapters": index.chapters()}
+
+
+@router.get("/{manuscript_id}/span", summary="Exact text of one chapter/paragraph/sentence")
+async def manuscript_span(
+    manuscript_id: str,
+    kind: Literal["chapter", "paragraph", "sentence"] = "sentence",
+    index: Optional[int] = Query(None, ge=0, description="kind 단위 번호"),
+    offset: Optional[int] = Query(None, ge=0, description="이 글자 위치를 포함하는 단위 (index 대신)"),
+):
+    if (index is None) == (offset is None):
+        raise HTTPException(status_code=400, detail="index와 offset 중 하나만 주세요.")
+    structure = await _open_structure(manuscript_id)
+    if index is None:
+        index = structure.find(kind, offset)
+    try:
+        return structure.span(kind, -1 if index is None else index)
+    except IndexError:
+        raise HTTPException(status_code=404, detail="범위를 벗어났습니다.")
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException
+from typing import List
+from ..models.schemas import EvidenceItem, RagQueryRequest
+from ..services.workers import run_blocking
+
+router = APIRouter(prefix="/rag", tags=["rag"])
+
+
+@router.post("/query", response_model=List[EvidenceItem], summary="Search the genre/market guide corpus")
+async def rag_query(req: RagQueryRequest):
+    from ..services.retrieval import get_guide_index  # numpy/임베딩 스택은 처음 검색할 때 불러온다
+
+    index = get_guide_index()
+    if index is None:
+        raise HTTPException(status_code=409, detail="가이드 인덱스가 없습니다. /rag/reindex를 먼저 실행하세요.")
+    return await run_blocking(index.search, req.query, req.top_k, req.threshold, req.mode)
+
+
+@router.post("/reindex", summary="Rebuild the guide index from corpus_path")
+async def rag_reindex():
+    from ..services.retrieval import GuideIndex, get_guide_index
+
+    # 인덱스 빌드는 워커 프로세스에서, 끝나면 이 프로세스에서 memmap으로 다시 연다
+    meta = await run_blocking(GuideIndex.build)
+    get_guide_index(reload=True)
+    return meta
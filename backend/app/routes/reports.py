@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, Query
+from datetime import datetime
+from typing import Literal, Optional
+from ..models.schemas import AnalyzeRunResponse, ReportListResponse
+from ..services.report import list_reports, load_report, reindex_reports
+from ..services.workers import run_blocking
+
+import binascii
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+
+@router.get("", response_model=ReportListResponse, summary="List/search saved reports (keyset pagination)")
+def reports_list(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+    sort: Literal["date", "score"] = "date",
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    q: Optional[str] = Query(None, description="제목/리포트 ID 부분 일치"),
+    content_sha1: Optional[str] = None,
+):
+    try:
+        items, next_cursor = list_reports(limit, cursor, sort, min_score, max_score, since, until, q, content_sha1)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="잘못된 cursor입니다.")
+    return ReportListResponse(items=items, next_cursor=next_cursor)
+
+
+@router.post("/reindex", summary="Rebuild the report index from report_path")
+async def reports_reindex():
+    return await run_blocking(reindex_reports)
+
+
+@router.get("/{report_id}", response_model=AnalyzeRunResponse, summary="Saved report")
+def report_get(report_id: str):
+    resp = load_report(report_id)
+    if resp is None:
+        raise HTTPException(status_code=404, detail="리포트를 찾을 수 없습니다.")
+    return resp
@@ -1,103 +1,537 @@
 # app/services/analysis.py
 
-from collections import Counter
+from __future__ import annotations
+
+import base64
+from dataclasses import dataclass, field
+import math
 import re
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple, Union
 
-def rule_based_analyze(text: str) -> Dict[str, Any]:
-    # --- 0) 기본 통계 ---
-    paragraphs = [p for p in text.split("\n") if p.strip()]
-    num_paragraphs = len(paragraphs)
+from .dialogue import DialogueScanner
+from .genre import genre_probabilities, get_genre_matcher
+from .pipeline import Pipeline, Stage
+from .sketch import hll_estimate, hll_registers, hll_union
 
-    sentences = re.split(r"[.?!…]+", text)
-    sentences = [s.strip() for s in sentences if s.strip()]
-    num_sentences = len(sentences)
+# 분석 규칙이 바뀌면 올린다 (결과 캐시 키에 포함됨)
+ANALYZER_VERSION = "rule-6"
 
-    total_chars = sum(len(s) for s in sentences)
-    avg_sentence_len = total_chars / num_sentences if num_sentences else 0
+# 원고를 한 번에 읽지 않고 이 크기(문자 수) 단위로 나눠서 훑는다
+CHUNK_CHARS = 1 << 16
+# 훑을 때는 덩어리를 줄 끝에서 끊는다. 줄바꿈 없이 이만큼 쌓이면 줄 중간이라도 끊음
+MAX_BLOCK_CHARS = 1 << 20
 
-    quote_chars = sum(ch == "“" or ch == "”" or ch == '"' for ch in text)
-    quote_ratio = quote_chars / total_chars if total_chars else 0
+SENTENCE_END = re.compile(r"[.?!…]+")
+QUOTE_CHARS = ("“", "”", '"')
+# 어휘 종류를 셀 때 어절 양끝에서 떼는 문장부호/따옴표
+WORD_PUNCT = ".,?!…~·:;\"'“”‘’()[]{}<>「」『』《》〈〉-—–"
+
+
+def _word_types(tokens: Iterable[str]) -> set:
+    """어절 → 어휘 종류 비교용 형태 (양끝 문장부호 제거, 소문자)"""
+    out = {t.strip(WORD_PUNCT).lower() for t in set(tokens)}  # 같은 어절은 한 번만 다듬음
+    out.discard("")
+    return out
+
+
+def analyzer_version() -> str:
+    """캐시 키용 버전: 규칙 버전 + 장르 어휘 지문 (어휘 파일을 고치면 캐시가 자동으로 갈림)"""
+    return f"{ANALYZER_VERSION}.{get_genre_matcher().fingerprint[:8]}"
+
+
+# ---------- 양끝 공백 제거 길이(strip) 상태 ----------
+# (앞 공백 수, 본문 길이, 뒤 공백 수). 본문이 0이면 전체가 공백이고 길이는 앞 공백 칸에 둔다.
+# 조각 단위로 계산한 뒤 이어 붙여도 `len(s.strip())`과 같은 값이 나온다.
+Strip = Tuple[int, int, int]
+_EMPTY: Strip = (0, 0, 0)
+
+
+def _strip_state(s: str) -> Strip:
+    core = s.strip()
+    if not core:
+        return (len(s), 0, 0)
+    lead = len(s) - len(s.lstrip())
+    return (lead, len(core), len(s) - lead - len(core))
+
+
+def _strip_concat(a: Strip, b: Strip) -> Strip:
+    if not a[1]:
+        return (a[0] + b[0], b[1], b[2])
+    if not b[1]:
+        return (a[0], a[1], a[2] + b[0])
+    return (a[0], a[1] + a[2] + b[0] + b[1], b[2])
+
+
+@dataclass
+class TextStats:
+    """
+    원고 일부(조각)에 대한 기본 통계. 이웃한 조각끼리 `merge`로 합치면
+    전체 원고를 한 번에 계산한 것과 같은 결과가 된다.
+    - 문단: '\\n' 기준 줄 중 공백이 아닌 줄
+    - 문장: 문장부호([.?!…]+) 사이 구간 중 공백이 아닌 것 (조각 경계에 걸친 줄/문장은 head/tail로 들고 다님)
+    - 어절: 공백으로 나뉜 토큰. 어휘 종류는 HyperLogLog 레지스터(2KB 고정)로 추정
+    """
+    # 문단(줄) - 첫 줄바꿈 앞/마지막 줄바꿈 뒤 조각이 공백이 아닌지
+    line_closed: bool = False
+    line_head: bool = False
+    line_count: int = 0
+    line_tail: bool = False
+    # 문장 - 첫 문장부호 앞/마지막 문장부호 뒤 조각의 strip 상태
+    sent_closed: bool = False
+    sent_head: Strip = _EMPTY
+    sent_count: int = 0
+    sent_chars: int = 0
+    sent_tail: Strip = _EMPTY
+    # 대사 따옴표 문자 수
+    quote_chars: int = 0
+    # 어절 - 첫 공백 앞/마지막 공백 뒤 토큰 조각 (공백이 없으면 조각 전체가 word_head)
+    word_closed: bool = False
+    word_head: str = ""
+    word_count: int = 0
+    word_tail: str = ""
+    word_regs: bytes = b""
+    # 장르별 어휘 등장 횟수
+    genre_hits: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_chunk(cls, chunk: str, lines: Optional[List[str]] = None, sentences: Optional[List[str]] = None,
+                   tokens: Optional[List[str]] = None) -> "TextStats":
+        """lines/sentences/tokens: 이미 나눠 둔 chunk (분석 파이프라인의 덩어리별 결과를 같이 씀)"""
+        st = cls(quote_chars=sum(chunk.count(q) for q in QUOTE_CHARS))
+
+        if lines is None:
+            lines = chunk.split("\n")
+        st.line_head = bool(lines[0].strip())
+        if len(lines) > 1:
+            st.line_closed = True
+            inner = list(map(str.strip, lines[1:-1]))
+            st.line_count = len(inner) - inner.count("")
+            st.line_tail = bool(lines[-1].strip())
+
+        parts = SENTENCE_END.split(chunk) if sentences is None else sentences
+        st.sent_head = _strip_state(parts[0])
+        if len(parts) > 1:
+            st.sent_closed = True
+            inner = list(map(str.strip, parts[1:-1]))
+            st.sent_count = len(inner) - inner.count("")
+            st.sent_chars = sum(map(len, inner))
+            st.sent_tail = _strip_state(parts[-1])
+
+        if tokens is None:
+            tokens = chunk.split()
+        lead_ws, trail_ws = chunk[:1].isspace(), chunk[-1:].isspace()
+        if len(tokens) == 1 and not (lead_ws or trail_ws):
+            st.word_head = tokens[0]
+        elif chunk:
+            st.word_closed = True
+            lo = 0 if lead_ws or not tokens else 1
+            hi = len(tokens) if trail_ws or not tokens else len(tokens) - 1
+            if lo == 1:
+                st.word_head = tokens[0]
+            if hi < len(tokens):
+                st.word_tail = tokens[-1]
+            inner = tokens[lo:hi]
+            st.word_count = len(inner)
+            st.word_regs = hll_registers(_word_types(inner))
+        return st
+
+    def merge(self, other: "TextStats") -> "TextStats":
+        out = TextStats(
+            quote_chars=self.quote_chars + other.quote_chars,
+            genre_hits=_add_counts(self.genre_hits, other.genre_hits),
+        )
+
+        # 줄
+        if not self.line_closed:
+            out.line_head = self.line_head or other.line_head
+            out.line_closed = other.line_closed
+            out.line_count = other.line_count
+            out.line_tail = other.line_tail
+        elif not other.line_closed:
+            out.line_closed = True
+            out.line_head = self.line_head
+            out.line_count = self.line_count
+            out.line_tail = self.line_tail or other.line_head
+        else:
+            out.line_closed = True
+            out.line_head = self.line_head
+            out.line_count = (self.line_count + other.line_count
+                              + (1 if self.line_tail or other.line_head else 0))
+            out.line_tail = other.line_tail
+
+        # 문장
+        if not self.sent_closed:
+            out.sent_head = _strip_concat(self.sent_head, other.sent_head)
+            out.sent_closed = other.sent_closed
+            out.sent_count = other.sent_count
+            out.sent_chars = other.sent_chars
+            out.sent_tail = other.sent_tail
+        elif not other.sent_closed:
+            out.sent_closed = True
+            out.sent_head = self.sent_head
+            out.sent_count = self.sent_count
+            out.sent_chars = self.sent_chars
+            out.sent_tail = _strip_concat(self.sent_tail, other.sent_head)
+        else:
+            mid = _strip_concat(self.sent_tail, other.sent_head)[1]
+            out.sent_closed = True
+            out.sent_head = self.sent_head
+            out.sent_count = self.sent_count + other.sent_count + (1 if mid else 0)
+            out.sent_chars = self.sent_chars + other.sent_chars + mid
+            out.sent_tail = other.sent_tail
+
+        # 어절
+        out.word_regs = hll_union(self.word_regs, other.word_regs)
+        if not self.word_closed:
+            out.word_head = self.word_head + other.word_head
+            out.word_closed = other.word_closed
+            out.word_count = other.word_count
+            out.word_tail = other.word_tail
+        elif not other.word_closed:
+            out.word_closed = True
+            out.word_head = self.word_head
+            out.word_count = self.word_count
+            out.word_tail = self.word_tail + other.word_head
+        else:
+            mid = self.word_tail + other.word_head
+            out.word_closed = True
+            out.word_head = self.word_head
+            out.word_count = self.word_count + other.word_count + (1 if mid else 0)
+            out.word_tail = other.word_tail
+            if mid:
+                out.word_regs = hll_union(out.word_regs, hll_registers(_word_types([mid])))
+        return out
+
+    # ---------- 직렬화 (캐시 저장용) ----------
+    def to_dict(self) -> Dict[str, Any]:
+        d = {f: getattr(self, f) for f in self.__dataclass_fields__}
+        d["sent_head"], d["sent_tail"] = list(self.sent_head), list(self.sent_tail)
+        d["word_regs"] = base64.b64encode(self.word_regs).decode("ascii")
+        d["genre_hits"] = dict(self.genre_hits)
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "TextStats":
+        st = cls(**d)
+        st.sent_head, st.sent_tail = tuple(d["sent_head"]), tuple(d["sent_tail"])
+        st.word_regs = base64.b64decode(d["word_regs"])
+        st.genre_hits = dict(d["genre_hits"])
+        return st
+
+    # ---------- 최종 값 ----------
+    @property
+    def num_paragraphs(self) -> int:
+        n = int(self.line_head)
+        if self.line_closed:
+            n += self.line_count + int(self.line_tail)
+        return n
+
+    def _sentence_totals(self) -> Tuple[int, int]:
+        count, chars = self.sent_count, self.sent_chars
+        edges = (self.sent_head, self.sent_tail) if self.sent_closed else (self.sent_head,)
+        for s in edges:
+            if s[1]:
+                count += 1
+                chars += s[1]
+        return count, chars
+
+    def _word_totals(self) -> Tuple[int, float]:
+        """(어절 수, 어휘 종류 추정치) - 양끝에 걸쳐 있던 토큰까지 포함"""
+        edges = [self.word_head, self.word_tail] if self.word_closed else [self.word_head]
+        edges = [w for w in edges if w]
+        regs = hll_union(self.word_regs, hll_registers(_word_types(edges))) if edges else self.word_regs
+        return self.word_count + len(edges), hll_estimate(regs)
+
+    def as_dict(self) -> Dict[str, Any]:
+        num_sentences, total_chars = self._sentence_totals()
+        num_words, distinct = self._word_totals()
+        distinct = min(distinct, num_words)
+        return {
+            "num_paragraphs": self.num_paragraphs,
+            "num_sentences": num_sentences,
+            "avg_sentence_len": total_chars / num_sentences if num_sentences else 0,
+            "quote_ratio": self.quote_chars / total_chars if total_chars else 0,
+            "num_words": num_words,
+            "avg_sentence_words": num_words / num_sentences if num_sentences else 0,
+            "distinct_words": round(distinct),
+            "type_token_ratio": distinct / num_words if num_words else 0,
+            # Herdan's C = log(종류)/log(어절 수): TTR과 달리 원고 길이에 거의 영향받지 않음
+            "lexical_diversity": math.log(distinct) / math.log(num_words) if num_words > 1 and distinct >= 1 else 0,
+        }
+
+
+def _add_counts(a: Dict[str, int], b: Dict[str, int]) -> Dict[str, int]:
+    if not b:
+        return dict(a)
+    out = dict(a)
+    for k, n in b.items():
+        out[k] = out.get(k, 0) + n
+    return out
+
+
+def count_genres(text: str) -> Dict[str, int]:
+    """text 안의 장르별 어휘 등장 횟수 (어휘에 줄바꿈이 없으므로 줄 단위로 나눈 조각에도 그대로 쓸 수 있음)"""
+    return get_genre_matcher().counts_dict(text)
+
+
+def iter_chunks(text: str, size: int = CHUNK_CHARS) -> Iterable[str]:
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+
+def coalesce(pieces: Iterable[str], size: int = CHUNK_CHARS) -> Iterable[str]:
+    """문단처럼 잘게 들어오는 조각을 size자 안팎으로 모은다 (조각마다 feed하는 고정 비용을 줄임)."""
+    buf, n = [], 0
+    for p in pieces:
+        buf.append(p)
+        n += len(p)
+        if n >= size:
+            yield "".join(buf)
+            buf, n = [], 0
+    if buf:
+        yield "".join(buf)
+
+
+def iter_blocks(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    """원문 → CHUNK_CHARS자 안팎의 덩어리. 줄 끝에서 끊으므로 덩어리마다 나눈 줄을 모든 훑기 단계가 같이 쓸 수 있다."""
+    carry = ""
+    for chunk in (iter_chunks(source) if isinstance(source, str) else coalesce(source)):
+        text = carry + chunk if carry else chunk
+        cut = text.rfind("\n") + 1
+        if not cut and len(text) < MAX_BLOCK_CHARS:
+            carry = text
+            continue
+        cut = cut or len(text)
+        carry = text[cut:]
+        yield text[:cut]
+    if carry:
+        yield carry
+
+
+def scan_text(source: Union[str, Iterable[str]]) -> TextStats:
+    """문자열 또는 문자열 조각 이터레이터를 한 번 훑어 통계(장르 어휘 횟수 포함)를 만든다."""
+    out = PIPELINE.run(source, ("text_stats", "genre_hits"))
+    st = out["text_stats"]
+    st.genre_hits = out["genre_hits"]
+    return st
+
+
+def genre_label_from(genre_hits: Dict[str, int]) -> str:
+    """가장 많이 등장한 장르 (동률이면 어휘 파일 순서상 앞쪽)"""
+    best = max(get_genre_matcher().genres, key=lambda g: genre_hits.get(g, 0), default=None)
+    if best is None or not genre_hits.get(best):
+        return "미분류"
+    return f"{best}(추정)"
 
-    stats = {
-        "num_paragraphs": num_paragraphs,
-        "num_sentences": num_sentences,
-        "avg_sentence_len": avg_sentence_len,
-        "quote_ratio": quote_ratio,
-    }
 
-    # --- 1) 장르 점수(대충 예시용) ---
-    # 키워드 몇 개로 장르 추정 (AI 없이 간이 버전)
-    lower = text.lower()
-    genre_label = "미분류"
-    if any(k in lower for k in ["황제", "공작", "기사", "마법"]):
-        genre_label = "판타지(추정)"
-    if any(k in lower for k in ["왕자", "사랑", "키스", "데이트"]):
-        genre_label = "로맨스(추정)"
+# ---------- 훑기 단계 (원문 한 번 훑을 때 같이 돔) ----------
+class _StatsScan:
+    """문단/문장/어절 통계 (TextStats)"""
 
-    genre_score = 75.0  # 일단 고정값 / 나중에 AI가 바꾸게 함
+    def __init__(self) -> None:
+        self.stats = TextStats()
 
-    # --- 2) 스타일 점수 ---
+    def feed(self, block: Dict[str, Any]) -> None:
+        chunk = TextStats.from_chunk(block["text"], block["lines"], block["sentences"], block["tokens"])
+        self.stats = self.stats.merge(chunk)
+
+    def result(self) -> Dict[str, Any]:
+        return {"text_stats": self.stats}
+
+
+class _DialogueScan:
+    """대사/화자 통계 (dialogue.DialogueScanner)"""
+
+    def __init__(self) -> None:
+        self.scanner = DialogueScanner()
+
+    def feed(self, block: Dict[str, Any]) -> None:
+        self.scanner.feed(block["text"], block["lines"])
+
+    def result(self) -> Dict[str, Any]:
+        return {"dialogue": self.scanner.result()}
+
+
+class _GenreScan:
+    """
+    장르별 어휘 등장 횟수. 어휘가 덩어리 경계에 걸리는 경우를 위해
+    직전 덩어리의 끝부분(가장 긴 어휘 길이 - 1)을 남겨 둔다.
+    """
+
+    def __init__(self) -> None:
+        self._matcher = get_genre_matcher()
+        self._hits = [0] * len(self._matcher.genres)
+        self._keep = max(0, self._matcher.max_len - 1)
+        self._overlap = ""
+
+    def feed(self, block: Dict[str, Any]) -> None:
+        window = self._overlap + block["lower"]
+        for i, n in enumerate(self._matcher.count(window, start=len(self._overlap))):
+            self._hits[i] += n
+        self._overlap = window[-self._keep:] if self._keep else ""
+
+    def result(self) -> Dict[str, Any]:
+        return {"genre_hits": {g: n for g, n in zip(self._matcher.genres, self._hits) if n}}
+
+
+class _ShingleScan:
+    """유사 원고 검색용 MinHash 서명 (duplicates.ShingleScanner)"""
+
+    def __init__(self) -> None:
+        from .duplicates import ShingleScanner  # duplicates → incremental → analysis 순환을 피해서 여기서
+
+        self.scanner = ShingleScanner()
+
+    def feed(self, block: Dict[str, Any]) -> None:
+        self.scanner.feed(block["text"], block["tokens"])
+
+    def result(self) -> Dict[str, Any]:
+        return {"shingles": self.scanner.result()}
+
+
+# ---------- 계산 단계 ----------
+def _metrics(text_stats: TextStats) -> Dict[str, Any]:
+    return {"stats": text_stats.as_dict()}
+
+
+def _genre(genre_hits: Dict[str, int]) -> Dict[str, Any]:
+    # 장르 어휘 등장 비율. 한 장르로 뚜렷하게 쏠릴수록 높게 (어휘가 없으면 60)
+    probs = genre_probabilities(genre_hits, get_genre_matcher().genres)
+    return {"genre": {"score": 60.0 + 30.0 * max(probs.values(), default=0.0),
+                      "label": genre_label_from(genre_hits), "probs": probs}}
+
+
+def _style(stats: Dict[str, Any]) -> Dict[str, Any]:
     # 문장이 너무 길면 감점, 너무 짧아도 감점하는 식의 간단 규칙
-    style_score = 80.0
+    avg_sentence_len, quote_ratio = stats["avg_sentence_len"], stats["quote_ratio"]
+    score = 80.0
     if avg_sentence_len > 40:
-        style_score -= 5
+        score -= 5
     if avg_sentence_len > 60:
-        style_score -= 5
+        score -= 5
     if quote_ratio < 0.01:
-        style_score -= 5
+        score -= 5
+
+    # 문체 특징 문구 (임시 문장)
+    traits = []
+    if avg_sentence_len >= 40:
+        traits.append("긴 문장을 선호하는 편으로, 서정적인 느낌을 줄 수 있습니다.")
+    else:
+        traits.append("짧은 문장이 많아 템포감 있는 전개를 보여줍니다.")
+    if stats["num_paragraphs"] > 10:
+        traits.append("문단이 자주 나뉘어, 호흡이 빠른 편입니다.")
+    return {"style": {"score": score, "traits": traits}}
 
-    # --- 3) 캐릭터성 / 시장성 / 개연성 점수 (지금은 하드코딩 + 약간만 규칙) ---
-    character_score = 70.0 + quote_ratio * 20  # 대사 비율을 캐릭터성에 조금 반영
-    if character_score > 90:
-        character_score = 90.0
 
-    marketability_score = 68.0  # 우선은 고정값
-    plausibility_score = 65.0   # 우선은 고정값
+def _character(dialogue: Dict[str, Any]) -> Dict[str, Any]:
+    # 대사 비중(30%면 만점) + 주요 인물 간 말투 차별성 (비교할 인물이 없으면 중간값)
+    distinctiveness = dialogue["speech_distinctiveness"]
+    score = 60.0 + 15.0 * min(dialogue["dialogue_ratio"] / 0.3, 1.0)
+    score += 15.0 * (0.5 if distinctiveness is None else distinctiveness)
+    return {"character": {"score": min(score, 90.0)}}
 
-    # --- 4) 장점/단점/문체 특징 문구 (임시 문장) ---
-    strengths = []
-    improvements = []
-    style_traits = []
 
-    # 장점 예시
-    if num_paragraphs >= 3:
+def _market() -> Dict[str, Any]:
+    return {"market": {"score": 68.0}}  # 우선은 고정값
+
+
+def _causality() -> Dict[str, Any]:
+    return {"causality": {"score": 65.0}}  # 우선은 고정값
+
+
+def _feedback(stats: Dict[str, Any], dialogue: Dict[str, Any]) -> Dict[str, Any]:
+    # 장점/단점 문구 (임시 문장)
+    distinctiveness = dialogue["speech_distinctiveness"]
+    strengths, improvements = [], []
+    if stats["num_paragraphs"] >= 3:
         strengths.append("문단이 적절히 나뉘어 있어 가독성이 좋습니다.")
-    if quote_ratio > 0.03:
+    if stats["quote_ratio"] > 0.03:
         strengths.append("대사 비율이 있어서 캐릭터의 감정이 잘 드러납니다.")
+    if distinctiveness is not None and distinctiveness >= 0.35:
+        strengths.append("인물마다 말투(존댓말/반말, 어미)가 뚜렷하게 구분됩니다.")
 
-    # 단점 예시
-    if avg_sentence_len > 50:
+    if stats["avg_sentence_len"] > 50:
         improvements.append("문장 길이가 다소 길어 숨을 고르기 어렵습니다. 몇 문장을 쪼개 보세요.")
-    if quote_ratio < 0.01:
+    if stats["quote_ratio"] < 0.01:
         improvements.append("대사가 적어 인물의 개성이 약하게 느껴집니다.")
+    if distinctiveness is not None and distinctiveness < 0.15:
+        improvements.append("주요 인물들의 말투가 비슷해 대사만으로는 누가 말하는지 구분하기 어렵습니다.")
+    return {"feedback": {"strengths": strengths, "improvements": improvements}}
 
-    # 문체 특징 예시
-    if avg_sentence_len >= 40:
-        style_traits.append("긴 문장을 선호하는 편으로, 서정적인 느낌을 줄 수 있습니다.")
-    else:
-        style_traits.append("짧은 문장이 많아 템포감 있는 전개를 보여줍니다.")
 
-    if num_paragraphs > 10:
-        style_traits.append("문단이 자주 나뉘어, 호흡이 빠른 편입니다.")
+def _result(stats: Dict[str, Any], genre_hits: Dict[str, int], dialogue: Dict[str, Any],
+            shingles: Optional[Dict[str, Any]], genre: Dict[str, Any], style: Dict[str, Any],
+            character: Dict[str, Any], market: Dict[str, Any], causality: Dict[str, Any],
+            feedback: Dict[str, Any]) -> Dict[str, Any]:
+    scores = {
+        "genre": genre["score"],
+        "style": style["score"],
+        "character": character["score"],
+        "marketability": market["score"],
+        "plausibility": causality["score"],
+    }
+    return {"result": {
+        "stats": stats,
+        # 총점 (지금은 단순 평균)
+        "scores": {"total": sum(scores.values()) / len(scores), **scores},
+        "genre_label": genre["label"],
+        "genre_hits": dict(genre_hits),
+        "genre_probs": genre["probs"],
+        "dialogue": dialogue,
+        "shingles": shingles,
+        "style_traits": style["traits"],
+        "strengths": feedback["strengths"],
+        "improvements": feedback["improvements"],
+    }}
 
-    # --- 5) 총점 (지금은 단순 평균) ---
-    total_score = (genre_score + style_score +
-                   character_score + marketability_score +
-                   plausibility_score) / 5.0
 
-    return {
-        "stats": stats,
-        "scores": {
-            "total": total_score,
-            "genre": genre_score,
-            "style": style_score,
-            "character": character_score,
-            "marketability": marketability_score,
-            "plausibility": plausibility_score,
-        },
-        "genre_label": genre_label,
-        "style_traits": style_traits,
-        "strengths": strengths,
-        "improvements": improvements,
-    }
+# 규칙 기반 분석 파이프라인. 최종 산출물 "result"가 rule_based_analyze 결과.
+# 섹션을 새로 붙일 때는 필요한 중간 결과를 consumes에 적은 계산 단계를 더하고 _result에 넘긴다
+# (새 덩어리별 결과가 필요하면 features와 훑기 단계를 더함 — 원문은 그래도 한 번만 훑음).
+PIPELINE = Pipeline(
+    stages=[
+        Stage("stats", ("text_stats",), ("lines", "sentences", "tokens"), scan=_StatsScan),
+        Stage("dialogue", ("dialogue",), ("lines",), scan=_DialogueScan),
+        Stage("genre_terms", ("genre_hits",), ("lower",), scan=_GenreScan),
+        Stage("shingles", ("shingles",), ("tokens",), scan=_ShingleScan),
+        Stage("metrics", ("stats",), ("text_stats",), run=_metrics),
+        Stage("genre", ("genre",), ("genre_hits",), run=_genre),
+        Stage("style", ("style",), ("stats",), run=_style),
+        Stage("character", ("character",), ("dialogue",), run=_character),
+        Stage("market", ("market",), run=_market),
+        Stage("causality", ("causality",), run=_causality),
+        Stage("feedback", ("feedback",), ("stats", "dialogue"), run=_feedback),
+        Stage("result", ("result",), ("stats", "genre_hits", "dialogue", "shingles", "genre", "style",
+                                      "character", "market", "causality", "feedback"), run=_result),
+    ],
+    blocks=iter_blocks,
+    features={
+        "lines": lambda text: text.split("\n"),
+        "sentences": SENTENCE_END.split,
+        "tokens": str.split,
+        "lower": str.lower,
+    },
+)
+
+
+def rule_based_analyze(text: Union[str, Iterable[str]],
+                       timings: Optional[Dict[str, float]] = None,
+                       on_stage: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    규칙 기반 분석. `text`는 원고 전체 문자열이거나 문자열 조각 이터레이터
+    (예: 파일/페이지 단위 스트림)일 수 있다. 원문은 한 번만 훑는다.
+    timings를 주면 파이프라인 단계별 초를 채우고, on_stage를 주면 단계가 끝날 때마다 단계 이름으로 부른다.
+    """
+    return PIPELINE.run(text, ("result",), timings=timings, on_stage=on_stage)["result"]
+
+
+def analyze_stats(text_stats: TextStats, dialogue: Optional[Dict[str, Any]] = None,
+                  shingles: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    이미 계산된 통계(+ scan_dialogue 결과)로부터 점수/문구를 만든다 (원문을 훑지 않음).
+    shingles(duplicates.scan_shingles 결과)는 유사 원고 검색용으로 결과에 그대로 담는다.
+    """
+    given: Dict[str, Any] = {"text_stats": text_stats, "genre_hits": text_stats.genre_hits, "shingles": shingles}
+    if dialogue is not None:
+        given["dialogue"] = dialogue
+    return PIPELINE.run(None, ("result",), given)["result"]
@@ -0,0 +1,274 @@
+# app/services/baselines.py
+# 갱신: (backend 폴더에서) python -m app.services.baselines update [--rebuild]
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import settings
+
+# numpy는 함수 안에서 import한다 (서버 시작 시 import 비용을 첫 사용으로 미룸)
+
+# ---------- 장르별 기준 분포 ----------
+# corpus_path의 원고들로 (장르, 지표)마다 다음을 모아 두고, 분석 결과의 지표에 z-score와 백분위를 붙인다.
+# - Welford 누적 평균/분산 (문서를 빼는 것도 역연산으로 가능)
+# - 로그 버킷 분위수 스케치 (DDSketch 방식, 상대 오차 SKETCH_ALPHA). 버킷별 '누적' 개수로 저장해서
+#   백분위 조회가 칸 하나 읽기로 끝난다.
+# 파일: baseline_path/stats.npy (float64, [장르, 지표, 3 + SKETCH_BUCKETS] = count, mean, M2, 누적 개수...)
+#       baseline_path/meta.json (장르/지표 이름, 문서별 내용 해시와 지표 값 → 바뀐 문서만 다시 반영)
+# stats.npy는 np.load(mmap_mode="r")로 열고, 갱신은 새 파일을 쓴 뒤 이름을 바꾼다.
+ALL_GENRES = "전체"
+METRICS = (
+    "num_sentences", "avg_sentence_words", "avg_sentence_len", "num_paragraphs", "lexical_diversity",
+    "quote_ratio", "dialogue_ratio", "attributed_ratio", "num_speakers", "speech_distinctiveness",
+)
+SKETCH_ALPHA = 0.02
+SKETCH_MIN = 1e-4          # 이 값 이하는 0번 버킷
+SKETCH_BUCKETS = 640       # SKETCH_MIN × γ^639 ≈ 1e7 까지
+_GAMMA = (1 + SKETCH_ALPHA) / (1 - SKETCH_ALPHA)
+_LOG_GAMMA = math.log(_GAMMA)
+_HEAD = 3
+
+
+def metric_values(result: Dict[str, Any]) -> Dict[str, float]:
+    """분석 결과(rule_based_analyze)에서 기준 분포를 두는 지표 값만 꺼낸다 (값이 없는 지표는 뺌)."""
+    stats, dialogue = result["stats"], result.get("dialogue") or {}
+    out = {}
+    for key in METRICS:
+        v = stats.get(key, dialogue.get(key))
+        if v is not None:
+            out[key] = float(v)
+    return out
+
+
+def result_genre(result: Dict[str, Any]) -> Optional[str]:
+    """가장 많이 나온 장르 어휘의 장르 (없으면 None)"""
+    hits = result.get("genre_hits") or {}
+    best = max(hits, key=hits.__getitem__, default=None)
+    return best if best is not None and hits[best] > 0 else None
+
+
+def _bucket(x: float) -> int:
+    if not x > SKETCH_MIN:
+        return 0
+    return min(SKETCH_BUCKETS - 1, 1 + math.ceil(math.log(x / SKETCH_MIN) / _LOG_GAMMA))
+
+
+class BaselineStore:
+    """stats.npy(memmap) + meta.json. lookup은 배열 몇 칸만 읽으므로 지표 하나당 상수 시간."""
+
+    def __init__(self, directory: Path) -> None:
+        import numpy as np
+
+        self.directory = directory
+        self.meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+        self.stats = np.load(directory / "stats.npy", mmap_mode="r")
+        self._genre_idx = {g: i for i, g in enumerate(self.meta["genres"])}
+        self._metric_idx = {m: i for i, m in enumerate(self.meta["metrics"])}
+
+    @staticmethod
+    def default_dir() -> Path:
+        return settings.baseline_path
+
+    def count(self, genre: str) -> int:
+        g = self._genre_idx.get(genre)
+        return 0 if g is None else int(self.stats[g, :, 0].max(initial=0))
+
+    def pick_genre(self, genre: Optional[str]) -> str:
+        """문서가 baseline_min_docs개 이상 모인 장르면 그 장르, 아니면 전체"""
+        if genre and self.count(genre) >= settings.baseline_min_docs:
+            return genre
+        return ALL_GENRES
+
+    def lookup(self, genre: str, metric: str, value: float) -> Tuple[Optional[float], Optional[float]]:
+        """(z-score, 백분위 0~100). 기준이 없으면 None"""
+        g, m = self._genre_idx.get(genre), self._metric_idx.get(metric)
+        if g is None or m is None:
+            return None, None
+        n, mean, m2 = (float(v) for v in self.stats[g, m, :_HEAD])
+        if n < 1:
+            return None, None
+        z = None
+        if n >= 2 and m2 > 0:
+            z = (value - mean) / math.sqrt(m2 / (n - 1))
+        b = _bucket(value)
+        below = float(self.stats[g, m, _HEAD + b - 1]) if b else 0.0
+        upto = float(self.stats[g, m, _HEAD + b])
+        return z, 100.0 * (below + upto) / 2 / n
+
+    def annotate(self, genre: str, metric: str, value: float) -> Dict[str, Optional[float]]:
+        """Metric(zscore=..., percentile=...)에 그대로 넘길 값"""
+        z, p = self.lookup(genre, metric, value)
+        return {"zscore": None if z is None else round(z, 3), "percentile": None if p is None else round(p, 1)}
+
+
+_store: Optional[BaselineStore] = None
+_store_lock = threading.Lock()
+
+
+def get_baselines(reload: bool = False) -> Optional[BaselineStore]:
+    """저장된 기준 분포를 (memmap으로) 연다. 아직 만들지 않았으면 None."""
+    global _store
+    if _store is None or reload:
+        with _store_lock:
+            d = BaselineStore.default_dir()
+            _store = BaselineStore(d) if (d / "meta.json").exists() else None
+    return _store
+
+
+# ---------- 갱신 ----------
+def _apply(row, values: Dict[str, float], metric_idx: Dict[str, int], sign: int) -> None:
+    """row([지표, 3 + 버킷])에 문서 하나의 지표 값을 더하거나(sign=1) 뺀다(sign=-1)."""
+    for key, x in values.items():
+        m = metric_idx.get(key)
+        if m is None or not math.isfinite(x):
+            continue
+        n, mean, m2 = row[m, 0], row[m, 1], row[m, 2]
+        if sign > 0:
+            n1 = n + 1
+            d = x - mean
+            mean1 = mean + d / n1
+            m2 = m2 + d * (x - mean1)
+        else:
+            n1 = n - 1
+            if n1 <= 0:
+                n1, mean1, m2 = 0.0, 0.0, 0.0
+            else:
+                mean1 = (n * mean - x) / n1
+                m2 = max(0.0, m2 - (x - mean1) * (x - mean))
+        row[m, 0], row[m, 1], row[m, 2] = n1, mean1, m2
+        row[m, _HEAD + _bucket(x):] += sign
+
+
+def _corpus_files(corpus_dir: Path) -> Dict[str, Path]:
+    """상대 경로 → 파일. 하위 폴더 이름이 장르 (corpus/<장르>/원고.txt), 맨 위 파일은 분석된 장르로 분류"""
+    allowed = set(settings.allowed_extensions)
+    files = {}
+    if corpus_dir.exists():
+        for p in sorted(corpus_dir.rglob("*")):
+            if p.is_file() and p.suffix.lower().lstrip(".") in allowed and not p.name.startswith("."):
+                files[p.relative_to(corpus_dir).as_posix()] = p
+    return files
+
+
+def _sha1_file(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _analyze_document(rel: str, path: Path) -> Tuple[Optional[str], Dict[str, float]]:
+    from .workers import ExtractionError, analyze_file
+
+    try:
+        result = analyze_file(path.name, str(path))
+    except ExtractionError:
+        return None, {}
+    folder = rel.split("/", 1)[0] if "/" in rel else None
+    return folder or result_genre(result), metric_values(result)
+
+
+def _save(directory: Path, stats, meta: Dict[str, Any]) -> None:
+    import numpy as np
+
+    directory.mkdir(parents=True, exist_ok=True)
+    # 조회 중인 memmap은 이전 파일을 계속 보므로, 다 쓴 다음 이름만 바꾼다
+    for name, write in (("stats.npy", lambda f: np.save(f, stats)),
+                        ("meta.json", lambda f: f.write(json.dumps(meta, ensure_ascii=False).encode("utf-8")))):
+        fd, tmp = tempfile.mkstemp(prefix=f".{name}-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, directory / name)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+
+def update_baselines(corpus_dir: Optional[Path] = None, out_dir: Optional[Path] = None,
+                     rebuild: bool = False) -> Dict[str, Any]:
+    """
+    corpus_dir의 원고를 기준 분포에 반영한다. 이전에 반영한 문서는 내용 해시로 알아보고 건너뛰며,
+    바뀐 문서는 이전 값을 빼고 새 값을 더하고, 없어진 문서는 뺀다 (나머지 코퍼스는 다시 분석하지 않음).
+    """
+    import numpy as np
+
+    corpus_dir = Path(corpus_dir or settings.corpus_path)
+    out_dir = Path(out_dir or BaselineStore.default_dir())
+    width = _HEAD + SKETCH_BUCKETS
+    if not rebuild and (out_dir / "meta.json").exists():
+        meta = json.loads((out_dir / "meta.json").read_text(encoding="utf-8"))
+        stats = np.array(np.load(out_dir / "stats.npy"))
+    else:
+        meta = {"genres": [ALL_GENRES], "metrics": list(METRICS), "alpha": SKETCH_ALPHA,
+                "sketch_min": SKETCH_MIN, "buckets": SKETCH_BUCKETS, "documents": {}}
+        stats = np.zeros((1, len(METRICS), width))
+    metric_idx = {m: i for i, m in enumerate(meta["metrics"])}
+    docs: Dict[str, Dict[str, Any]] = meta["documents"]
+
+    def rows(genre: Optional[str]):
+        nonlocal stats
+        out = [stats[0]]
+        if genre and genre != ALL_GENRES:
+            if genre not in meta["genres"]:
+                meta["genres"].append(genre)
+                stats = np.concatenate([stats, np.zeros((1,) + stats.shape[1:])])
+                out = [stats[0]]
+            out.append(stats[meta["genres"].index(genre)])
+        return out
+
+    files = _corpus_files(corpus_dir)
+    summary = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "failed": 0}
+    for rel in [r for r in docs if r not in files]:
+        old = docs.pop(rel)
+        for row in rows(old["genre"]):
+            _apply(row, old["values"], metric_idx, -1)
+        summary["removed"] += 1
+    for rel, path in files.items():
+        sha1 = _sha1_file(path)
+        old = docs.get(rel)
+        if old is not None and old["sha1"] == sha1:
+            summary["unchanged"] += 1
+            continue
+        genre, values = _analyze_document(rel, path)
+        if not values:
+            summary["failed"] += 1
+            continue
+        if old is not None:
+            for row in rows(old["genre"]):
+                _apply(row, old["values"], metric_idx, -1)
+        for row in rows(genre):
+            _apply(row, values, metric_idx, 1)
+        docs[rel] = {"sha1": sha1, "genre": genre, "values": values}
+        summary["updated" if old is not None else "added"] += 1
+
+    _save(out_dir, stats, meta)
+    counts = {g: int(stats[i, :, 0].max(initial=0)) for i, g in enumerate(meta["genres"])}
+    return {**summary, "documents": len(docs), "genres": counts}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m app.services.baselines")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    up = sub.add_parser("update", help="corpus_path의 새/바뀐 원고를 장르별 기준 분포에 반영")
+    up.add_argument("--corpus", type=Path, default=None, help="기본: CORPUS_DIR")
+    up.add_argument("--rebuild", action="store_true", help="기존 분포를 버리고 처음부터 다시 만듦")
+    args = ap.parse_args(argv)
+    print(json.dumps(update_baselines(args.corpus, rebuild=args.rebuild), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
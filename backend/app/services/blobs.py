@@ -0,0 +1,235 @@
+# app/services/blobs.py
+# 가비지 컬렉션: (backend 폴더에서) python -m app.services.blobs gc [--dry-run] [--grace 초] [--migrate]
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set
+
+from ..config import settings
+
+# ---------- 내용 주소 저장소 ----------
+# 원문은 SHA-1로 한 번만 저장한다: blob_path/<sha1 앞 2자>/<sha1>[.gz]
+# 원문 폴더에는 날짜가 붙은 이름의 작은 참조 파일(<이름>.ref, JSON)만 둔다 → 같은 내용은 두 번 쓰지 않음.
+# 텍스트(txt/md)만 gzip으로 압축한다. docx/pdf는 이미 압축된 형식이라 이득이 작고, 추출기가 경로로 직접 연다.
+REF_SUFFIX = ".ref"
+TEXT_EXTS = {"txt", "md", ""}
+_COPY_CHUNK = 1 << 20
+
+
+def _blob_base(sha1: str) -> Path:
+    return settings.blob_path / sha1[:2] / sha1
+
+
+def blob_file(sha1: str) -> Optional[Path]:
+    """저장된 blob 경로 (압축본 우선). 없으면 None"""
+    base = _blob_base(sha1)
+    for p in (base.with_name(base.name + ".gz"), base):
+        if p.exists():
+            return p
+    return None
+
+
+def blob_sidecar(sha1: str, suffix: str) -> Path:
+    """blob 옆에 두는 파생 파일 경로 (<sha1><suffix>). blob과 같은 이름으로 시작해서 GC가 함께 지운다."""
+    return _blob_base(sha1).with_name(sha1 + suffix)
+
+
+def spool_dir() -> Path:
+    """업로드 임시 파일을 둘 곳 (blob과 같은 파일 시스템이라 압축하지 않는 blob은 이름만 바꿔 저장)"""
+    d = settings.blob_path / "tmp"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def read_bytes(path: str | Path) -> bytes:
+    """blob(또는 일반 파일) 내용. .gz면 풀어서 돌려준다."""
+    p = Path(path)
+    data = p.read_bytes()
+    return gzip.decompress(data) if p.suffix == ".gz" else data
+
+
+def put_file(tmp_path: str, sha1: str, ext: str) -> Path:
+    """
+    내용 해시가 sha1인 임시 파일을 저장소에 넣고 blob 경로를 돌려준다. tmp_path는 옮기거나 지운다.
+    - 이미 있으면 쓰지 않고 임시 파일만 지운다 (GC가 지우지 않도록 수정 시각만 갱신)
+    - 텍스트이고 compress_blobs면 gzip, 아니면 os.replace (같은 파일 시스템이면 복사 없음)
+    """
+    compress = settings.compress_blobs and ext in TEXT_EXTS
+    existing = blob_file(sha1)
+    # 비텍스트는 추출기가 경로로 직접 열어야 하므로 압축본만 있으면 원본도 둔다
+    if existing is not None and (compress or existing.suffix != ".gz"):
+        os.unlink(tmp_path)
+        os.utime(existing)
+        return existing
+
+    base = _blob_base(sha1)
+    base.parent.mkdir(parents=True, exist_ok=True)
+    if not compress:
+        try:
+            os.replace(tmp_path, base)
+        except OSError:  # 다른 파일 시스템 (spool_dir 밖에서 받은 임시 파일)
+            shutil.move(tmp_path, base)
+        return base
+
+    dest = base.with_name(base.name + ".gz")
+    fd, part = tempfile.mkstemp(prefix=".blob-", suffix=".part", dir=base.parent)
+    try:
+        with open(tmp_path, "rb") as src, os.fdopen(fd, "wb") as raw, \
+                gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=settings.blob_compress_level, mtime=0) as gz:
+            shutil.copyfileobj(src, gz, _COPY_CHUNK)
+        os.replace(part, dest)  # 다 쓴 다음에 이름을 바꿔서, 반쯤 쓴 blob이 보이지 않게
+    except BaseException:
+        if os.path.exists(part):
+            os.unlink(part)
+        raise
+    os.unlink(tmp_path)
+    return dest
+
+
+# ---------- 원문 폴더의 참조 파일 ----------
+def write_ref(name: str, sha1: str, original_name: Optional[str], size_bytes: int) -> str:
+    """
+    원문 폴더에 <name>.ref를 만들고 실제 파일 이름을 돌려준다.
+    같은 이름이 이미 같은 내용을 가리키면 그대로 쓰고, 다른 내용이면 짧은 해시 꼬리표를 붙인다.
+    """
+    folder = settings.manuscript_path
+    folder.mkdir(parents=True, exist_ok=True)
+    ref_name = name + REF_SUFFIX
+    current = read_ref(folder / ref_name)
+    if current is not None and current.get("sha1") != sha1:
+        stem, dot, ext = name.rpartition(".")
+        ref_name = (f"{stem}_{sha1[:6]}.{ext}" if dot else f"{name}_{sha1[:6]}") + REF_SUFFIX
+        current = read_ref(folder / ref_name)
+    if current is None:
+        body = {"sha1": sha1, "original_name": original_name, "size_bytes": size_bytes,
+                "created_at": datetime.now().isoformat(timespec="seconds")}
+        (folder / ref_name).write_text(json.dumps(body, ensure_ascii=False), encoding="utf-8")
+    return ref_name
+
+
+def read_ref(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _iter_refs() -> Iterator[Dict[str, Any]]:
+    folder = settings.manuscript_path
+    if folder.exists():
+        for p in folder.glob("*" + REF_SUFFIX):
+            ref = read_ref(p)
+            if ref and ref.get("sha1"):
+                yield ref
+
+
+# ---------- 가비지 컬렉션 ----------
+def _live_hashes() -> Set[str]:
+    from .manuscripts import live_manuscript_hashes
+
+    return {r["sha1"] for r in _iter_refs()} | live_manuscript_hashes()
+
+
+def collect_garbage(dry_run: bool = False, grace_seconds: float = 3600) -> Dict[str, Any]:
+    """
+    원문 폴더의 참조 파일과 원고 목록 어디에서도 가리키지 않는 blob을 지운다.
+    수정 시각이 grace_seconds 안쪽인 blob/임시 파일은 저장 중일 수 있으므로 남긴다.
+    """
+    from .manuscripts import prune_missing_manuscripts
+
+    stats = {"blobs": 0, "sidecars": 0, "live": 0, "deleted": 0, "freed_bytes": 0, "kept_recent": 0,
+             "tmp_deleted": 0, "rows_pruned": 0 if dry_run else prune_missing_manuscripts()}
+    root = settings.blob_path
+    if not root.exists():
+        return stats
+    live = _live_hashes()
+    cutoff = time.time() - grace_seconds
+    for shard in root.iterdir():
+        if not shard.is_dir():
+            continue
+        for p in shard.iterdir():
+            st = p.stat()
+            if shard.name == "tmp" or p.name.startswith(".blob-"):
+                if st.st_mtime < cutoff:
+                    stats["tmp_deleted"] += 1
+                    if not dry_run:
+                        p.unlink()
+                continue
+            sha1, _, suffix = p.name.partition(".")
+            stats["blobs" if suffix in ("", "gz") else "sidecars"] += 1  # sidecars: blob_sidecar 파생 파일
+            if sha1 in live:
+                stats["live"] += 1
+            elif st.st_mtime >= cutoff:
+                stats["kept_recent"] += 1
+            else:
+                stats["deleted"] += 1
+                stats["freed_bytes"] += st.st_size
+                if not dry_run:
+                    p.unlink()
+    return stats
+
+
+def migrate_legacy(dry_run: bool = False) -> Dict[str, int]:
+    """예전 방식(원문 폴더에 파일 전체를 복사)으로 저장된 원고를 blob + 참조 파일로 바꾼다."""
+    from .manuscripts import legacy_manuscripts, set_stored_name
+
+    rows = legacy_manuscripts()
+    remaining = Counter(r["stored_name"] for r in rows)  # 같은 파일을 가리키는 원고가 여럿일 수 있음
+    stats = {"migrated": 0, "files_removed": 0, "freed_bytes": 0, "blob_bytes_added": 0}
+    for row in rows:
+        path = settings.manuscript_path / row["stored_name"]
+        if not path.exists():
+            continue
+        stats["migrated"] += 1
+        if dry_run:
+            continue
+        ext = path.suffix.lower().lstrip(".")
+        size = path.stat().st_size
+        # 원본은 복사해서 넣는다 (중간에 실패해도 원본은 그대로)
+        fd, tmp = tempfile.mkstemp(prefix=".upload-", suffix=".part", dir=spool_dir())
+        with os.fdopen(fd, "wb") as out, open(path, "rb") as src:
+            shutil.copyfileobj(src, out, _COPY_CHUNK)
+        existed = blob_file(row["content_sha1"]) is not None
+        blob = put_file(tmp, row["content_sha1"], ext)
+        if not existed:
+            stats["blob_bytes_added"] += blob.stat().st_size
+        set_stored_name(row["manuscript_id"],
+                        write_ref(row["stored_name"], row["content_sha1"], row["original_name"], size))
+        remaining[row["stored_name"]] -= 1
+        if not remaining[row["stored_name"]]:
+            path.unlink()
+            stats["files_removed"] += 1
+            stats["freed_bytes"] += size
+    return stats
+
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m app.services.blobs")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    gc = sub.add_parser("gc", help="참조되지 않는 원문 blob 정리")
+    gc.add_argument("--dry-run", action="store_true", help="지우지 않고 개수만 출력")
+    gc.add_argument("--grace", type=float, default=3600, help="최근 N초 안에 쓰인 blob은 남김 (기본 3600)")
+    gc.add_argument("--migrate", action="store_true", help="예전 방식으로 저장된 원문을 먼저 blob으로 옮김")
+    args = ap.parse_args(argv)
+
+    out: Dict[str, Any] = {}
+    if args.migrate:
+        out["migrate"] = migrate_legacy(args.dry_run)
+    out["gc"] = collect_garbage(args.dry_run, args.grace)
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
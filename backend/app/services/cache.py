@@ -0,0 +1,199 @@
+# app/services/cache.py
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import json, os, threading, time
+
+from ..config import settings
+from .analysis import analyzer_version
+
+
+def cache_key(content_sha1: str, ext: str) -> str:
+    """
+    내용 해시 + 확장자 + 분석기 버전으로 캐시 키를 만든다.
+    (같은 바이트라도 확장자에 따라 추출 결과가 다를 수 있으므로 확장자도 포함)
+    """
+    return f"{analyzer_version()}-{ext or 'none'}-{content_sha1}"
+
+
+class ResultCache:
+    """
+    분석 결과 캐시.
+    - 1차: 메모리 LRU (OrderedDict, 최대 max_items개)
+    - 2차(옵션): disk_dir 아래 <key>.json 파일. max_disk_items개를 넘으면 오래 안 쓴(mtime) 것부터 지운다 (0 이하이면 제한 없음)
+    두 단계 모두 ttl_seconds가 지나면 만료로 본다. (0 이하이면 만료 없음)
+    만료된 디스크 파일은 읽을 때, 그리고 sweep_disk()(시작 시, 또는 처음 쓸 때)에서 지운다.
+    """
+
+    def __init__(self, max_items: int, ttl_seconds: int, disk_dir: Optional[Path] = None,
+                 max_disk_items: int = 0) -> None:
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.max_disk_items = max_disk_items
+        self._mem: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk_count: Optional[int] = None  # 디스크 파일 수 (대략, 다른 프로세스가 쓴 것은 정리할 때 다시 셈)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - stored_at > self.ttl_seconds
+
+    def _disk_file(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._mem.get(key)
+            if item is not None:
+                if not self._expired(item[0]):
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return item[1]
+                del self._mem[key]
+
+        value = self._disk_get(key) if self.disk_dir else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._mem_put(key, value[0], value[1])
+            return value[1]
+
+    def put(self, key: str, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._mem_put(key, now, value)
+        if self.disk_dir:
+            self._disk_put(key, now, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+
+    def sweep_disk(self) -> int:
+        """디스크 캐시에서 만료된 파일과 남은 임시 파일을 지우고, 개수 제한을 넘으면 오래 안 쓴 것부터 지운다. 남은 파일 수"""
+        if not self.disk_dir:
+            return 0
+        with self._disk_lock:
+            self._disk_count = self._disk_sweep()
+            return self._disk_count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "analyzer_version": analyzer_version(),
+                "items": len(self._mem),
+                "max_items": self.max_items,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "disk_enabled": self.disk_dir is not None,
+                "disk_items": self._disk_count,
+                "max_disk_items": self.max_disk_items,
+            }
+
+    # ---------- 내부 ----------
+    def _mem_put(self, key: str, stored_at: float, value: Any) -> None:
+        if self.max_items <= 0:
+            return
+        self._mem[key] = (stored_at, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def _disk_get(self, key: str) -> Optional[Tuple[float, Any]]:
+        path = self._disk_file(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        stored_at = data.get("stored_at", 0.0)
+        if self._expired(stored_at):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+        try:
+            os.utime(path)  # 개수 제한으로 지울 때 최근에 쓴 것은 남도록
+        except OSError:
+            pass
+        return stored_at, data.get("value")
+
+    def _disk_put(self, key: str, stored_at: float, value: Any) -> None:
+        # 임시 파일에 쓴 뒤 교체해서, 동시에 읽는 쪽이 반쯤 쓴 파일을 보지 않게 한다
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            path = self._disk_file(key)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"stored_at": stored_at, "value": value}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError:
+            return  # 디스크 캐시는 보조 수단이므로 실패해도 분석은 계속
+        with self._disk_lock:
+            if self._disk_count is None:
+                self._disk_count = self._disk_sweep()
+            else:
+                self._disk_count += 1  # 같은 키를 덮어써도 늘어나지만, 넘쳐서 정리할 때 실제 수로 다시 맞춰짐
+            if 0 < self.max_disk_items < self._disk_count:
+                # 한 번 정리할 때 여유(10%)를 두고 지워서, 가득 찬 뒤 쓸 때마다 폴더를 훑지 않게 한다
+                self._disk_count = self._disk_sweep(keep=self.max_disk_items * 9 // 10)
+
+    def _disk_sweep(self, keep: Optional[int] = None) -> int:
+        """(_disk_lock 안에서) 만료/임시 파일을 지우고, keep을 주거나 개수 제한을 넘으면 mtime 오래된 것부터 지움"""
+        if keep is None and self.max_disk_items > 0:
+            keep = self.max_disk_items
+        now = time.time()
+        files = []
+        try:
+            entries = list(os.scandir(self.disk_dir))
+        except OSError:
+            return 0
+        for entry in entries:
+            try:
+                mtime = entry.stat().st_mtime
+            except OSError:
+                continue  # 다른 프로세스가 먼저 지움
+            if entry.name.endswith(".tmp"):
+                stale = now - mtime > 3600  # 쓰다가 죽은 프로세스가 남긴 것
+            elif entry.name.endswith(".json"):
+                # mtime은 저장/마지막 적중 시각 (stored_at 이후) → 이것으로 만료면 stored_at으로도 만료
+                stale = self._expired(mtime)
+                if not stale:
+                    files.append((mtime, entry.path))
+            else:
+                continue
+            if stale:
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+        if keep is not None and len(files) > keep:
+            files.sort()
+            for _, path in files[:len(files) - keep]:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            return keep
+        return len(files)
+
+
+result_cache = ResultCache(
+    max_items=settings.result_cache_max_items,
+    ttl_seconds=settings.cache_ttl_seconds,
+    disk_dir=settings.result_cache_path if settings.persist_result_cache else None,
+    max_disk_items=settings.result_cache_max_disk_items,
+)
@@ -0,0 +1,49 @@
+# app/services/db.py
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from ..config import settings
+
+# 테이블은 필요한 모듈이 register_schema로 등록하고, 처음 연결할 때 한 번에 만든다
+_SCHEMAS: list = []
+_ready = False
+_ready_lock = threading.Lock()
+
+
+def register_schema(ddl: str) -> None:
+    global _ready
+    _SCHEMAS.append(ddl)
+    _ready = False
+
+
+def _init(conn: sqlite3.Connection) -> None:
+    global _ready
+    with _ready_lock:
+        if _ready:
+            return
+        conn.execute("PRAGMA journal_mode=WAL")
+        for ddl in _SCHEMAS:
+            conn.executescript(ddl)
+        _ready = True
+
+
+@contextmanager
+def connect() -> Iterator[sqlite3.Connection]:
+    """
+    settings.db_path의 SQLite에 연결한다. 블록이 정상 종료되면 커밋, 예외면 롤백.
+    (연결 비용이 작아서 호출마다 새로 연다 → 스레드/프로세스 어디서 불러도 안전)
+    """
+    settings.db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(settings.db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        _init(conn)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
@@ -0,0 +1,434 @@
+# app/services/dialogue.py
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+# ---------- 대사 추출 + 화자 추정 + 인물별 말투 통계 ----------
+# 원고를 줄 단위로 한 번만 훑는다. 본문은 저장하지 않고 발화마다 특징(말투 단계, 문장 유형, 끝 음절, 길이)만 남기므로
+# 메모리는 원고 길이가 아니라 인물 수(최대 MAX_SPEAKERS)에 비례한다. 끝 음절은 한글 음절 하나(최대 11,172가지)라
+# 인물별로 정확히 센다 → 인물 통계는 모두 횟수의 합이어서 구간별로 센 것을 더해도 같다 (증분 분석).
+#
+# 화자 추정 (앞에서부터 먼저 맞는 것):
+#   1) 같은 줄의 지문:  “…” 레온이 물었다. / 레온이 고개를 저었다. “…”
+#   2) 다음 줄의 지문 첫 문장: “…”\n레온이 물었다.  (말하기 동사가 있을 때만)
+#   3) 바로 앞 지문 줄의 주어:  레온이 입을 열었다.\n“…”
+#   4) 두 사람이 번갈아 말하는 중이면 직전 화자가 아닌 쪽
+# 말하기 동사 없이 주어만 있는 지문(행동 묘사)은 이미 말한 적이 있는 인물일 때만 화자로 본다.
+
+MAX_SPEAKERS = 64          # 이보다 많아지면 발화가 가장 적은 인물을 버린다
+MAX_OPEN_LINES = 8         # 이 줄 수를 넘도록 닫히지 않는 따옴표는 짝이 안 맞는 것으로 본다
+MAX_LINE_CHARS = 1 << 16   # 줄바꿈 없이 이보다 길게 들어오면 잘라서 처리
+MIN_SPEAKER_LINES = 5      # 말투 차별성 계산에 넣을 최소 발화 수
+TOP_SPEAKERS = 8
+
+LEVELS = ("formal", "polite", "plain", "archaic")
+LEVEL_NAMES = {"formal": "하십시오체", "polite": "해요체", "plain": "해체·해라체", "archaic": "하오·하게체"}
+MOODS = ("statement", "question", "exclaim", "trail")
+
+_QUOTE = re.compile(r'[“”"]')
+_SENT_SPLIT = re.compile(r"[.?!…]+")
+_TAIL = re.compile(r"([가-힣]+)[^가-힣]*$")
+_FORMAL = re.compile(r"(?:니다|니까|십시오|옵니다|소서)$")
+_POLITE = re.compile(r"(?:요|죠)$")
+_ARCHAIC = re.compile(r"(?:오|소|구려|는가|하게|시게)$")
+_SUBJECT = re.compile(r"(?<![가-힣A-Za-z])([가-힣]{2,4}|[A-Z][A-Za-z]+)(?:께서|이|가|은|는)(?![가-힣A-Za-z])")
+_SPEECH_VERB = re.compile(
+    r"말(?:했|하|을 이었|끝을)|물었|되물|대답|답했|외쳤|소리(?:쳤|를 질렀)|중얼|속삭|덧붙|"
+    r"투덜|부르짖|고함|명령|설명했|반문|쏘아붙|내뱉|웅얼|다그쳤|말씀"
+)
+# 대사를 꺼내기 전에 쓰는 말 (다음 대사의 화자일 뿐 앞 대사의 화자는 아님)
+_INTRO_VERB = re.compile(r"입을 (?:열|뗐|떼)|말을 꺼|운을 뗐")
+# 주어 자리에 자주 오지만 인물 이름이 아닌 말
+_NOT_NAMES = frozenset(
+    "그녀 그들 그것 이것 저것 우리 당신 자신 너희 모두 누군가 아무도 사람 사람들 남자 여자 소년 소녀 아이 "
+    "목소리 소리 얼굴 표정 눈빛 시선 마음 생각 대답 질문 말투 분위기 공기 시간 순간 하늘 바람 주변 "
+    "기사 병사 하녀 시녀 마법사 황제 황후 공작 백작 전하 폐하 상대 상대방 둘은 모두들 사내 노인 청년".split()
+)
+
+
+def _speech_features(utterance: str) -> Optional[Tuple[int, int, str]]:
+    """발화 마지막 문장의 (말투 단계, 문장 유형, 끝 음절). 한글 어미가 없으면 None"""
+    s = utterance.rstrip(" \t~♪♡”\"'’)")
+    if not s:
+        return None
+    if s.endswith("?") or s.endswith("?!") or s.endswith("!?"):
+        mood = 1
+    elif s.endswith("!"):
+        mood = 2
+    elif s.endswith("…") or s.endswith(".."):
+        mood = 3
+    else:
+        mood = 0
+    m = _TAIL.search(s)
+    if m is None:
+        return None
+    word = m.group(1)
+    if _FORMAL.search(word):
+        level = 0
+    elif _POLITE.search(word):
+        level = 1
+    elif _ARCHAIC.search(word):
+        level = 3
+    else:
+        level = 2
+    return level, mood, word[-1]
+
+
+def _find_subject(narration: str, first_sentence_only: bool = False,
+                  intro: bool = True) -> Tuple[Optional[str], bool]:
+    """
+    지문에서 (주어 이름, 말하기 동사와 같은 문장인지). 말하기 동사가 있는 문장의 주어를 먼저 고른다.
+    intro=False면 '입을 열었다'처럼 대사 앞에 쓰는 말은 말하기 동사로 치지 않는다.
+    """
+    fallback = None
+    sentences = _SENT_SPLIT.split(narration)
+    for sent in sentences[:1] if first_sentence_only else sentences:
+        names = [n for n in _SUBJECT.findall(sent) if n not in _NOT_NAMES]
+        if not names:
+            continue
+        if _SPEECH_VERB.search(sent) or (intro and _INTRO_VERB.search(sent)):
+            return names[0], True
+        fallback = names[-1]
+    return fallback, False
+
+
+@dataclass
+class SpeakerStats:
+    lines: int = 0
+    chars: int = 0
+    levels: List[int] = field(default_factory=lambda: [0] * len(LEVELS))
+    moods: List[int] = field(default_factory=lambda: [0] * len(MOODS))
+    endings: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, chars: int, feat: Optional[Tuple[int, int, str]]) -> None:
+        self.lines += 1
+        self.chars += chars
+        if feat is None:
+            return
+        level, mood, ending = feat
+        self.levels[level] += 1
+        self.moods[mood] += 1
+        self.endings[ending] = self.endings.get(ending, 0) + 1
+
+    def add_counts(self, d: Dict[str, Any]) -> None:
+        """to_dict() 모양의 횟수를 더한다 (새 끝 음절은 d의 순서대로 뒤에 붙음 → 하나씩 add한 것과 같은 순서)"""
+        self.lines += d["lines"]
+        self.chars += d["chars"]
+        self.levels = [a + b for a, b in zip(self.levels, d["levels"])]
+        self.moods = [a + b for a, b in zip(self.moods, d["moods"])]
+        for ending, n in d["endings"].items():
+            self.endings[ending] = self.endings.get(ending, 0) + n
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"lines": self.lines, "chars": self.chars, "levels": list(self.levels), "moods": list(self.moods),
+                "endings": dict(self.endings)}
+
+
+def _dist(counts: Iterable[int]) -> List[float]:
+    c = list(counts)
+    total = sum(c)
+    return [x / total for x in c] if total else []
+
+
+def _js(p: Dict[Any, float], q: Dict[Any, float]) -> float:
+    """Jensen-Shannon divergence (밑 2, 0~1)"""
+    out = 0.0
+    for k in p.keys() | q.keys():
+        a, b = p.get(k, 0.0), q.get(k, 0.0)
+        m = (a + b) / 2
+        if a:
+            out += a * math.log2(a / m) / 2
+        if b:
+            out += b * math.log2(b / m) / 2
+    return min(max(out, 0.0), 1.0)
+
+
+def _speech_profile(sp: SpeakerStats) -> Tuple[Dict[int, float], Dict[str, float]]:
+    levels = dict(enumerate(_dist(sp.levels)))
+    total = sum(sp.endings.values())
+    endings = {k: v / total for k, v in sp.endings.items()} if total else {}
+    return levels, endings
+
+
+def speech_distinctiveness(speakers: Dict[str, SpeakerStats]) -> Optional[float]:
+    """
+    말투 차별성 (0~1): 발화가 충분한 주요 인물끼리 말투 단계 분포와 끝 음절 분포의
+    Jensen-Shannon divergence를 반씩 더한 값을 발화 수 곱으로 가중 평균한다. 비교할 인물이 둘 미만이면 None
+    """
+    main = sorted((s for s in speakers.values() if s.lines >= MIN_SPEAKER_LINES),
+                  key=lambda s: -s.lines)[:TOP_SPEAKERS]
+    if len(main) < 2:
+        return None
+    profiles = [_speech_profile(s) for s in main]
+    num = den = 0.0
+    for i in range(len(main)):
+        for j in range(i + 1, len(main)):
+            w = main[i].lines * main[j].lines
+            d = 0.5 * _js(profiles[i][0], profiles[j][0]) + 0.5 * _js(profiles[i][1], profiles[j][1])
+            num += w * d
+            den += w
+    return num / den
+
+
+class DialogueScanner:
+    """
+    원고 조각을 차례로 받아(feed) 대사와 화자 통계를 누적한다. 조각 경계에 걸친 줄은 다음 조각과 이어서 처리.
+        scanner = DialogueScanner()
+        for chunk in chunks: scanner.feed(chunk)
+        summary = scanner.result()
+    """
+
+    def __init__(self) -> None:
+        self.speakers: Dict[str, SpeakerStats] = {}
+        self.total_chars = 0
+        self.dialogue_chars = 0
+        self.dialogue_lines = 0
+        self.attributed_lines = 0
+        self.evicted_lines = 0
+        self._carry = ""
+        # 여러 줄에 걸친 대사: (닫는 따옴표, 지금까지 글자 수, 줄 수, 마지막 부분)
+        self._open: Optional[Tuple[str, int, int, str]] = None
+        # 화자를 못 정한 직전 대사 줄의 발화들 (글자 수, 특징) → 다음 줄 지문으로 정함
+        self._pending: List[Tuple[int, Optional[Tuple[int, int, str]]]] = []
+        self._pre: Optional[str] = None      # 바로 앞 지문 줄 (주어는 다음 대사가 정해지지 않을 때만 찾음)
+        self._recent: List[str] = []         # 최근 화자 두 명 (번갈아 말하기)
+        self._log: Optional[List[Tuple[Optional[str], int, Optional[Tuple[int, int, str]]]]] = None  # feed_segment 중 발화 기록
+
+    # ---------- 입력 ----------
+    def feed(self, chunk: str, lines: Optional[List[str]] = None) -> None:
+        """lines: 이미 나눈 chunk.split("\\n") (앞 조각에서 넘어온 줄이 없을 때만 그대로 씀)"""
+        if not chunk:
+            return
+        self.total_chars += len(chunk)
+        if lines is None or self._carry:
+            lines = (self._carry + chunk).split("\n")
+        self._carry = lines[-1]
+        for line in lines[:-1]:
+            self._line(line)
+        if len(self._carry) > MAX_LINE_CHARS:
+            self._line(self._carry)
+            self._carry = ""
+
+    # ---------- 구간 단위 (증분 분석) ----------
+    # 구간(줄 경계에서 끝나는 원고 조각)이나 이어진 구간들을 처리한 효과 = 더할 횟수(글자/대사/인물별 통계) + 끝의 이어지는 상태.
+    # 같은 구간을 같은 문맥(context)에서 다시 처리하면 효과도 같으므로, 저장해 둔 효과를 적용(apply_segment)하면 훑지 않고도
+    # feed한 것과 같은 상태가 된다. 이어진 구간들의 효과는 combine_segments로 하나로 합쳐 한 번에 적용할 수 있다.
+    # (문맥에 아는 인물 목록이 들어 있으므로 새로 나오는 인물도 같고, 인물을 버리지 않은 효과만 저장하므로 적용해도 버려지지 않음)
+    def context(self) -> str:
+        """다음 구간의 처리 결과를 좌우하는 상태의 해시 (열린 대사, 화자 미정 발화, 앞 지문 줄, 최근 화자, 아는 인물)"""
+        state = [self._open, self._pending, self._pre, self._recent, sorted(self.speakers)]
+        return hashlib.sha1(json.dumps(state, ensure_ascii=False).encode("utf-8", "surrogatepass")).hexdigest()
+
+    def feed_segment(self, segment: str) -> Optional[Dict[str, Any]]:
+        """
+        구간 하나를 처리하고 그 효과를 돌려준다 (JSON으로 저장 가능). 구간이 줄바꿈으로 끝나지 않으면(원고 끝) 마지막 줄도 처리.
+        처리 중 인물을 버렸으면(MAX_SPEAKERS) 어느 인물이 버려지는지가 발화 수에 달려 있어 다시 쓸 수 없으므로 None.
+        """
+        self._log = []
+        evicted = self.evicted_lines
+        try:
+            self.feed(segment)
+            if self._carry:
+                self._line(self._carry)
+                self._carry = ""
+            log = self._log
+        finally:
+            self._log = None
+        if self.evicted_lines != evicted:
+            return None
+        speakers: Dict[str, SpeakerStats] = {}
+        for speaker, chars, feat in log:
+            if speaker is not None:
+                speakers.setdefault(speaker, SpeakerStats()).add(chars, feat)
+        return {"chars": len(segment), "lines": len(log), "dialogue_chars": sum(n for _, n, _ in log),
+                "attributed": sum(speaker is not None for speaker, _, _ in log),
+                "speakers": {name: sp.to_dict() for name, sp in speakers.items()}, **self._tail_state()}
+
+    @staticmethod
+    def combine_segments(effects: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """이어진 구간들의 효과(차례대로, 각각 앞 효과를 적용한 문맥에서 만든 것) → 한 번에 적용할 효과"""
+        speakers: Dict[str, SpeakerStats] = {}
+        for effect in effects:
+            for name, d in effect["speakers"].items():
+                speakers.setdefault(name, SpeakerStats()).add_counts(d)
+        out = {k: sum(e[k] for e in effects) for k in ("chars", "lines", "dialogue_chars", "attributed")}
+        out["speakers"] = {name: sp.to_dict() for name, sp in speakers.items()}
+        out.update({k: effects[-1][k] for k in ("open", "pending", "pre", "recent")})
+        return out
+
+    def apply_segment(self, effect: Dict[str, Any]) -> None:
+        """feed_segment/combine_segments가 같은 context에서 돌려준 효과를 적용한다"""
+        def feat(f):
+            return tuple(f) if f is not None else None
+
+        self.total_chars += effect["chars"]
+        self.dialogue_lines += effect["lines"]
+        self.dialogue_chars += effect["dialogue_chars"]
+        self.attributed_lines += effect["attributed"]
+        for name, d in effect["speakers"].items():
+            sp = self.speakers.get(name)
+            if sp is None:
+                sp = self.speakers[name] = SpeakerStats()
+            sp.add_counts(d)
+        self._open = tuple(effect["open"]) if effect["open"] is not None else None
+        self._pending = [(n, feat(f)) for n, f in effect["pending"]]
+        self._pre = effect["pre"]
+        self._recent = list(effect["recent"])
+
+    def _tail_state(self) -> Dict[str, Any]:
+        return {"open": self._open, "pending": self._pending, "pre": self._pre, "recent": list(self._recent)}
+
+    def result(self) -> Dict[str, Any]:
+        if self._carry:
+            self._line(self._carry)
+            self._carry = ""
+        self._resolve_pending(None)
+        return self.as_dict()
+
+    # ---------- 줄 처리 ----------
+    def _line(self, line: str) -> None:
+        if not line.strip():
+            return
+        if self._open is None and _QUOTE.search(line) is None:
+            self._narration(line)  # 따옴표 없는 지문 줄 (대부분): 나누지 않고 바로
+            return
+        narration: List[str] = []
+        utterances: List[Tuple[int, Optional[Tuple[int, int, str]]]] = []
+        pos = 0
+        start = 0
+        if self._open is not None:
+            close, n, k, tail = self._open
+            self._open = (close, n, k + 1, tail)
+        for m in _QUOTE.finditer(line):
+            c = m.group()
+            if self._open is None:
+                if c == "”":  # 여는 따옴표 없는 닫는 따옴표는 지문으로 둔다
+                    continue
+                narration.append(line[pos:m.start()])
+                self._open = ("”" if c == "“" else '"', 0, 0, "")
+                start = m.end()
+            elif c == self._open[0] or (c == '"' and self._open[0] == "”"):
+                close, n, k, tail = self._open
+                body = line[start:m.start()]
+                text = body if body.strip() else tail
+                utterances.append((n + len(body), _speech_features(text)))
+                self._open = None
+                pos = m.end()
+            else:  # 닫히기 전에 다시 열림: 앞의 따옴표는 짝이 없던 것으로 보고 여기서 새로 시작
+                start = m.end()
+                self._open = (self._open[0], 0, 0, "")
+        if self._open is not None:
+            close, n, k, tail = self._open
+            body = line[start:]
+            if k >= MAX_OPEN_LINES:
+                self._open = None  # 짝이 안 맞는 따옴표: 대사로 세지 않음
+            else:
+                self._open = (close, n + len(body), k, body[-200:] if body.strip() else tail)
+        else:
+            narration.append(line[pos:])
+        narr = " ".join(s for s in narration if s.strip())
+
+        if not utterances:
+            if narr and self._open is None:
+                self._narration(narr)
+            return
+
+        self._resolve_pending(None)
+        speaker = None
+        if narr:
+            name, said = _find_subject(narr)
+            if name and (said or name in self.speakers):
+                speaker = name
+        if speaker is not None:
+            for n, feat in utterances:
+                self._attribute(speaker, n, feat)
+            self._pre = None
+        else:
+            self._pending = utterances
+
+    def _narration(self, narr: str) -> None:
+        # 지문 줄: 직전 대사 줄의 화자를 이 줄 첫 문장으로 정하고, 다음 대사를 위해 줄을 기억
+        if self._pending:
+            name, said = _find_subject(narr, first_sentence_only=True, intro=False)
+            if said:
+                # 직전 대사의 화자를 밝힌 지문이면 다음 대사는 대개 상대의 대답 → 번갈아 말하기에 맡김
+                self._resolve_pending(name)
+                return
+            self._resolve_pending(None)
+        self._pre = narr
+
+    def _resolve_pending(self, speaker: Optional[str]) -> None:
+        if not self._pending:
+            return
+        if speaker is None and self._pre is not None:
+            name, said = _find_subject(self._pre)
+            if name and (said or name in self.speakers):
+                speaker = name
+        if speaker is None and len(self._recent) == 2:
+            speaker = self._recent[0]  # 번갈아 말하기: 직전 화자가 아닌 쪽
+        for n, feat in self._pending:
+            self._attribute(speaker, n, feat)
+        self._pending = []
+        self._pre = None
+
+    def _attribute(self, speaker: Optional[str], chars: int, feat: Optional[Tuple[int, int, str]]) -> None:
+        if self._log is not None:
+            self._log.append((speaker, chars, feat))
+        self.dialogue_lines += 1
+        self.dialogue_chars += chars
+        if speaker is None:
+            return
+        self.attributed_lines += 1
+        sp = self.speakers.get(speaker)
+        if sp is None:
+            if len(self.speakers) >= MAX_SPEAKERS:
+                low = min(self.speakers, key=lambda k: self.speakers[k].lines)
+                self.evicted_lines += self.speakers.pop(low).lines
+            sp = self.speakers[speaker] = SpeakerStats()
+        sp.add(chars, feat)
+        if not self._recent or self._recent[-1] != speaker:
+            self._recent = (self._recent + [speaker])[-2:]
+
+    # ---------- 결과 ----------
+    def as_dict(self) -> Dict[str, Any]:
+        attributed = self.attributed_lines - self.evicted_lines
+        top = sorted(self.speakers.items(), key=lambda kv: -kv[1].lines)[:TOP_SPEAKERS]
+        characters = []
+        for name, sp in top:
+            levels = _dist(sp.levels)
+            moods = _dist(sp.moods)
+            characters.append({
+                "name": name,
+                "lines": sp.lines,
+                "line_share": sp.lines / attributed if attributed else 0,
+                "chars": sp.chars,
+                "avg_line_chars": sp.chars / sp.lines if sp.lines else 0,
+                "speech_levels": dict(zip(LEVELS, levels)) if levels else {},
+                "moods": dict(zip(MOODS, moods)) if moods else {},
+                "top_endings": [e for e, _ in sorted(sp.endings.items(), key=lambda kv: -kv[1])[:5]],
+            })
+        return {
+            "dialogue_lines": self.dialogue_lines,
+            "dialogue_ratio": self.dialogue_chars / self.total_chars if self.total_chars else 0,
+            "attributed_ratio": self.attributed_lines / self.dialogue_lines if self.dialogue_lines else 0,
+            "num_speakers": len(self.speakers),
+            "speech_distinctiveness": speech_distinctiveness(self.speakers),
+            "characters": characters,
+        }
+
+
+def scan_dialogue(source: Union[str, Iterable[str]]) -> Dict[str, Any]:
+    """문자열 또는 문자열 조각 이터레이터에서 대사/화자 통계를 만든다."""
+    scanner = DialogueScanner()
+    if isinstance(source, str):  # 줄 목록을 한꺼번에 만들지 않도록 잘라서 넣음
+        text = source
+        source = (text[i:i + MAX_LINE_CHARS] for i in range(0, len(text), MAX_LINE_CHARS))
+    for chunk in source:
+        scanner.feed(chunk)
+    return scanner.result()
@@ -0,0 +1,450 @@
+# app/services/duplicates.py
+# 색인 채우기/정리: (backend 폴더에서) python -m app.services.duplicates {index,prune}
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..config import settings
+from ..models.schemas import EvidenceItem
+from .db import connect, register_schema
+from .incremental import CHAPTER_MARK
+from .manuscripts import latest_manuscripts
+from .sketch import (MINHASH_BINS, minhash_empty, minhash_merge, minhash_signature, minhash_update,
+                     shingle_hashes)
+
+# numpy는 함수 안에서 import한다 (서버 시작 시 import 비용을 첫 사용으로 미룸)
+
+# ---------- 거의 같은 원고/화 찾기 ----------
+# 공백을 모두 뺀 본문의 연속 SHINGLE_CHARS글자 조각 집합을 MinHash 서명(sketch.py)으로 줄여서,
+# 원고 전체와 화마다 하나씩 만든다 (분석할 때 같이 훑음 → result["shingles"]).
+# 저장(persist)한 원고의 서명은 SQLite의 LSH 색인에 넣는다: 서명을 LSH_BANDS개 띠(LSH_ROWS칸씩)로 나눠
+# 띠마다 해시 하나를 버킷 키로 둔다. 자카드 유사도 J인 두 서명이 버킷 하나라도 같을 확률은
+# 1 - (1 - J^LSH_ROWS)^LSH_BANDS (J=0.5 → 88%, J=0.7 → 99.9%). 후보만 서명을 비교해서 기준을 넘는 것을 돌려준다.
+SHINGLE_CHARS = 5
+LSH_BANDS = 32
+LSH_ROWS = MINHASH_BINS // LSH_BANDS
+MIN_CHAPTER_SHINGLES = 300    # 이보다 짧은 화(공지/후기 등)는 화 단위로 색인하지 않음
+WHOLE = -1                    # chapter 칸: 원고 전체
+_MAX_PENDING = 1 << 20        # 줄바꿈 없이 이만큼 쌓이면 줄 끝을 기다리지 않고 처리
+
+register_schema("""
+CREATE TABLE IF NOT EXISTS minhash_items (
+    item_id      INTEGER PRIMARY KEY,
+    content_sha1 TEXT NOT NULL,
+    chapter      INTEGER NOT NULL,
+    title        TEXT,
+    signature    BLOB NOT NULL,
+    UNIQUE (content_sha1, chapter)
+);
+CREATE TABLE IF NOT EXISTS minhash_buckets (
+    bucket  INTEGER NOT NULL,
+    item_id INTEGER NOT NULL,
+    PRIMARY KEY (bucket, item_id)
+) WITHOUT ROWID;
+""")
+
+
+class ShingleScanner:
+    """
+    조각을 받아 원고 전체와 화별 MinHash 서명을 만든다 (분석 파이프라인의 훑기 단계로 같이 돎).
+    화 구분선(incremental.CHAPTER_MARK)을 보려고 줄 끝까지만 처리하고 마지막 줄은 다음 조각과 합친다.
+    메모리: 서명 (1 + 화 수)개 + 처리 못 한 한 줄
+    """
+
+    def __init__(self) -> None:
+        self.doc = minhash_empty()
+        self.chapters: List[Dict[str, Any]] = []
+        self._pending = ""
+        self._carry = ""          # 조각 경계에 걸친 shingle을 위한 앞 조각의 끝 (공백 제거 후)
+        self._line_start = True   # _pending이 줄 처음부터 시작하는지
+
+    def feed(self, chunk: str, tokens: Optional[List[str]] = None) -> None:
+        """tokens: 이미 나눈 chunk.split() (chunk가 줄 끝에서 끝나고 밀린 줄이 없을 때만 그대로 씀)"""
+        text = self._pending + chunk
+        cut = text.rfind("\n") + 1
+        if not cut and len(text) < _MAX_PENDING:
+            self._pending = text
+            return
+        cut = cut or len(text)
+        self._pending = text[cut:]
+        self._process(text[:cut], tokens if cut == len(text) == len(chunk) else None)
+
+    def _process(self, block: str, tokens: Optional[List[str]] = None) -> None:
+        starts = [m.start() + 1 for m in CHAPTER_MARK.finditer(block)]
+        if self._line_start and CHAPTER_MARK.match("\n" + block[:256]):
+            starts.insert(0, 0)
+        self._line_start = block.endswith("\n")
+        pos = 0
+        for start in starts:
+            self._add(block[pos:start])
+            end = block.find("\n", start)
+            title = block[start:end if end >= 0 else len(block)].strip()
+            self.chapters.append({"title": title[:100], "sig": minhash_empty(), "shingles": 0})
+            pos = start
+        self._add(block[pos:], None if starts else tokens)
+
+    def _add(self, piece: str, tokens: Optional[List[str]] = None) -> None:
+        norm = "".join(piece.split() if tokens is None else tokens)
+        if not norm:
+            return
+        window = self._carry + norm
+        hashes = shingle_hashes(window, SHINGLE_CHARS)
+        minhash_update(self.doc, hashes)
+        if self.chapters:
+            minhash_update(self.chapters[-1]["sig"], hashes)
+            self.chapters[-1]["shingles"] += len(hashes)
+        self._carry = window[-(SHINGLE_CHARS - 1):]
+
+    # ---------- 구간 단위 (증분 분석) ----------
+    # 이어진 원고 범위(줄 경계에서 시작하는 구간들, incremental.split_segments)를 앞뒤 문맥 없이 요약해 두고(segment_summary),
+    # 이어진 범위들의 요약을 합치면(merge_summaries) 범위를 이어 붙여 요약한 것과 같다 → 합친 요약도 캐시해 둘 수 있다.
+    # 요약 = 범위 안 shingle의 칸별 최솟값: 원고 전체(doc), 첫 구분선 앞부분(first, 앞 범위의 마지막 화로 감),
+    # 범위 안에서 시작하는 화들(chapters) + 범위 앞뒤 SHINGLE_CHARS - 1글자(head/tail, 경계에 걸친 shingle을 합칠 때 계산).
+    # shingle은 끝 글자가 있는 화에 넣는다 (feed와 같은 규칙). 더 받을 일이 없는 화(마지막 화도 아니고 앞 경계에 걸친
+    # shingle이 닿지 않는 화)는 서명을 저장용 값("out", 짧은 화는 None)으로 바로 확정해서 요약이 커지지 않게 한다.
+    @staticmethod
+    def segment_summary(segment: str) -> Dict[str, Any]:
+        """구간 하나의 요약 (JSON으로 저장 가능)"""
+        import numpy as np
+
+        starts = [m.start() + 1 for m in CHAPTER_MARK.finditer(segment)]
+        if CHAPTER_MARK.match("\n" + segment[:256]):
+            starts.insert(0, 0)
+        bounds = [0] + starts + [len(segment)]
+        titles: List[str] = []
+        norms = []
+        for i, (lo, hi) in enumerate(zip(bounds, bounds[1:])):
+            piece = segment[lo:hi]
+            norms.append("".join(piece.split()))
+            if i:
+                end = piece.find("\n")
+                titles.append(piece[:end if end >= 0 else len(piece)].strip()[:100])
+        norm = "".join(norms)
+        piece_starts = np.cumsum([0] + [len(n) for n in norms[:-1]])
+        hashes = shingle_hashes(norm, SHINGLE_CHARS)
+        owner = np.searchsorted(piece_starts, np.arange(len(hashes)) + SHINGLE_CHARS - 1, side="right") - 1
+        sigs = []
+        for i in range(len(titles) + 1):
+            mine = hashes[owner == i]
+            sig = minhash_empty()
+            minhash_update(sig, mine)
+            sigs.append({"sig": _pack(sig), "shingles": int(len(mine))})
+        doc = minhash_empty()
+        minhash_update(doc, hashes)
+        keep = SHINGLE_CHARS - 1
+        summary = {
+            "len": len(norm), "head": norm[:keep], "tail": norm[-keep:] if len(norm) >= keep else norm,
+            "head_starts": [[int(piece_starts[i + 1]), i] for i in range(len(titles)) if piece_starts[i + 1] < keep],
+            "first": sigs[0], "chapters": [{"title": t, **sig} for t, sig in zip(titles, sigs[1:])], "doc": _pack(doc),
+        }
+        _settle(summary["chapters"], summary["head_starts"], range(len(titles)))
+        return summary
+
+    @staticmethod
+    def merge_summaries(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """차례로 이어진 범위들의 요약 → 이어 붙인 범위의 요약 (parts는 바꾸지 않음)"""
+        import numpy as np
+
+        keep = SHINGLE_CHARS - 1
+        a = parts[0]
+        doc = _unpack(a["doc"])
+        first = dict(a["first"])
+        chapters = [dict(c) if "sig" in c else c for c in a["chapters"]]
+        length, head, tail, head_starts = a["len"], a["head"], a["tail"], list(a["head_starts"])
+        for b in parts[1:]:
+            # 경계에 걸친 shingle: 앞 범위 끝 keep글자 안에서 시작해 b 앞 keep글자 안에서 끝남. 끝 글자의 b 안 위치로 주인을 정함
+            cross = shingle_hashes(tail + b["head"], SHINGLE_CHARS)
+            ends = np.arange(len(cross)) + SHINGLE_CHARS - 1 - len(tail)
+            owner = np.searchsorted([o for o, _ in b["head_starts"]], ends, side="right") - 1  # -1: b의 first
+            minhash_merge(doc, _unpack(b["doc"]))
+            minhash_update(doc, cross)
+
+            target = chapters[-1] if chapters else first   # b의 첫 구분선 앞부분은 앞 범위의 마지막 화로
+            mine = cross[owner == -1]
+            minhash_merge(_open_sig(target), _unpack(b["first"]["sig"]))
+            minhash_update(target["sig"], mine)
+            target["shingles"] += b["first"]["shingles"] + len(mine)
+            n = len(chapters)
+            chapters += [dict(c) if "sig" in c else c for c in b["chapters"]]
+            for j, (_, c) in enumerate(b["head_starts"]):
+                mine = cross[owner == j]
+                if len(mine):
+                    minhash_update(_open_sig(chapters[n + c]), mine)
+                    chapters[n + c]["shingles"] += len(mine)
+
+            head_starts += [[length + o, n + c] for o, c in b["head_starts"] if length + o < keep]
+            head = head if len(head) == keep else (head + b["head"])[:keep]
+            tail = b["tail"] if len(b["tail"]) == keep else (tail + b["tail"])[-keep:]
+            length += b["len"]
+            # 이번에 확정할 수 있게 된 화: 앞 범위의 마지막 화(b에 화가 있으면), 앞 경계에서 멀어진 b의 화들
+            _settle(chapters, head_starts, [n - 1, *(n + c for _, c in b["head_starts"])])
+        for c in [first, *chapters]:
+            if "sig" in c and not isinstance(c["sig"], str):
+                c["sig"] = _pack(c["sig"])
+        return {"len": length, "head": head, "tail": tail, "head_starts": head_starts,
+                "first": first, "chapters": chapters, "doc": _pack(doc)}
+
+    @staticmethod
+    def summary_result(summary: Dict[str, Any]) -> Dict[str, Any]:
+        """원고 전체의 요약 → result()와 같은 값"""
+        chapters = list(summary["chapters"])
+        _settle(chapters, None, range(len(chapters)))
+        sig = minhash_signature(_unpack(summary["doc"]))
+        return {
+            "doc": base64.b64encode(sig).decode("ascii"),
+            "chapters": [{"index": i, "title": c["title"], "sig": c["out"]}
+                         for i, c in enumerate(chapters) if c["out"] is not None],
+        }
+
+    def result(self) -> Dict[str, Any]:
+        """{"doc": 서명(base64), "chapters": [{"index", "title", "sig"}]}. 화 번호는 구분선 순서 그대로"""
+        if self._pending:
+            self._process(self._pending)
+            self._pending = ""
+        return {
+            "doc": base64.b64encode(minhash_signature(self.doc)).decode("ascii"),
+            "chapters": [{"index": i, "title": c["title"],
+                          "sig": base64.b64encode(minhash_signature(c["sig"])).decode("ascii")}
+                         for i, c in enumerate(self.chapters) if c["shingles"] >= MIN_CHAPTER_SHINGLES],
+        }
+
+
+def _pack(sig) -> str:
+    return base64.b64encode(sig.astype("<u8").tobytes()).decode("ascii")
+
+
+def _unpack(packed: str):
+    import numpy as np
+
+    return np.frombuffer(base64.b64decode(packed), dtype="<u8").astype(np.uint64)
+
+
+def _open_sig(chapter: Dict[str, Any]):
+    """합치는 중인 화의 서명 (처음 건드릴 때 풀어 둠)"""
+    if isinstance(chapter["sig"], str):
+        chapter["sig"] = _unpack(chapter["sig"])
+    return chapter["sig"]
+
+
+def _settle(chapters: List[Dict[str, Any]], head_starts: Optional[List[List[int]]], indices: Iterable[int]) -> None:
+    """
+    chapters의 indices 화 중 더 받을 일이 없는 화(마지막 화도, 앞 경계의 화(head_starts)도 아닌 화)를 확정한다
+    (제자리에서 새 dict로 바꿈). head_starts가 None이면 원고 전체라서 모두 확정.
+    확정된 화 = {"title", "out": 저장용 서명(base64) 또는 짧으면 None}
+    """
+    open_ = set()
+    if head_starts is not None and chapters:
+        open_ = {c for _, c in head_starts} | {len(chapters) - 1}
+    for i in indices:
+        if i < 0 or i in open_ or "sig" not in chapters[i]:
+            continue
+        c = chapters[i]
+        out = None
+        if c["shingles"] >= MIN_CHAPTER_SHINGLES:
+            out = base64.b64encode(minhash_signature(_open_sig(c))).decode("ascii")
+        chapters[i] = {"title": c["title"], "out": out}
+
+
+def scan_shingles(source: Iterable[str]) -> Dict[str, Any]:
+    scanner = ShingleScanner()
+    for chunk in source:
+        scanner.feed(chunk)
+    return scanner.result()
+
+
+# ---------- LSH 색인 ----------
+def band_keys(signatures):
+    """서명 배열(uint32 [n, MINHASH_BINS]) → 띠별 버킷 키(int64 [n, LSH_BANDS])"""
+    import numpy as np
+
+    s = np.asarray(signatures, dtype=np.uint64).reshape(-1, LSH_BANDS, LSH_ROWS)
+    h = np.arange(LSH_BANDS, dtype=np.uint64)[None, :] * np.uint64(0x9E3779B97F4A7C15)
+    with np.errstate(over="ignore"):
+        for r in range(LSH_ROWS):
+            h = (h ^ s[:, :, r]) * np.uint64(0x100000001B3)
+            h = h ^ (h >> np.uint64(29))
+    return h.view(np.int64)
+
+
+def _decode(sig: str) -> bytes:
+    return base64.b64decode(sig) if sig else b""
+
+
+def _items(shingles: Dict[str, Any]) -> List[Tuple[int, Optional[str], bytes]]:
+    """(chapter, title, 서명) — 원고 전체는 chapter=WHOLE. 빈 서명은 뺀다."""
+    out = [(WHOLE, None, _decode(shingles.get("doc", "")))]
+    out += [(c["index"], c["title"], _decode(c["sig"])) for c in shingles.get("chapters", [])]
+    return [it for it in out if it[2]]
+
+
+def index_signatures(content_sha1: str, shingles: Optional[Dict[str, Any]]) -> int:
+    """저장한 원고의 서명을 색인에 넣는다 (같은 내용이 이미 있으면 바꿔 넣음). 넣은 서명 수"""
+    import numpy as np
+
+    items = _items(shingles or {})
+    if not items:
+        return 0
+    keys = band_keys(np.stack([np.frombuffer(sig, dtype="<u4") for _, _, sig in items]))
+    with connect() as conn:
+        _delete(conn, [content_sha1])
+        for (chapter, title, sig), row in zip(items, keys.tolist()):
+            item_id = conn.execute(
+                "INSERT INTO minhash_items (content_sha1, chapter, title, signature) VALUES (?, ?, ?, ?)",
+                (content_sha1, chapter, title, sig)).lastrowid
+            conn.executemany("INSERT OR IGNORE INTO minhash_buckets VALUES (?, ?)", [(k, item_id) for k in row])
+    return len(items)
+
+
+def _delete(conn, hashes: List[str]) -> None:
+    import numpy as np
+
+    for sha1 in hashes:
+        rows = conn.execute("SELECT item_id, signature FROM minhash_items WHERE content_sha1 = ?", (sha1,)).fetchall()
+        if not rows:
+            continue
+        # 버킷 테이블은 (bucket, item_id) 순으로만 색인되어 있어서, 지울 때는 서명에서 버킷 키를 다시 계산한다
+        keys = band_keys(np.stack([np.frombuffer(r["signature"], dtype="<u4") for r in rows]))
+        conn.executemany("DELETE FROM minhash_buckets WHERE bucket = ? AND item_id = ?",
+                         [(k, r["item_id"]) for r, row in zip(rows, keys.tolist()) for k in row])
+        conn.execute("DELETE FROM minhash_items WHERE content_sha1 = ?", (sha1,))
+
+
+def _candidates(conn, keys: List[int]) -> Dict[int, List[int]]:
+    """버킷 키 → 그 버킷의 item_id들"""
+    out: Dict[int, List[int]] = {}
+    uniq = list(set(keys))
+    for i in range(0, len(uniq), 500):  # SQLite 변수 개수 한도
+        part = uniq[i:i + 500]
+        for r in conn.execute(f"SELECT bucket, item_id FROM minhash_buckets WHERE bucket IN ({','.join('?' * len(part))})",
+                              part):
+            out.setdefault(r["bucket"], []).append(r["item_id"])
+    return out
+
+
+def find_matches(shingles: Optional[Dict[str, Any]], exclude_sha1: Optional[str] = None,
+                 threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    색인에서 원고 전체/화별 서명과 추정 자카드 유사도가 threshold 이상인 것을 찾는다.
+    반환: [{"query_chapter", "query_title", "content_sha1", "chapter", "title", "similarity"}] (유사도 순)
+    """
+    import numpy as np
+
+    threshold = settings.near_duplicate_threshold if threshold is None else threshold
+    items = _items(shingles or {})
+    if not items:
+        return []
+    sigs = np.stack([np.frombuffer(sig, dtype="<u4") for _, _, sig in items])
+    keys = band_keys(sigs).tolist()
+    with connect() as conn:
+        buckets = _candidates(conn, [k for row in keys for k in row])
+        pairs = {(q, item_id) for q, row in enumerate(keys) for k in row for item_id in buckets.get(k, ())}
+        ids = sorted({item_id for _, item_id in pairs})
+        found: Dict[int, Any] = {}
+        for i in range(0, len(ids), 500):
+            part = ids[i:i + 500]
+            for r in conn.execute(f"SELECT * FROM minhash_items WHERE item_id IN ({','.join('?' * len(part))})", part):
+                found[r["item_id"]] = r
+    out = []
+    for q, item_id in pairs:
+        r = found.get(item_id)
+        if r is None or r["content_sha1"] == exclude_sha1:
+            continue
+        sim = float(np.mean(sigs[q] == np.frombuffer(r["signature"], dtype="<u4")))
+        if sim >= threshold:
+            out.append({"query_chapter": items[q][0], "query_title": items[q][1], "content_sha1": r["content_sha1"],
+                        "chapter": r["chapter"], "title": r["title"], "similarity": round(sim, 3)})
+    out.sort(key=lambda m: (-m["similarity"], m["content_sha1"], m["query_chapter"], m["chapter"]))
+    return out
+
+
+def find_duplicates(shingles: Optional[Dict[str, Any]], exclude_sha1: Optional[str] = None,
+                    threshold: Optional[float] = None, limit: Optional[int] = None) -> List[EvidenceItem]:
+    """
+    find_matches 결과를 응답용 근거로 바꾼다.
+    원고 전체가 겹치는 원고는 한 줄로(겹치는 화 수는 meta에), 아니면 겹치는 화마다 한 줄.
+    """
+    limit = settings.near_duplicate_max_results if limit is None else limit
+    matches = find_matches(shingles, exclude_sha1, threshold)
+    if not matches:
+        return []
+    whole = {m["content_sha1"] for m in matches if m["query_chapter"] == WHOLE and m["chapter"] == WHOLE}
+    names = latest_manuscripts({m["content_sha1"] for m in matches})
+    out: List[EvidenceItem] = []
+    for m in matches:
+        sha1 = m["content_sha1"]
+        is_whole = m["query_chapter"] == WHOLE and m["chapter"] == WHOLE
+        if sha1 in whole and not is_whole:
+            continue
+        info = names.get(sha1, {})
+        name = info.get("original_name") or info.get("stored_name") or sha1[:10]
+        here = "원고 전체" if m["query_chapter"] == WHOLE else (m["query_title"] or f"{m['query_chapter'] + 1}번째 화")
+        there = "원고 전체" if m["chapter"] == WHOLE else (m["title"] or f"{m['chapter'] + 1}번째 화")
+        meta = {"content_sha1": sha1, "manuscript_id": info.get("manuscript_id", ""),
+                "query_chapter": str(m["query_chapter"]), "chapter": str(m["chapter"])}
+        if is_whole:
+            meta["matched_chapters"] = str(sum(1 for x in matches if x["content_sha1"] == sha1
+                                               and x["query_chapter"] != WHOLE and x["chapter"] != WHOLE))
+        out.append(EvidenceItem(source_id="minhash", score=m["similarity"], meta=meta,
+                                snippet=f"{here} ↔ '{name}' {there} (추정 유사도 {m['similarity']:.0%})"))
+        if len(out) >= limit:
+            break
+    return out
+
+
+# ---------- 저장소와 맞추기 ----------
+def index_library() -> Dict[str, int]:
+    """저장된 원고 중 색인에 없는 것을 넣는다 (구조 색인의 추출 텍스트가 있으면 그걸 읽음)."""
+    from .analysis import iter_chunks
+    from .manuscripts import stored_manuscripts
+    from .structure import extract_manuscript_text, text_path
+
+    stats = {"indexed": 0, "skipped": 0, "failed": 0}
+    with connect() as conn:
+        done = {r["content_sha1"] for r in conn.execute("SELECT DISTINCT content_sha1 FROM minhash_items")}
+    for info in stored_manuscripts():
+        sha1 = info["content_sha1"]
+        if sha1 in done:
+            stats["skipped"] += 1
+            continue
+        try:
+            text = text_path(sha1)
+            body = (text.read_text(encoding="utf-8", errors="surrogatepass") if text
+                    else extract_manuscript_text(info["name"], info["path"], sha1))
+        except Exception:
+            stats["failed"] += 1
+            continue
+        index_signatures(sha1, scan_shingles(iter_chunks(body)))
+        stats["indexed"] += 1
+    return stats
+
+
+def prune_index() -> int:
+    """원문 폴더에서 지워진 원고의 서명을 뺀다. 뺀 원고 수"""
+    from .manuscripts import live_manuscript_hashes
+
+    live = live_manuscript_hashes()
+    with connect() as conn:
+        gone = [r["content_sha1"] for r in conn.execute("SELECT DISTINCT content_sha1 FROM minhash_items")
+                if r["content_sha1"] not in live]
+        _delete(conn, gone)
+    return len(gone)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m app.services.duplicates")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("index", help="저장된 원고 중 유사 원고 색인에 없는 것을 넣음")
+    sub.add_parser("prune", help="원문 폴더에서 지워진 원고를 색인에서 뺌")
+    args = ap.parse_args(argv)
+    out: Any = index_library() if args.cmd == "index" else {"pruned": prune_index()}
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+# app/services/embeddings.py
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import settings
+from .incremental import split_segments
+
+
+# ---------- 청크 나누기 ----------
+def chunk_text(text: str, size: Optional[int] = None, overlap: Optional[int] = None) -> Iterator[str]:
+    """
+    원고를 약 size자 청크로 나누고, 각 청크 앞에 직전 청크 끝 overlap자를 붙인다.
+    경계는 빈 줄/화 구분선을 우선하는 split_segments를 따르므로(내용 기준 경계)
+    원고를 조금 고쳐도 나머지 청크는 그대로 → 임베딩 캐시를 재사용할 수 있다.
+    """
+    size = size or settings.chunk_size
+    overlap = settings.chunk_overlap if overlap is None else overlap
+    overlap = max(0, min(overlap, size - 1))
+    tail = ""
+    for seg in split_segments(text, size // 2, size):
+        for i in range(0, len(seg), size):
+            piece = seg[i:i + size]
+            if not piece.strip():
+                continue
+            yield tail + piece
+            tail = piece[-overlap:] if overlap else ""
+
+
+def chunk_key(chunk: str) -> bytes:
+    return hashlib.sha1(chunk.encode("utf-8", "surrogatepass")).digest()
+
+
+# ---------- 임베더 ----------
+class Embedder:
+    """임베더 인터페이스: 문자열 목록 → (n, dimension) float32, 각 행은 L2 정규화"""
+    name: str
+    dimension: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class HashingEmbedder(Embedder):
+    """
+    외부 모델 없이 쓰는 결정적 임베더 (오프라인 테스트/개발용).
+    글자 1~3-gram을 해시해서 dimension칸에 ±1로 누적한 뒤 정규화한다.
+    같은 입력이면 프로세스/실행이 달라도 항상 같은 벡터가 나온다.
+    """
+    _PRIME = np.uint64(1099511628211)  # FNV-1a
+    _OFFSET = np.uint64(14695981039346656037)
+
+    def __init__(self, dimension: int) -> None:
+        self.dimension = dimension
+        self.name = f"hashing-{dimension}"
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        cp = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype="<u4").astype(np.uint64)
+        vec = np.zeros(self.dimension, dtype=np.float64)
+        for n in (1, 2, 3):
+            m = len(cp) - n + 1
+            if m <= 0:
+                break
+            h = np.full(m, self._OFFSET ^ np.uint64(n), dtype=np.uint64)
+            for k in range(n):
+                h = (h ^ cp[k:k + m]) * self._PRIME
+            idx = ((h >> np.uint64(1)) % np.uint64(self.dimension)).astype(np.intp)
+            sign = np.where(h & np.uint64(1), 1.0, -1.0)
+            vec += np.bincount(idx, weights=sign, minlength=self.dimension)
+        norm = np.linalg.norm(vec)
+        return (vec / norm if norm else vec).astype(np.float32)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for i, t in enumerate(texts):
+            out[i] = self._embed_one(t)
+        return out
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """sentence-transformers 모델 (처음 embed할 때 불러옴)"""
+
+    def __init__(self, model_name: str, dimension: int) -> None:
+        self.name = model_name
+        self.dimension = dimension
+        self._model = None
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        if self._model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                raise RuntimeError("sentence-transformers 미설치")
+            self._model = SentenceTransformer(self.name)
+        vecs = self._model.encode(list(texts), batch_size=len(texts), normalize_embeddings=True)
+        return np.asarray(vecs, dtype=np.float32)
+
+
+_embedder: Optional[Embedder] = None
+
+
+def get_embedder() -> Embedder:
+    """settings.embedding_model이 'hashing'이면 로컬 해시 임베더, 아니면 sentence-transformers"""
+    global _embedder
+    if _embedder is None:
+        if settings.embedding_model == "hashing":
+            _embedder = HashingEmbedder(settings.embedding_dimension)
+        else:
+            _embedder = SentenceTransformerEmbedder(settings.embedding_model, settings.embedding_dimension)
+    return _embedder
+
+
+# ---------- 청크 임베딩 저장소 ----------
+class EmbeddingStore:
+    """
+    청크 해시(sha1 20바이트) → float32 벡터를 한 파일에 이어 붙여 저장하고 memmap으로 읽는다.
+    레코드 = [key 20B][vector dimension*4B], 쓰기는 항상 파일 끝에 레코드 단위로 추가.
+    원고/개정판이 달라도 같은 청크는 다시 임베딩하지 않는다.
+    """
+
+    def __init__(self, path: Path, dimension: int) -> None:
+        self.path = Path(path)
+        self.dimension = dimension
+        self.dtype = np.dtype([("key", "V20"), ("vec", "<f4", (dimension,))])
+        self._index: Dict[bytes, int] = {}
+        self._rows = 0
+        self._mm: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._refresh()
+
+    @classmethod
+    def for_embedder(cls, embedder: Embedder, base: Optional[Path] = None) -> "EmbeddingStore":
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", embedder.name)
+        return cls((base or settings.embedding_path) / f"{slug}-{embedder.dimension}.bin", embedder.dimension)
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def _refresh(self) -> None:
+        # 다른 프로세스가 추가한 레코드까지 반영 (끝에 반쯤 쓰인 레코드는 무시)
+        size = self.path.stat().st_size if self.path.exists() else 0
+        rows = size // self.dtype.itemsize
+        if rows == self._rows and self._mm is not None:
+            return
+        self._mm = np.memmap(self.path, dtype=self.dtype, mode="r", shape=(rows,)) if rows else None
+        if rows > self._rows:
+            blob = self._mm["key"][self._rows:rows].tobytes()
+            for i, off in enumerate(range(0, len(blob), 20), start=self._rows):
+                self._index.setdefault(blob[off:off + 20], i)
+        self._rows = rows
+
+    def get_many(self, keys: Sequence[bytes]) -> Tuple[np.ndarray, List[int]]:
+        """(벡터 배열, 없는 키의 위치 목록). 없는 자리는 0으로 채워 둔다."""
+        with self._lock:
+            self._refresh()
+            out = np.zeros((len(keys), self.dimension), dtype=np.float32)
+            missing = []
+            for i, k in enumerate(keys):
+                row = self._index.get(k)
+                if row is None:
+                    missing.append(i)
+                else:
+                    out[i] = self._mm[row]["vec"]
+            return out, missing
+
+    def put_many(self, keys: Sequence[bytes], vectors: np.ndarray) -> None:
+        rec = np.empty(len(keys), dtype=self.dtype)
+        rec["key"] = keys
+        rec["vec"] = vectors
+        with self._lock:
+            # 레코드 전체를 한 번의 append write로 → 여러 프로세스가 써도 레코드가 섞이지 않음
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0))
+            try:
+                os.write(fd, rec.tobytes())
+            finally:
+                os.close(fd)
+            self._refresh()
+
+
+# ---------- 파이프라인 ----------
+@dataclass
+class EmbedStats:
+    chunks: int = 0
+    hits: int = 0
+    misses: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.chunks if self.chunks else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"chunks": self.chunks, "hits": self.hits, "misses": self.misses,
+                "seconds": round(self.seconds, 4), "chunks_per_sec": round(self.chunks_per_sec, 1),
+                "hit_rate": round(self.hit_rate, 4)}
+
+
+def embed_chunks(chunks: Iterable[str], embedder: Optional[Embedder] = None,
+                 store: Optional[EmbeddingStore] = None,
+                 batch_size: Optional[int] = None) -> Tuple[np.ndarray, EmbedStats]:
+    """
+    청크들을 임베딩한다. 저장소에 있는 청크는 그대로 쓰고, 없는 것만 batch_size개씩 묶어 임베딩 후 저장.
+    반환: ((청크 수, dimension) float32, 통계)
+    """
+    if embedder is None:
+        embedder = get_embedder()
+    if store is None:  # (빈 저장소는 len()==0이라 `or`를 쓰면 안 됨)
+        store = EmbeddingStore.for_embedder(embedder)
+    batch_size = batch_size or settings.embedding_batch_size
+    started = time.perf_counter()
+
+    chunks = list(chunks)
+    keys = [chunk_key(c) for c in chunks]
+    vectors, missing = store.get_many(keys)
+
+    # 같은 원고 안에서 중복된 청크는 한 번만 임베딩
+    todo: Dict[bytes, List[int]] = {}
+    for i in missing:
+        todo.setdefault(keys[i], []).append(i)
+    pending = list(todo.items())
+    for b in range(0, len(pending), batch_size):
+        batch = pending[b:b + batch_size]
+        vecs = embedder.embed([chunks[idx[0]] for _, idx in batch])
+        store.put_many([k for k, _ in batch], vecs)
+        for (_, idx), v in zip(batch, vecs):
+            vectors[idx] = v
+
+    stats = EmbedStats(chunks=len(chunks), hits=len(chunks) - len(missing), misses=len(missing),
+                       seconds=time.perf_counter() - started)
+    return vectors, stats
+
+
+def embed_text(text: str, embedder: Optional[Embedder] = None,
+               store: Optional[EmbeddingStore] = None) -> Tuple[List[str], np.ndarray, EmbedStats]:
+    chunks = list(chunk_text(text))
+    vectors, stats = embed_chunks(chunks, embedder, store)
+    return chunks, vectors, stats
@@ -0,0 +1,183 @@
+# app/services/genre.py
+
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..config import settings
+
+try:  # C 구현(pyahocorasick)이 있으면 사용, 없으면 아래 순수 파이썬 오토마톤
+    import ahocorasick  # type: ignore
+except ImportError:
+    ahocorasick = None
+
+# pyahocorasick이 없을 때 어휘가 이만큼 이하면 순수 파이썬 오토마톤 대신 정규식(C로 도는 re)으로 센다.
+# 글자마다 파이썬 루프를 도는 오토마톤은 어휘 수와 무관하게 느리고, 정규식은 어휘가 많아질수록 느려진다
+REGEX_MAX_TERMS = 256
+
+
+def load_lexicons(directory: Path) -> Dict[str, List[str]]:
+    """
+    <장르명>.txt 파일들에서 장르별 어휘를 읽는다 (한 줄에 하나, '#' 주석/빈 줄 무시).
+    소문자로 맞추고 중복은 뺀다. 장르 순서는 파일 이름순.
+    """
+    lexicons: Dict[str, List[str]] = {}
+    for path in sorted(Path(directory).glob("*.txt")):
+        terms = []
+        for line in path.read_text(encoding="utf-8-sig").splitlines():
+            term = line.strip().lower()
+            if term and not term.startswith("#"):
+                terms.append(term)
+        lexicons[path.stem] = list(dict.fromkeys(terms))
+    return lexicons
+
+
+class GenreMatcher:
+    """
+    장르 어휘 전체를 하나로 묶어, 본문을 한 번만 훑으면서 장르별 등장 횟수(겹치는 어휘도 모두)를 센다.
+    - pyahocorasick이 있으면 C 오토마톤 (훑는 비용이 글자 수에만 비례하고 어휘 수와는 무관)
+    - 없고 어휘가 REGEX_MAX_TERMS개 이하면 정규식 하나 (기본 어휘 크기에서는 이쪽이 훨씬 빠름)
+    - 그보다 많으면 순수 파이썬 Aho-Corasick 오토마톤
+    """
+
+    def __init__(self, lexicons: Dict[str, Sequence[str]]) -> None:
+        self.genres: Tuple[str, ...] = tuple(lexicons)
+        owners: Dict[str, List[int]] = {}
+        for gi, terms in enumerate(lexicons.values()):
+            for t in terms:
+                if t and gi not in owners.setdefault(t, []):
+                    owners[t].append(gi)
+        self.n_terms = len(owners)
+        self.max_len = max(map(len, owners), default=0)
+
+        digest = hashlib.sha1()
+        for g, terms in lexicons.items():
+            digest.update(("\x00".join([g, *sorted(terms)]) + "\x01").encode("utf-8"))
+        self.fingerprint = digest.hexdigest()
+
+        self._auto = self._regex = None
+        if ahocorasick is not None and owners:
+            self.impl = "pyahocorasick"
+            self._auto = ahocorasick.Automaton()
+            for t, gs in owners.items():
+                self._auto.add_word(t, tuple(gs))
+            self._auto.make_automaton()
+        elif owners and len(owners) <= REGEX_MAX_TERMS:
+            self.impl = "regex"
+            self._build_regex(owners)
+        else:
+            self.impl = "python"
+            self._build(owners)
+
+    def _build_regex(self, owners: Dict[str, List[int]]) -> None:
+        # 긴 어휘를 앞에 두면 한 위치에서 처음 맞는 대안이 그 위치의 가장 긴 어휘. 같은 위치에서 맞는 더 짧은 어휘는
+        # 그 어휘의 앞부분이므로, 어휘마다 (끝 오프셋, 장르들) 목록에 앞부분 어휘까지 넣어 둔다
+        terms = sorted(owners, key=lambda t: (-len(t), t))
+        self._regex = re.compile("|".join(map(re.escape, terms)))
+        self._chain: Dict[str, Tuple[Tuple[int, Tuple[int, ...]], ...]] = {
+            t: tuple((k - 1, tuple(owners[t[:k]])) for k in range(1, len(t) + 1) if t[:k] in owners)
+            for t in terms
+        }
+
+    def _build(self, owners: Dict[str, List[int]]) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Tuple[int, ...]] = [()]
+        for t, gs in owners.items():
+            s = 0
+            for ch in t:
+                nxt = goto[s].get(ch)
+                if nxt is None:
+                    nxt = goto[s][ch] = len(goto)
+                    goto.append({})
+                    out.append(())
+                s = nxt
+            out[s] = tuple(gs)
+
+        # 실패 링크 (BFS), 출력은 실패 링크 쪽 출력까지 합쳐 둔다
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            s = queue.popleft()
+            for ch, nxt in goto[s].items():
+                queue.append(nxt)
+                f = fail[s]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+        self._goto, self._fail, self._out = goto, fail, out
+        self._alphabet = frozenset(ch for g in goto for ch in g)
+
+    def count(self, text: str, start: int = 0) -> List[int]:
+        """
+        장르별 등장 횟수 (self.genres 순서). text는 이미 소문자여야 한다.
+        start 이전에서 끝나는 어휘는 세지 않는다 → 앞 조각 끝부분을 붙여 넘겨도 중복 없이 셀 수 있다.
+        """
+        counts = [0] * len(self.genres)
+        if self._auto is not None:
+            for end, gs in self._auto.iter(text):
+                if end >= start:
+                    for g in gs:
+                        counts[g] += 1
+            return counts
+        if self._regex is not None:
+            # 찾은 위치 바로 다음부터 다시 찾아서 겹치는 어휘도 빠짐없이 (시작 위치마다 한 번)
+            search, chain = self._regex.search, self._chain
+            pos = max(0, start - self.max_len + 1)
+            while True:
+                m = search(text, pos)
+                if m is None:
+                    return counts
+                pos = m.start()
+                for off, gs in chain[m.group()]:
+                    if pos + off >= start:
+                        for g in gs:
+                            counts[g] += 1
+                pos += 1
+        if not self.n_terms:
+            return counts
+
+        goto, fail, out, alphabet = self._goto, self._fail, self._out, self._alphabet
+        s = 0
+        for i, ch in enumerate(text):
+            if ch not in alphabet:
+                s = 0
+                continue
+            row = goto[s]
+            nxt = row.get(ch)
+            if nxt is None:
+                t = fail[s]
+                while t and ch not in goto[t]:
+                    t = fail[t]
+                # 찾은 전이를 기억해 두면 같은 (상태, 글자)는 다음부터 dict 조회 한 번
+                nxt = row[ch] = goto[t].get(ch, 0)
+            s = nxt
+            hits = out[s]
+            if hits and i >= start:
+                for g in hits:
+                    counts[g] += 1
+        return counts
+
+    def counts_dict(self, text: str) -> Dict[str, int]:
+        return {g: n for g, n in zip(self.genres, self.count(text.lower())) if n}
+
+
+def genre_probabilities(hits: Dict[str, int], genres: Iterable[str]) -> Dict[str, float]:
+    """장르별 등장 횟수 → 비율 (어휘가 하나도 없으면 모두 0)"""
+    total = sum(hits.values())
+    return {g: (hits.get(g, 0) / total if total else 0.0) for g in genres}
+
+
+_matcher: Optional[GenreMatcher] = None
+
+
+def get_genre_matcher() -> GenreMatcher:
+    """settings.genre_lexicon_path의 어휘로 만든 오토마톤 (프로세스마다 한 번만 만든다)"""
+    global _matcher
+    if _matcher is None:
+        _matcher = GenreMatcher(load_lexicons(settings.genre_lexicon_path))
+    return _matcher
@@ -0,0 +1,190 @@
+# app/services/incremental.py
+
+from __future__ import annotations
+
+import hashlib
+import re
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..config import settings
+from .analysis import PIPELINE, TextStats, analyzer_version, count_genres
+from .cache import ResultCache
+
+# 화/장 구분선: "제 12화", "12화", "Chapter 3", "## ..." 로 시작하는 줄
+# ('^' 대신 '\n'으로 시작해야 정규식 엔진이 줄바꿈 위치로 바로 건너뛰며 찾는다)
+CHAPTER_MARK = re.compile(r"\n[ \t]*(?:제\s*\d+\s*[화장편]|\d+\s*화|chapter\s*\d+|#{1,3}[ \t])", re.I)
+BLANK_LINE = re.compile(r"\n[ \t\r]*\n")
+
+
+segment_cache = ResultCache(
+    max_items=settings.segment_cache_max_items,
+    ttl_seconds=settings.segment_cache_ttl_seconds,
+    disk_dir=settings.segment_cache_path if settings.persist_segment_cache else None,
+    max_disk_items=settings.segment_cache_max_disk_items,
+)
+
+
+def split_segments(text: str, min_chars: int, max_chars: int) -> Iterator[str]:
+    """
+    원고를 줄 경계에서 구간으로 나눈다. 이어 붙이면 원문과 같다.
+    - 화/장 구분선 앞에서는 항상 자름
+    - 그 사이는 min_chars 이후 처음 나오는 빈 줄에서 자름 (내용 기준 경계라서
+      앞부분을 고쳐도 뒤쪽 구간 경계가 밀리지 않음)
+    - 빈 줄 없이 max_chars를 넘으면 그 뒤 첫 줄바꿈에서 자름
+    """
+    ends = [m.start() + 1 for m in CHAPTER_MARK.finditer(text)]
+    ends.append(len(text))
+    pos = 0
+    for end in ends:
+        while end - pos > min_chars:
+            m = BLANK_LINE.search(text, pos + min_chars, end)
+            if m and m.end() - pos <= max_chars:
+                cut = m.end()
+            else:
+                nl = text.find("\n", pos + max_chars, end)
+                cut = nl + 1 if nl >= 0 else end
+            yield text[pos:cut]
+            pos = cut
+        if end > pos:
+            yield text[pos:end]
+            pos = end
+
+
+def segment_stats(segment: str) -> TextStats:
+    st = TextStats.from_chunk(segment)
+    st.genre_hits = count_genres(segment)
+    return st
+
+
+def _segment_key(version: str, segment: str) -> str:
+    return f"seg-{version}-{hashlib.sha1(segment.encode('utf-8', 'surrogatepass')).hexdigest()}"
+
+
+# ---------- 구간 묶음 트리 ----------
+# 구간들을 내용 기준으로 묶어 올린 트리. 노드 키가 TREE_FANOUT분의 1 확률로 묶음 끝이 되므로(해시 끝자리) 한 구간을
+# 고쳐도 그 구간에서 뿌리까지의 노드만 키가 바뀐다 → 나머지 노드의 합친 요약은 캐시에서 그대로 쓰고,
+# 다시 합치는 일은 바뀐 구간 수 × 트리 높이(log_16 구간 수)에 비례한다.
+TREE_FANOUT = 16        # 평균 묶음 크기
+TREE_MAX_FANOUT = 64    # 묶음 끝이 안 나와도 이만큼 모이면 자름
+
+
+class _Node:
+    __slots__ = ("key", "text", "children")
+
+    def __init__(self, key: str, text: Optional[str] = None, children: Optional[List["_Node"]] = None) -> None:
+        self.key = key
+        self.text = text            # 잎(구간)일 때 원문
+        self.children = children    # 묶음일 때 자식들 (차례대로)
+
+
+def _build_tree(version: str, segments: List[str]) -> Optional[_Node]:
+    level = [_Node(_segment_key(version, seg), seg) for seg in segments]
+    if not level:
+        return None
+    while len(level) > 1:
+        groups, group = [], []
+        for node in level:
+            group.append(node)
+            if int(node.key[-4:], 16) % TREE_FANOUT == 0 or len(group) == TREE_MAX_FANOUT:
+                groups.append(group)
+                group = []
+        if group:
+            groups.append(group)
+        if len(groups) == len(level):   # 모두 한 개짜리 묶음이면 더 줄지 않으므로 하나로 묶음
+            groups = [level]
+        level = [group[0] if len(group) == 1 else
+                 _Node(f"node-{version}-{hashlib.sha1('|'.join(n.key for n in group).encode()).hexdigest()}",
+                       children=group)
+                 for group in groups]
+    return level[0]
+
+
+def _summary(cache: ResultCache, node: _Node, computed: List[int]) -> Dict[str, Any]:
+    """
+    노드 범위의 요약 {"stats": TextStats.to_dict(), "shingles": ShingleScanner.segment_summary() 모양}.
+    내용만으로 정해지므로 노드 키로 캐시. 새로 훑은 구간 수를 computed[0]에 더함
+    """
+    from .duplicates import ShingleScanner  # duplicates → incremental 순환을 피해서 여기서
+
+    entry = cache.get(node.key)
+    if entry is not None:
+        return entry
+    if node.children is None:
+        entry = {"stats": segment_stats(node.text).to_dict(), "shingles": ShingleScanner.segment_summary(node.text)}
+        computed[0] += 1
+    else:
+        parts = [_summary(cache, child, computed) for child in node.children]
+        stats = TextStats()
+        for part in parts:
+            stats = stats.merge(TextStats.from_dict(part["stats"]))
+        entry = {"stats": stats.to_dict(), "shingles": ShingleScanner.merge_summaries([p["shingles"] for p in parts])}
+    cache.put(node.key, entry)
+    return entry
+
+
+def _dialogue(cache: ResultCache, node: _Node, scanner) -> Optional[Dict[str, Any]]:
+    """
+    노드 범위를 scanner에 적용하고 그 효과를 돌려준다 (인물을 버려서 저장할 수 없으면 None).
+    효과는 앞에서 이어지는 화자 문맥에 기대므로 노드 키 + 문맥 해시로 캐시
+    """
+    from .dialogue import DialogueScanner
+
+    key = f"dlg-{node.key}-{scanner.context()}"
+    effect = cache.get(key)
+    if effect is not None:
+        scanner.apply_segment(effect)
+        return effect
+    if node.children is None:
+        effect = scanner.feed_segment(node.text)
+    else:
+        effects = [_dialogue(cache, child, scanner) for child in node.children]
+        effect = None if None in effects else DialogueScanner.combine_segments(effects)
+    if effect is not None:
+        cache.put(key, effect)
+    return effect
+
+
+def incremental_scan(text: str, cache: ResultCache = segment_cache) -> Tuple[TextStats, Dict[str, int]]:
+    """
+    구간별 통계를 내용 해시로 캐시해 두고, 바뀐 구간만 다시 계산해서 합친다.
+    결과는 scan_text(text)와 같다.
+    """
+    segments = list(split_segments(text, settings.segment_min_chars, settings.segment_max_chars))
+    root = _build_tree(analyzer_version(), segments)
+    computed = [0]
+    total = TextStats() if root is None else TextStats.from_dict(_summary(cache, root, computed)["stats"])
+    return total, {"segments": len(segments), "reused": len(segments) - computed[0], "computed": computed[0]}
+
+
+def incremental_analyze(text: str, timings: Optional[Dict[str, float]] = None,
+                        on_stage: Optional[Callable[[str], None]] = None,
+                        cache: ResultCache = segment_cache) -> Dict[str, Any]:
+    """
+    rule_based_analyze와 같은 결과를 증분 방식으로 만든다 (timings를 주면 파이프라인 단계별 초, 구간 처리는 "segments").
+    on_stage는 rule_based_analyze와 같음 (훑기 단계들은 구간을 다 합친 뒤 함께 알림).
+    구간 묶음 트리(_build_tree)의 노드마다 캐시해 두는 것 (바뀐 구간만 다시 훑고, 그 위 노드들만 다시 합침):
+    - 통계/장르 어휘 횟수(TextStats)와 유사 원고 서명 요약(ShingleScanner.segment_summary): 내용만으로 정해짐
+    - 대사/화자 효과(DialogueScanner.feed_segment): 앞에서 이어지는 화자 문맥에 기대므로 노드 키 + 문맥 해시로.
+      고친 구간 뒤로 문맥이 같아지면 그다음부터는 다시 캐시에서 (새 인물이 생기는 등 문맥이 계속 다르면 그만큼 다시 훑음)
+    """
+    from .dialogue import DialogueScanner
+    from .duplicates import ShingleScanner  # duplicates → incremental 순환을 피해서 여기서
+
+    timings = {} if timings is None else timings
+    t0 = time.perf_counter()
+    root = _build_tree(analyzer_version(),
+                       list(split_segments(text, settings.segment_min_chars, settings.segment_max_chars)))
+    dialogue = DialogueScanner()
+    if root is None:
+        stats, shingles = TextStats(), ShingleScanner().result()
+    else:
+        entry = _summary(cache, root, [0])
+        stats, shingles = TextStats.from_dict(entry["stats"]), ShingleScanner.summary_result(entry["shingles"])
+        _dialogue(cache, root, dialogue)
+    given = {"text_stats": stats, "genre_hits": stats.genre_hits, "dialogue": dialogue.result(), "shingles": shingles}
+    timings["segments"] = timings.get("segments", 0.0) + time.perf_counter() - t0
+    if on_stage is not None:
+        for stage in PIPELINE.plan(given):
+            on_stage(stage.name)
+    return PIPELINE.run(None, ("result",), given, timings, on_stage)["result"]
@@ -0,0 +1,257 @@
+# app/services/jobs.py
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..models.schemas import AnalyzeRunResponse
+from .analysis import PIPELINE
+from .cache import result_cache, cache_key
+from .db import connect, register_schema
+from .duplicates import find_duplicates
+from .manuscripts import get_manuscript
+from .metrics import RequestTimer
+from .report import build_sections
+from .structure import text_path
+from .workers import AnalysisBusy, ExtractionError, analyze_file_timed, gate, run_blocking_reporting, top_level
+
+# 작업 하나가 거치는 단계 (SSE 진행률 단위): 분석 파이프라인 단계(워커가 단계를 끝낼 때마다 알려 옴) + 응답 만들기
+JOB_STEPS = tuple(stage.name for stage in PIPELINE.plan(("result",))) + ("report",)
+
+register_schema("""
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id        TEXT PRIMARY KEY,
+    manuscript_id TEXT NOT NULL,
+    options       TEXT NOT NULL DEFAULT '{}',
+    status        TEXT NOT NULL,            -- queued | running | done | failed
+    progress      TEXT NOT NULL DEFAULT '[]',
+    result        TEXT,
+    error         TEXT,
+    created_at    TEXT NOT NULL,
+    started_at    TEXT,
+    finished_at   TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs(status, created_at);
+""")
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="milliseconds")
+
+
+def _row_to_job(row) -> Dict[str, Any]:
+    job = dict(row)
+    job["options"] = json.loads(job["options"])
+    job["progress"] = json.loads(job["progress"])
+    job["total_steps"] = len(JOB_STEPS)
+    return job
+
+
+class JobRunner:
+    """
+    SQLite jobs 테이블을 원본으로 삼는 분석 작업 큐.
+    - submit: 행을 넣고 바로 job_id 반환 (HTTP 연결을 붙잡지 않음)
+    - worker_count개의 코루틴이 큐에서 꺼내 프로세스 풀에서 분석
+    - 백엔드가 재시작되면 queued/running 상태였던 작업을 다시 큐에 넣는다
+    SQLite 호출은 블로킹이라 코루틴에서는 asyncio.to_thread로 부른다 (get/result는 동기 라우트용).
+    """
+
+    def __init__(self, n_workers: int) -> None:
+        self.n_workers = max(1, n_workers)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._cond: Optional[asyncio.Condition] = None
+        self._version = 0
+
+    # ---------- 수명 주기 ----------
+    async def start(self) -> None:
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._cond = asyncio.Condition()
+        for job_id in await asyncio.to_thread(self._requeue):
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.n_workers)]
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    # ---------- 조회/제출 ----------
+    async def submit(self, manuscript_id: str, options: Dict[str, str]) -> Dict[str, Any]:
+        await self.start()
+        job_id = uuid.uuid4().hex
+        await asyncio.to_thread(self._insert, job_id, manuscript_id, options)
+        self._queue.put_nowait(job_id)
+        return await asyncio.to_thread(self.get, job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    async def events(self, job_id: str, heartbeat: float = 15.0) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        작업 진행 이벤트: ("progress", 단계) … 마지막에 ("done"|"failed", 상태).
+        변화가 없으면 heartbeat초마다 ("ping", {})을 보낸다.
+        """
+        await self.start()
+        sent = 0
+        while True:
+            version = self._version
+            job = await asyncio.to_thread(self.get, job_id)
+            if job is None:
+                return
+            for step in job["progress"][sent:]:
+                sent += 1
+                yield "progress", {"job_id": job_id, "step": step, "completed": sent,
+                                   "total": job["total_steps"]}
+            if job["status"] in ("done", "failed"):
+                yield job["status"], {"job_id": job_id, "status": job["status"], "error": job["error"]}
+                return
+            async with self._cond:
+                try:
+                    await asyncio.wait_for(self._cond.wait_for(lambda: self._version != version), heartbeat)
+                except asyncio.TimeoutError:
+                    yield "ping", {}
+
+    # ---------- 내부 ----------
+    @staticmethod
+    def _requeue() -> List[str]:
+        # 재시작 전에 돌던 작업은 처음부터 다시
+        with connect() as conn:
+            conn.execute("UPDATE jobs SET status = 'queued', progress = '[]' WHERE status = 'running'")
+            rows = conn.execute("SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at").fetchall()
+        return [row["job_id"] for row in rows]
+
+    @staticmethod
+    def _insert(job_id: str, manuscript_id: str, options: Dict[str, str]) -> None:
+        with connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, manuscript_id, options, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, manuscript_id, json.dumps(options, ensure_ascii=False), _now()),
+            )
+
+    @staticmethod
+    def _write(job_id: str, fields: Dict[str, Any]) -> None:
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        with connect() as conn:
+            conn.execute(f"UPDATE jobs SET {cols} WHERE job_id = ?", (*fields.values(), job_id))
+
+    async def _update(self, job_id: str, **fields: Any) -> None:
+        await asyncio.to_thread(self._write, job_id, fields)
+        async with self._cond:
+            self._version += 1
+            self._cond.notify_all()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._update(job_id, status="failed", error=f"{type(e).__name__}: {e}", finished_at=_now())
+
+    async def _run(self, job_id: str) -> None:
+        job = await asyncio.to_thread(self.get, job_id)
+        if job is None or job["status"] != "queued":
+            return
+        started = time.perf_counter()
+        await self._update(job_id, status="running", started_at=_now(), progress="[]")
+
+        info = await asyncio.to_thread(get_manuscript, job["manuscript_id"])
+        if info is None:
+            await self._update(job_id, status="failed", error="원고를 찾을 수 없습니다.", finished_at=_now())
+            return
+
+        options = job["options"]
+        incremental = str(options.get("incremental", "")).lower() in ("1", "true", "yes")
+        name = info["name"]
+        timer = RequestTimer("/analyze/run", name, info["size_bytes"] or 0)
+        key = cache_key(info["content_sha1"], name.rsplit(".", 1)[-1].lower() if "." in name else "")
+        result = result_cache.get(key)
+        timer.fields["cache"] = "miss" if result is None else "hit"
+        progress: List[str] = []
+
+        async def stage_done(stage: str) -> None:
+            progress.append(stage)
+            await self._update(job_id, progress=json.dumps(progress))
+
+        if result is None:
+            try:
+                # 구조 색인과 함께 저장된 추출 텍스트가 있으면 그걸 읽는다 (PDF/DOCX를 다시 추출하지 않음)
+                text = await asyncio.to_thread(text_path, info["content_sha1"])
+                # 저장된 추출 텍스트는 원문과 내용이 달라 content_sha1을 인코딩 캐시 키로 쓰지 않는다
+                source = (("text.txt", str(text), incremental, None) if text is not None
+                          else (name, str(info["path"]), incremental, info["content_sha1"]))
+                t0 = time.perf_counter()
+                result, timings = await self._analyze(source, stage_done)
+            except ExtractionError as e:
+                await self._update(job_id, status="failed", error=f"텍스트 추출 실패: {e}", finished_at=_now())
+                timer.finish(400)
+                return
+            for stage, seconds in timings.items():
+                timer.add(stage, seconds)
+            timer.add("queue", max(0.0, time.perf_counter() - t0 - top_level(timings)))
+            result_cache.put(key, result)
+
+        duplicates = []
+        if settings.near_duplicate_check and result.get("shingles"):
+            with timer.stage("dedup"):
+                duplicates = await asyncio.to_thread(find_duplicates, result["shingles"], info["content_sha1"])
+
+        # 캐시에서 가져왔으면 분석 단계는 한꺼번에 끝난 것으로
+        progress.extend(stage for stage in JOB_STEPS[:-1] if stage not in progress)
+        build_started = time.perf_counter()
+        sections = build_sections(result)
+
+        resp = AnalyzeRunResponse(
+            total_score=result["scores"]["total"],
+            strengths=result["strengths"],
+            improvements=result["improvements"],
+            sections=sections,
+            manuscript_id=job["manuscript_id"],
+            title=info["original_name"] or name,
+            analyzed_at=datetime.now(),
+            processing_ms=int((time.perf_counter() - started) * 1000),
+            processing_breakdown=timer.breakdown_ms(),
+            duplicates=duplicates,
+        )
+        timer.add("build", time.perf_counter() - build_started)
+        with timer.stage("serialize"):
+            body = resp.model_dump_json()
+        progress.append("report")
+        await self._update(job_id, status="done", result=body, progress=json.dumps(progress), finished_at=_now())
+        timer.finish(200)
+
+    @staticmethod
+    async def _analyze(source: Tuple[Any, ...], on_progress) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        # 작업도 요청과 같은 입장 제어(gate)로 워커 자리 하나를 잡는다 (쌓인 작업이 바로 응답할 요청의 풀 자리를 뺏지 않게).
+        # 작업은 기다려도 되므로 자리도 대기열도 차 있으면 retry_after_seconds 쉬었다가 다시 줄을 선다
+        while True:
+            try:
+                async with gate:
+                    return await run_blocking_reporting(analyze_file_timed, *source, on_progress=on_progress)
+            except AnalysisBusy:
+                await asyncio.sleep(settings.retry_after_seconds)
+
+    def result(self, job_id: str) -> Optional[AnalyzeRunResponse]:
+        with connect() as conn:
+            row = conn.execute("SELECT result FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None or row["result"] is None:
+            return None
+        return AnalyzeRunResponse.model_validate_json(row["result"])
+
+
+job_runner = JobRunner(n_workers=settings.worker_count)
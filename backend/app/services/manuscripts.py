@@ -0,0 +1,120 @@
+# app/services/manuscripts.py
+
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from ..config import settings
+from .blobs import REF_SUFFIX, blob_file
+from .db import connect, register_schema
+
+# 저장(persist)된 원고 목록: manuscript_id → 원문 폴더의 참조 파일(<이름>.ref → blob)
+# (예전에 저장한 원고는 stored_name이 원문 폴더의 실제 파일. blobs.migrate_legacy로 옮길 수 있음)
+register_schema("""
+CREATE TABLE IF NOT EXISTS manuscripts (
+    manuscript_id TEXT PRIMARY KEY,
+    content_sha1  TEXT NOT NULL,
+    stored_name   TEXT NOT NULL,
+    original_name TEXT,
+    size_bytes    INTEGER,
+    created_at    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_manuscripts_sha1 ON manuscripts(content_sha1);
+""")
+
+
+def register_manuscript(manuscript_id: str, content_sha1: str, stored_name: str,
+                        original_name: Optional[str], size_bytes: int) -> None:
+    with connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO manuscripts VALUES (?, ?, ?, ?, ?, ?)",
+            (manuscript_id, content_sha1, stored_name, original_name, size_bytes,
+             datetime.now().isoformat(timespec="seconds")),
+        )
+
+
+def manuscript_hashes() -> Dict[str, str]:
+    """manuscript_id → 내용 해시 (리포트 목록을 다시 만들 때 사용)"""
+    with connect() as conn:
+        return {r["manuscript_id"]: r["content_sha1"]
+                for r in conn.execute("SELECT manuscript_id, content_sha1 FROM manuscripts")}
+
+
+def latest_manuscripts(hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """내용 해시 → 그 내용으로 가장 최근에 등록한 원고 행"""
+    out: Dict[str, Dict[str, Any]] = {}
+    with connect() as conn:
+        for sha1 in hashes:
+            row = conn.execute("SELECT * FROM manuscripts WHERE content_sha1 = ? ORDER BY created_at DESC LIMIT 1",
+                               (sha1,)).fetchone()
+            if row is not None:
+                out[sha1] = dict(row)
+    return out
+
+
+def _resolve(info: Dict[str, Any]) -> Optional[Path]:
+    """원고의 실제 내용 파일 (참조 파일이면 blob). 참조나 blob이 없어졌으면 None"""
+    stored = settings.manuscript_path / info["stored_name"]
+    if not stored.exists():
+        return None
+    if info["stored_name"].endswith(REF_SUFFIX):
+        return blob_file(info["content_sha1"])
+    return stored
+
+
+def get_manuscript(manuscript_id: str) -> Optional[Dict[str, Any]]:
+    """
+    등록된 원고 정보 (+ path: 내용 파일, name: 확장자가 붙은 표시 이름).
+    없거나 원문 폴더에서 지워졌으면 None
+    """
+    with connect() as conn:
+        row = conn.execute("SELECT * FROM manuscripts WHERE manuscript_id = ?", (manuscript_id,)).fetchone()
+    if row is None:
+        return None
+    info = dict(row)
+    info["path"] = _resolve(info)
+    name = info["stored_name"]
+    info["name"] = name[:-len(REF_SUFFIX)] if name.endswith(REF_SUFFIX) else name
+    return info if info["path"] is not None else None
+
+
+def stored_manuscripts() -> List[Dict[str, Any]]:
+    """원문이 남아 있는 원고들 (get_manuscript와 같은 모양, 내용 해시마다 하나)"""
+    with connect() as conn:
+        ids = [r["manuscript_id"] for r in conn.execute("SELECT manuscript_id FROM manuscripts ORDER BY created_at DESC")]
+    out: Dict[str, Dict[str, Any]] = {}
+    for info in map(get_manuscript, ids):
+        if info is not None:
+            out.setdefault(info["content_sha1"], info)
+    return list(out.values())
+
+
+# ---------- 저장소 정리 (blobs.collect_garbage / migrate_legacy) ----------
+def live_manuscript_hashes() -> Set[str]:
+    """참조 파일이 원문 폴더에 남아 있는 원고들의 내용 해시"""
+    with connect() as conn:
+        rows = conn.execute("SELECT stored_name, content_sha1 FROM manuscripts WHERE stored_name LIKE ?",
+                            ("%" + REF_SUFFIX,)).fetchall()
+    return {r["content_sha1"] for r in rows if (settings.manuscript_path / r["stored_name"]).exists()}
+
+
+def prune_missing_manuscripts() -> int:
+    """원문 폴더에서 사용자가 지운 원고를 목록에서도 뺀다. 뺀 개수를 돌려준다."""
+    with connect() as conn:
+        rows = conn.execute("SELECT manuscript_id, stored_name FROM manuscripts").fetchall()
+        gone = [(r["manuscript_id"],) for r in rows if not (settings.manuscript_path / r["stored_name"]).exists()]
+        conn.executemany("DELETE FROM manuscripts WHERE manuscript_id = ?", gone)
+    return len(gone)
+
+
+def legacy_manuscripts() -> List[Dict[str, Any]]:
+    with connect() as conn:
+        return [dict(r) for r in conn.execute(
+            "SELECT * FROM manuscripts WHERE stored_name NOT LIKE ?", ("%" + REF_SUFFIX,))]
+
+
+def set_stored_name(manuscript_id: str, stored_name: str) -> None:
+    with connect() as conn:
+        conn.execute("UPDATE manuscripts SET stored_name = ? WHERE manuscript_id = ?", (stored_name, manuscript_id))
@@ -0,0 +1,216 @@
+# app/services/metrics.py
+
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..config import settings
+
+# 요청 단계 (순서대로). queue = 입장 대기 + 워커 프로세스 왕복, dedup = 유사 원고 검색, build = 응답 섹션 구성
+# analyze 안의 분석 파이프라인 단계는 "analyze.<단계>"로 따로 잰다 (analyze에 이미 포함된 내역)
+STAGES = ("read", "hash", "queue", "extract", "analyze", "dedup", "persist", "build", "report", "serialize")
+
+# 히스토그램 경계 (초). 마지막 +Inf는 _count와 같다
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 업로드 크기 구간 (상한 바이트, 라벨)
+_SIZE_BUCKETS = ((100 << 10, "lt_100k"), (1 << 20, "100k_1m"), (10 << 20, "1m_10m"))
+
+
+def size_bucket(n_bytes: int) -> str:
+    for limit, label in _SIZE_BUCKETS:
+        if n_bytes < limit:
+            return label
+    return "ge_10m"
+
+
+class StageHistograms:
+    """
+    (단계, 확장자, 크기 구간)별 소요 시간 히스토그램 + (경로, 상태 코드)별 요청 수.
+    관측 한 번 = 잠금 + 이분 탐색 + 정수 덧셈 몇 개라서 운영 중에 켜 둬도 부담이 없다.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS) -> None:
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str, str], List[float]] = {}  # 칸별 개수..., sum, count
+        self._requests: Dict[Tuple[str, int], int] = {}
+
+    def observe(self, stage: str, ext: str, size: str, seconds: float) -> None:
+        i = bisect_left(self.buckets, seconds)
+        with self._lock:
+            row = self._series.get((stage, ext, size))
+            if row is None:
+                row = self._series[(stage, ext, size)] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                row[i] += 1
+            row[-2] += seconds
+            row[-1] += 1
+
+    def count_request(self, route: str, status: int) -> None:
+        with self._lock:
+            self._requests[(route, status)] = self._requests.get((route, status), 0) + 1
+
+    def snapshot(self) -> Tuple[Dict[Tuple[str, str, str], List[float]], Dict[Tuple[str, int], int]]:
+        with self._lock:
+            return {k: list(v) for k, v in self._series.items()}, dict(self._requests)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+            self._requests.clear()
+
+
+histograms = StageHistograms()
+
+
+# ---------- Prometheus 텍스트 ----------
+def _labels(**kv: object) -> str:
+    parts = []
+    for k, v in kv.items():
+        s = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{k}="{s}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def render_prometheus(gauges: Optional[Dict[str, Tuple[str, float]]] = None) -> str:
+    """
+    Prometheus text exposition format (0.0.4).
+    gauges: {"<메트릭 이름>": (설명, 값)} — 대기열/캐시 상태처럼 호출하는 쪽이 채우는 값
+    """
+    series, requests = histograms.snapshot()
+    name = "plotlight_stage_duration_seconds"
+    lines = [f"# HELP {name} Time spent in each request stage.", f"# TYPE {name} histogram"]
+    for (stage, ext, size), row in sorted(series.items()):
+        cumulative = 0
+        for le, n in zip(histograms.buckets, row):
+            cumulative += n
+            lines.append(f"{name}_bucket{_labels(stage=stage, ext=ext, size=size, le=le)} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(stage=stage, ext=ext, size=size, le='+Inf')} {row[-1]}")
+        lines.append(f"{name}_sum{_labels(stage=stage, ext=ext, size=size)} {row[-2]}")
+        lines.append(f"{name}_count{_labels(stage=stage, ext=ext, size=size)} {row[-1]}")
+
+    name = "plotlight_requests_total"
+    lines += [f"# HELP {name} Instrumented requests by route and status.", f"# TYPE {name} counter"]
+    for (route, status), n in sorted(requests.items()):
+        lines.append(f"{name}{_labels(route=route, status=status)} {n}")
+
+    for metric, (help_, value) in (gauges or {}).items():
+        lines += [f"# HELP {metric} {help_}", f"# TYPE {metric} gauge", f"{metric} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+# ---------- 요청별 타이밍 로그 ----------
+# 파일 쓰기는 QueueListener 스레드가 하므로 요청 경로에서는 큐에 넣기만 한다
+_timing_logger: Optional[logging.Logger] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_logger_lock = threading.Lock()
+
+
+def _get_timing_logger() -> logging.Logger:
+    global _timing_logger, _listener
+    if _timing_logger is None:
+        with _logger_lock:
+            if _timing_logger is None:
+                logger = logging.getLogger("plotlight.timing")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                settings.log_path.mkdir(parents=True, exist_ok=True)
+                handler = logging.FileHandler(settings.log_abs_file, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                q: queue.SimpleQueue = queue.SimpleQueue()
+                logger.addHandler(logging.handlers.QueueHandler(q))
+                _listener = logging.handlers.QueueListener(q, handler)
+                _listener.start()
+                _timing_logger = logger
+    return _timing_logger
+
+
+def shutdown_metrics() -> None:
+    """타이밍 로그 큐를 비우고 파일을 닫는다 (앱 종료 시)"""
+    global _timing_logger, _listener
+    with _logger_lock:
+        if _listener is not None:
+            _listener.stop()
+            for h in _listener.handlers:
+                h.close()
+            _listener = None
+        if _timing_logger is not None:
+            _timing_logger.handlers.clear()
+            _timing_logger = None
+
+
+class RequestTimer:
+    """
+    요청 하나의 단계별 시간을 모은다.
+        timer = RequestTimer("/files/analyze/quick", filename)
+        with timer.stage("read"): ...
+        timer.finish(200)  → 히스토그램에 반영 + 타이밍 로그 한 줄(JSON)
+    같은 단계를 여러 번 재면 더해진다.
+    """
+
+    __slots__ = ("route", "ext", "size_bytes", "stages", "fields", "started", "_done")
+
+    def __init__(self, route: str, filename: str = "", size_bytes: int = 0) -> None:
+        self.route = route
+        self.ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+        self.size_bytes = size_bytes
+        self.stages: Dict[str, float] = {}
+        self.fields: Dict[str, object] = {}
+        self.started = time.perf_counter()
+        self._done = False
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def breakdown_ms(self) -> Dict[str, float]:
+        """지금까지 잰 단계별 ms (STAGES 순서, 내역 "<단계>.x"는 그 단계 바로 뒤, 나머지는 맨 뒤에 잰 순서대로)"""
+        order = []
+        for stage in STAGES:
+            if stage in self.stages:
+                order.append(stage)
+            order += [k for k in self.stages if k.startswith(f"{stage}.")]
+        order += [k for k in self.stages if k not in order]
+        return {k: round(self.stages[k] * 1000, 2) for k in order}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def finish(self, status: int = 200) -> None:
+        if self._done or not settings.enable_metrics:
+            return
+        self._done = True
+        total = time.perf_counter() - self.started
+        size = size_bucket(self.size_bytes)
+        for stage, seconds in self.stages.items():
+            histograms.observe(stage, self.ext, size, seconds)
+        histograms.observe("total", self.ext, size, total)
+        histograms.count_request(self.route, status)
+        if settings.timing_log:
+            line = {
+                "ts": datetime.now().isoformat(timespec="milliseconds"),
+                "event": "timing",
+                "route": self.route,
+                "status": status,
+                "ext": self.ext,
+                "size_bytes": self.size_bytes,
+                "size_bucket": size,
+                "total_ms": round(total * 1000, 2),
+                "stages_ms": self.breakdown_ms(),
+                **self.fields,
+            }
+            _get_timing_logger().info(json.dumps(line, ensure_ascii=False))
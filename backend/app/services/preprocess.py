@@ -1,29 +1,302 @@
+import asyncio
+import codecs
+import hashlib
+import importlib
 import io
-from typing import Optional
-try:
-    from pypdf import PdfReader
-except ImportError:
-    PdfReader = None
-try:
-    from docx import Document
-except ImportError:
-    Document = None
-import chardet
+import multiprocessing
+import multiprocessing.util
+import os
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, BinaryIO, Iterator, List, Optional, Union
 
-async def extract_text_from_upload(filename: str, data: bytes) -> str:
+from ..config import settings
+from .cache import ResultCache
+
+
+# ---------- 무거운 파서는 처음 쓸 때 import ----------
+# pypdf/chardet/lxml import만 수십~백 ms라서 서버 시작 경로에서 뺀다 (warmup.py가 시작 직후 미리 불러 둠)
+_lazy_modules: dict = {}
+
+
+def _optional(module: str) -> Any:
+    """module을 import해서 돌려준다. 설치되지 않았으면 None (결과는 프로세스마다 한 번만 구함)"""
+    if module not in _lazy_modules:
+        try:
+            _lazy_modules[module] = importlib.import_module(module)
+        except ImportError:
+            _lazy_modules[module] = None
+    return _lazy_modules[module]
+
+
+def _pdf_reader(source) -> Any:
+    pypdf = _optional("pypdf")
+    if pypdf is None:
+        raise RuntimeError("pypdf 미설치")
+    return pypdf.PdfReader(source)
+
+
+def preload_parsers() -> None:
+    """추출에 쓰는 선택 의존성을 미리 import (없는 것은 건너뜀)"""
+    for module in ("pypdf", "chardet", "lxml.etree"):
+        _optional(module)
+
+
+# ---------- 텍스트 인코딩 판별 ----------
+# BOM → UTF-8(엄격) → CP949(엄격 + 한글 비율 확인) → 앞부분 표본으로 chardet 순서로 시도한다.
+# 판별 결과는 내용 해시로 기억해 두므로 같은 파일을 다시 올리면 판별을 건너뛴다.
+DETECT_SAMPLE_BYTES = 64 * 1024
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"), (codecs.BOM_UTF32_BE, "utf-32"),  # UTF-16 LE BOM보다 먼저 확인
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+encoding_cache = ResultCache(max_items=4096, ttl_seconds=0)
+
+
+def _looks_korean(text: str) -> bool:
+    # CP949는 대부분의 바이트 쌍을 받아들이므로, 풀린 결과의 비ASCII 글자가 주로 한글인지 확인
+    sample = text[:DETECT_SAMPLE_BYTES]
+    non_ascii = sum(1 for ch in sample if ch >= "\x80")
+    hangul = sum(1 for ch in sample if "가" <= ch <= "힣" or "ㄱ" <= ch <= "ㆎ")
+    return non_ascii == 0 or hangul >= non_ascii * 0.5
+
+
+def _detect(data: bytes) -> "tuple[str, Optional[str]]":
+    """(인코딩, 엄격 디코딩에 성공했다면 그 문자열)"""
+    for bom, enc in _BOMS:
+        if data.startswith(bom):
+            return enc, None
+    try:
+        return "utf-8", data.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+    try:
+        text = data.decode("cp949")  # EUC-KR의 상위 집합
+        if _looks_korean(text):
+            return "cp949", text
+    except UnicodeDecodeError:
+        pass
+    chardet = _optional("chardet")
+    if chardet is None:
+        return "utf-8", None
+    return chardet.detect(data[:DETECT_SAMPLE_BYTES]).get("encoding") or "utf-8", None
+
+
+def detect_encoding(data: bytes, content_sha1: Optional[str] = None) -> str:
+    key = f"enc-{content_sha1 or hashlib.sha1(data).hexdigest()}"
+    enc = encoding_cache.get(key)
+    if enc is None:
+        enc = _detect(data)[0]
+        encoding_cache.put(key, enc)
+    return enc
+
+
+def decode_text(data: bytes, content_sha1: Optional[str] = None) -> str:
+    """바이트 → 문자열. 판별 과정에서 이미 디코딩한 결과가 있으면 그대로 쓴다."""
+    key = f"enc-{content_sha1 or hashlib.sha1(data).hexdigest()}"
+    enc = encoding_cache.get(key)
+    if enc is not None:
+        return data.decode(enc, errors="replace")
+    enc, text = _detect(data)
+    encoding_cache.put(key, enc)
+    return text if text is not None else data.decode(enc, errors="replace")
+
+
+def extract_text(filename: str, data: bytes, content_sha1: Optional[str] = None) -> str:
+    """
+    업로드 바이트에서 텍스트를 뽑는다. (CPU/블로킹 작업이므로 워커 프로세스에서 호출)
+    content_sha1: data의 SHA-1을 이미 알면 (라우트가 업로드를 받으며 계산) 인코딩 캐시 키로 그대로 쓴다.
+    """
     ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
     if ext in {"txt", "md", ""}:
-        enc = chardet.detect(data).get("encoding") or "utf-8"
-        return data.decode(enc, errors="replace")
+        return decode_text(data, content_sha1)
     if ext == "pdf":
-        if not PdfReader:
-            raise RuntimeError("pypdf 미설치")
-        reader = PdfReader(io.BytesIO(data))
-        return "\n".join((p.extract_text() or "") for p in reader.pages)
+        reader = _pdf_reader(io.BytesIO(data))
+        return "\n".join(_page_texts(reader, 0, len(reader.pages)))
     if ext == "docx":
-        if not Document:
-            raise RuntimeError("python-docx 미설치")
-        buf = io.BytesIO(data)
-        doc = Document(buf)
-        return "\n".join(p.text for p in doc.paragraphs)
+        return "".join(iter_docx_text(io.BytesIO(data)))
     raise ValueError(f"미지원 확장자: .{ext}")
+
+
+# ---------- PDF: 페이지 범위 병렬 추출 ----------
+def _page_texts(reader, start: int, stop: int) -> List[str]:
+    return [(reader.pages[i].extract_text() or "") for i in range(start, stop)]
+
+
+def _pdf_page_range(path: str, start: int, stop: int) -> List[str]:
+    """(페이지 추출 프로세스에서 실행) 파일을 직접 열어 [start, stop) 페이지 텍스트만 뽑는다."""
+    return _page_texts(_pdf_reader(path), start, stop)
+
+
+_page_pool: Optional[ProcessPoolExecutor] = None
+
+
+def page_workers() -> int:
+    """
+    분석 하나가 쓰는 페이지 추출 프로세스 수. 분석 워커 worker_count개가 동시에 PDF를 뽑아도
+    합이 CPU 수를 넘지 않도록 CPU 수 // worker_count (pdf_extract_workers로 직접 정할 수 있음).
+    """
+    if settings.pdf_extract_workers:
+        return settings.pdf_extract_workers
+    return max(1, (os.cpu_count() or 1) // max(1, settings.worker_count))
+
+
+def _get_page_pool(workers: int) -> ProcessPoolExecutor:
+    # 프로세스(분석 워커)마다 하나만 만들어 재사용
+    global _page_pool
+    if _page_pool is None:
+        # 본 프로세스(worker_count <= 0이라 스레드에서 분석)는 스레드가 여럿이라 fork하면 잠금을 쥔 채 멈출 수 있음 → spawn
+        in_worker = multiprocessing.parent_process() is not None
+        context = None if in_worker else multiprocessing.get_context("spawn")
+        _page_pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        # 분석 워커는 atexit 없이 끝나므로(os._exit) multiprocessing 종료 처리로 닫는다 (본 프로세스도 같이 처리됨)
+        multiprocessing.util.Finalize(None, shutdown_page_pool, exitpriority=10)
+    return _page_pool
+
+
+def shutdown_page_pool() -> None:
+    global _page_pool
+    if _page_pool is not None:
+        _page_pool.shutdown(wait=False, cancel_futures=True)
+        _page_pool = None
+
+
+def iter_pdf_text(path: str, workers: Optional[int] = None, pages_per_task: Optional[int] = None) -> Iterator[str]:
+    """
+    PDF 텍스트를 페이지 순서대로 조각 스트림으로 내보낸다 (이어 붙이면 extract_text 결과와 같음).
+    - 페이지를 pages_per_task개씩 묶어 여러 프로세스가 동시에 추출하고, 앞 범위부터 끝나는 대로 내보낸다
+    - 동시에 진행 중인 범위는 workers * 2개까지만 → 원고 전체 텍스트를 메모리에 들고 있지 않음
+    - workers(기본 page_workers())가 1 이하면 추출 프로세스 없이 이 프로세스에서 순차 추출
+    """
+    workers = workers if workers is not None else page_workers()
+    per_task = max(1, pages_per_task or settings.pdf_pages_per_task)
+    reader = _pdf_reader(path)
+    n_pages = len(reader.pages)
+
+    def emit(texts: List[str], first: bool) -> Iterator[str]:
+        for i, t in enumerate(texts):
+            if i or not first:
+                yield "\n"
+            yield t
+
+    if workers <= 1 or n_pages <= per_task:
+        for start in range(0, n_pages, per_task):
+            yield from emit(_page_texts(reader, start, min(start + per_task, n_pages)), start == 0)
+        return
+
+    del reader  # 나머지는 추출 프로세스가 각자 연다
+    pool = _get_page_pool(workers)
+    ranges = deque((s, min(s + per_task, n_pages)) for s in range(0, n_pages, per_task))
+    pending = deque()
+    try:
+        while ranges or pending:
+            while ranges and len(pending) < workers * 2:
+                start, stop = ranges.popleft()
+                pending.append((start, pool.submit(_pdf_page_range, path, start, stop)))
+            start, fut = pending.popleft()
+            yield from emit(fut.result(), start == 0)
+    finally:
+        for _, fut in pending:
+            fut.cancel()
+
+
+# ---------- DOCX: document.xml 스트리밍 파싱 ----------
+# python-docx의 Document(...).paragraphs[i].text와 같은 규칙:
+# - 본문(w:body) 바로 아래 w:p만 문단으로 본다 (표 안 문단 등은 제외)
+# - 문단 텍스트 = 바로 아래 w:r, w:hyperlink/w:r 의 내용 (w:ins 등 다른 래퍼 안의 run은 제외)
+# - run 내용: w:t 텍스트, w:tab/w:ptab → \t, w:cr → \n, w:br → \n(줄바꿈일 때만), w:noBreakHyphen → -
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_REL_OFFICE_DOC = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_RUN_TEXT = {_W + "tab": "\t", _W + "ptab": "\t", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+
+
+def _docx_main_part(zf: zipfile.ZipFile) -> str:
+    # 보통 word/document.xml이지만 원칙적으로는 _rels/.rels의 officeDocument 관계가 가리키는 파일
+    try:
+        rels = ET.fromstring(zf.read("_rels/.rels"))
+    except KeyError:
+        return "word/document.xml"
+    for rel in rels:
+        if rel.get("Type") == _REL_OFFICE_DOC and rel.get("TargetMode") != "External":
+            return posixpath.normpath(rel.get("Target", "")).lstrip("/")
+    return "word/document.xml"
+
+
+def _run_text(r: ET.Element) -> str:
+    out = []
+    for c in r:
+        if c.tag == _W + "t":
+            out.append(c.text or "")
+        elif c.tag == _W + "br":
+            if c.get(_W + "type", "textWrapping") == "textWrapping":
+                out.append("\n")
+        else:
+            out.append(_RUN_TEXT.get(c.tag, ""))
+    return "".join(out)
+
+
+def _paragraph_text(p: ET.Element) -> str:
+    out = []
+    for c in p:
+        if c.tag == _W + "r":
+            out.append(_run_text(c))
+        elif c.tag == _W + "hyperlink":
+            out.extend(_run_text(r) for r in c if r.tag == _W + "r")
+    return "".join(out)
+
+
+def _iter_body_paragraphs_lxml(f: BinaryIO, lxml_etree: Any) -> Iterator[str]:
+    # w:p가 끝날 때만 이벤트를 받는다 (태그 거르기는 lxml 안에서)
+    for _, el in lxml_etree.iterparse(f, events=("end",), tag=_W + "p", resolve_entities=False):
+        parent = el.getparent()
+        if parent is None or parent.tag != _W + "body":
+            continue
+        yield _paragraph_text(el)
+        # 이미 처리한 본문 요소(앞 문단/표)는 지워서 메모리를 문단 하나 크기로 유지
+        el.clear()
+        while el.getprevious() is not None:
+            del parent[0]
+
+
+def _iter_body_paragraphs_et(f: BinaryIO) -> Iterator[str]:
+    # 표준 라이브러리는 태그로 거를 수 없어서 start/end로 깊이를 센다
+    depth = 0
+    body = None
+    for event, el in ET.iterparse(f, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 2 and el.tag == _W + "body":
+                body = el
+            continue
+        depth -= 1
+        if depth == 2 and body is not None:
+            # 본문 바로 아래 요소가 끝날 때마다 처리하고 비운다 → 메모리는 문단/표 하나 크기
+            if el.tag == _W + "p":
+                yield _paragraph_text(el)
+            body.clear()
+
+
+def iter_docx_paragraphs(source: Union[str, BinaryIO]) -> Iterator[str]:
+    """DOCX(zip)의 본문 XML을 압축을 풀면서 파싱해 문단 텍스트를 하나씩 내보낸다 (DOM 전체를 만들지 않음)."""
+    lxml_etree = _optional("lxml.etree")  # python-docx와 함께 설치됨. 없으면 표준 라이브러리 파서 사용
+    with zipfile.ZipFile(source) as zf, zf.open(_docx_main_part(zf)) as f:
+        yield from (_iter_body_paragraphs_lxml(f, lxml_etree) if lxml_etree is not None
+                    else _iter_body_paragraphs_et(f))
+
+
+def iter_docx_text(source: Union[str, BinaryIO]) -> Iterator[str]:
+    """문단 사이에 줄바꿈을 넣어 내보낸다 (이어 붙이면 extract_text 결과와 같음)."""
+    for i, para in enumerate(iter_docx_paragraphs(source)):
+        if i:
+            yield "\n"
+        yield para
+
+
+async def extract_text_from_upload(filename: str, data: bytes) -> str:
+    # 이벤트 루프를 막지 않도록 스레드에서 실행 (라우트는 workers.run_analysis로 프로세스 풀을 사용)
+    return await asyncio.to_thread(extract_text, filename, data)
@@ -0,0 +1,332 @@
+# app/services/report.py
+
+from __future__ import annotations
+
+import base64
+import gzip
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from ..config import settings
+from ..models.schemas import AnalyzeRunResponse, SectionScore, Metric, EvidenceItem
+from .analysis import PIPELINE
+from .baselines import get_baselines, result_genre
+from .db import connect, register_schema
+from .dialogue import LEVEL_NAMES
+from .manuscripts import manuscript_hashes
+
+# 저장된 리포트 목록 (리포트 폴더의 파일을 매번 읽지 않고 목록/검색)
+register_schema("""
+CREATE TABLE IF NOT EXISTS reports (
+    report_id       TEXT PRIMARY KEY,
+    manuscript_id   TEXT,
+    title           TEXT,
+    content_sha1    TEXT,
+    total_score     REAL NOT NULL,
+    genre_score     REAL,
+    style_score     REAL,
+    character_score REAL,
+    market_score    REAL,
+    causality_score REAL,
+    analyzed_at     TEXT NOT NULL,
+    file_name       TEXT NOT NULL,
+    size_bytes      INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_reports_date ON reports(analyzed_at, report_id);
+CREATE INDEX IF NOT EXISTS ix_reports_score ON reports(total_score, report_id);
+CREATE INDEX IF NOT EXISTS ix_reports_sha1 ON reports(content_sha1);
+""")
+
+REPORT_SORTS = {"date": "analyzed_at", "score": "total_score"}
+
+
+def _speech_snippet(c: Dict[str, Any]) -> str:
+    """인물 하나의 말투 요약: '레온: 해체·해라체 80%, 해요체 20% / 끝말 다·해·어'"""
+    levels = sorted(c["speech_levels"].items(), key=lambda kv: -kv[1])[:2]
+    text = f"{c['name']}: " + ", ".join(f"{LEVEL_NAMES[k]} {v:.0%}" for k, v in levels if v)
+    if c["top_endings"]:
+        text += f" / 끝말 {'·'.join(c['top_endings'][:3])}"
+    return text
+
+
+# 섹션마다 있어야 하는 분석 중간 결과 (analysis.PIPELINE의 산출물 이름)
+# 시장성/개연성은 나중에 AI 연동이 붙을 자리라 최종 결과(모든 단계)가 나온 뒤에 보낸다.
+SECTION_INPUTS: Dict[str, Tuple[str, ...]] = {
+    "style": ("stats", "style"),
+    "character": ("stats", "dialogue", "character"),
+    "genre": ("stats", "genre"),
+    "market": ("result",),
+    "causality": ("result",),
+}
+# 점진 분석(/files/analyze/stream)에서 섹션을 보내려면 끝나 있어야 하는 훑기 단계 산출물 (workers.ANALYSIS_PARTS)
+SECTION_NEEDS: Dict[str, FrozenSet[str]] = {
+    label: frozenset(PIPELINE.scan_outputs(inputs)) for label, inputs in SECTION_INPUTS.items()
+}
+
+
+def build_sections(result: Dict[str, Any], labels: Optional[Iterable[str]] = None) -> List[SectionScore]:
+    """
+    rule_based_analyze 결과 → 응답용 섹션 (하드코딩/규칙 기반, 기준 분포가 있으면 z-score/백분위 포함)
+    labels를 주면 그 섹션만 돌려준다.
+    """
+    store = get_baselines()
+    base_genre = store.pick_genre(result_genre(result)) if store is not None else None
+
+    def metric(name: str, key: str, value: float, **kw: Any) -> Metric:
+        if store is not None:
+            kw.update(store.annotate(base_genre, key, value))
+        return Metric(name=name, value=value, **kw)
+
+    genre = SectionScore(
+        label="genre",
+        score=result["scores"]["genre"],
+        metrics=[
+            metric("문장 수", "num_sentences", result["stats"]["num_sentences"]),
+            # Metric(name="추정 장르", value=None, note=result.get("genre_label")),
+            *(Metric(name=f"장르 확률-{g}", value=p, note=f"어휘 {result['genre_hits'].get(g, 0)}회")
+              for g, p in result["genre_probs"].items()),
+        ],
+        evidences=[
+            EvidenceItem(source_id="rule", snippet=f"장르 어휘 빈도 기반 추정: {result['genre_label']}", score=0.7)
+        ],
+    )
+
+    style = SectionScore(
+        label="style",
+        score=result["scores"]["style"],
+        metrics=[
+            metric("평균 문장 길이", "avg_sentence_words", result["stats"]["avg_sentence_words"], unit="어절"),
+            metric("평균 문장 글자 수", "avg_sentence_len", result["stats"]["avg_sentence_len"], unit="자"),
+            metric("문단 수", "num_paragraphs", result["stats"]["num_paragraphs"]),
+            metric("어휘 다양도", "lexical_diversity", result["stats"]["lexical_diversity"],
+                   note=f"log(어휘 종류)/log(어절 수), 어휘 종류 약 {result['stats']['distinct_words']}개(추정)"),
+        ],
+        evidences=[
+            EvidenceItem(
+                source_id="rule",
+                snippet="문장 길이/문단 수 기반 스타일 점수",
+                score=0.8,
+            ),
+            *([EvidenceItem(source_id="baseline", snippet=f"비교 기준: {base_genre} 코퍼스 원고 {store.count(base_genre)}편",
+                            score=1.0, meta={"genre": base_genre})] if store is not None else []),
+        ],
+    )
+
+    dialogue = result.get("dialogue") or {}
+    distinct = dialogue.get("speech_distinctiveness")
+    character = SectionScore(
+        label="character",
+        score=result["scores"]["character"],
+        metrics=[
+            metric("대사 비율", "quote_ratio", result["stats"]["quote_ratio"]),
+            metric("대사 비중", "dialogue_ratio", dialogue.get("dialogue_ratio", 0), note="대사 글자 수 / 전체 글자 수"),
+            metric("화자 추정 비율", "attributed_ratio", dialogue.get("attributed_ratio", 0)),
+            metric("말하는 인물 수", "num_speakers", dialogue.get("num_speakers", 0)),
+            *([metric("말투 차별성", "speech_distinctiveness", distinct, note="주요 인물 간 존댓말 단계/어미 분포 차이 (0~1)")]
+              if distinct is not None else []),
+            *(Metric(name=f"대사 점유율-{c['name']}", value=c["line_share"], note=f"{c['lines']}줄")
+              for c in dialogue.get("characters", [])[:5]),
+        ],
+        evidences=[
+            EvidenceItem(
+                source_id="rule",
+                snippet="대사 비중과 인물별 말투 차별성을 캐릭터성에 반영",
+                score=0.6,
+            ),
+            *(EvidenceItem(source_id="dialogue", snippet=_speech_snippet(c), score=c["line_share"])
+              for c in dialogue.get("characters", [])[:3] if c["speech_levels"]),
+        ],
+    )
+
+    market = SectionScore(
+        label="market",
+        score=result["scores"]["marketability"],
+        metrics=[],
+        evidences=[
+            EvidenceItem(
+                source_id="rule",
+                snippet="AI 연동 전 임시 시장성 점수",
+                score=0.3,
+            )
+        ],
+    )
+
+    plaus = SectionScore(
+        label="causality",
+        score=result["scores"]["plausibility"],
+        metrics=[],
+        evidences=[
+            EvidenceItem(
+                source_id="rule",
+                snippet="AI 연동 전 임시 개연성 점수",
+                score=0.3,
+            )
+        ],
+    )
+
+    sections = [genre, style, character, market, plaus]
+    if labels is not None:
+        wanted = set(labels)
+        sections = [s for s in sections if s.label in wanted]
+    return sections
+
+
+def build_response(result: Dict[str, Any], manuscript_id: Optional[str], title: Optional[str],
+                   processing_ms: Optional[int],
+                   duplicates: Optional[List[EvidenceItem]] = None,
+                   breakdown: Optional[Dict[str, float]] = None) -> AnalyzeRunResponse:
+    return AnalyzeRunResponse(
+        duplicates=duplicates or [],
+        total_score=result["scores"]["total"],
+        strengths=result["strengths"],
+        improvements=result["improvements"],
+        sections=build_sections(result),
+        manuscript_id=manuscript_id,
+        analyzed_at=datetime.now(),
+        processing_ms=processing_ms,
+        processing_breakdown=breakdown or {},
+        title=title,
+    )
+
+
+def _report_files(report_id: str) -> Tuple[Path, Path]:
+    return settings.report_path / f"{report_id}.json", settings.report_path / f"{report_id}.json.gz"
+
+
+def save_report_json(resp: AnalyzeRunResponse, content_sha1: Optional[str] = None) -> Path:
+    """
+    리포트 폴더에 <manuscript_id>.json으로 저장하고 목록(reports 테이블)에 올린다.
+    settings.compress_reports면 공백 없는 JSON을 gzip으로 압축해 <manuscript_id>.json.gz로 저장.
+    """
+    os.makedirs(settings.report_path, exist_ok=True)
+    report_data = resp.model_dump(mode="json")  # datetime → 문자열
+    plain, packed = _report_files(resp.manuscript_id)
+    if settings.compress_reports:
+        path, stale = packed, plain
+        raw = json.dumps(report_data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(gzip.compress(raw, compresslevel=6, mtime=0))
+    else:
+        path, stale = plain, packed
+        with open(path, "w", encoding="utf-8") as jf:
+            json.dump(report_data, jf, ensure_ascii=False, indent=2)
+    # 같은 id의 다른 형식 파일이 남아 있으면 지운다 (원본은 항상 하나)
+    if stale.exists():
+        stale.unlink()
+    index_report(resp, path, content_sha1)
+    return path
+
+
+def read_report_file(path: Path) -> AnalyzeRunResponse:
+    raw = path.read_bytes()
+    if path.suffix == ".gz":
+        raw = gzip.decompress(raw)
+    return AnalyzeRunResponse.model_validate_json(raw)
+
+
+# ---------- 리포트 목록 ----------
+def index_report(resp: AnalyzeRunResponse, path: Path, content_sha1: Optional[str] = None) -> None:
+    scores = {s.label: s.score for s in resp.sections}
+    with connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (resp.manuscript_id, resp.manuscript_id, resp.title, content_sha1, resp.total_score,
+             scores.get("genre"), scores.get("style"), scores.get("character"),
+             scores.get("market"), scores.get("causality"),
+             resp.analyzed_at.isoformat(timespec="milliseconds"), path.name, path.stat().st_size),
+        )
+
+
+def _row_to_summary(row) -> Dict[str, Any]:
+    d = dict(row)
+    d["scores"] = {k: d.pop(f"{k}_score") for k in ("genre", "style", "character", "market", "causality")}
+    return d
+
+
+def _encode_cursor(value: Any, report_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, report_id]).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[Any, str]:
+    value, report_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    return value, report_id
+
+
+def list_reports(limit: int = 50, cursor: Optional[str] = None, sort: str = "date",
+                 min_score: Optional[float] = None, max_score: Optional[float] = None,
+                 since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 q: Optional[str] = None, content_sha1: Optional[str] = None,
+                 ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    리포트 목록 (최신순 또는 총점순, 내림차순). 키셋 페이지네이션:
+    next_cursor에 마지막 행의 (정렬값, report_id)를 담아 다음 요청은 그 뒤부터 인덱스로 바로 찾는다
+    (OFFSET처럼 앞 페이지를 다시 훑지 않으므로 몇 번째 페이지든 비용이 같다).
+    """
+    col = REPORT_SORTS[sort]
+    where, params = [], []
+    if min_score is not None:
+        where.append("total_score >= ?"); params.append(min_score)
+    if max_score is not None:
+        where.append("total_score <= ?"); params.append(max_score)
+    if since is not None:
+        where.append("analyzed_at >= ?"); params.append(since.isoformat(timespec="milliseconds"))
+    if until is not None:
+        where.append("analyzed_at < ?"); params.append(until.isoformat(timespec="milliseconds"))
+    if content_sha1:
+        where.append("content_sha1 = ?"); params.append(content_sha1)
+    if q:
+        pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        where.append("(title LIKE ? ESCAPE '\\' OR report_id LIKE ? ESCAPE '\\')"); params += [pattern, pattern]
+    if cursor:
+        value, last_id = _decode_cursor(cursor)
+        where.append(f"({col}, report_id) < (?, ?)"); params += [value, last_id]
+
+    sql = "SELECT * FROM reports"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {col} DESC, report_id DESC LIMIT ?"
+    with connect() as conn:
+        rows = conn.execute(sql, (*params, limit + 1)).fetchall()
+
+    items = [_row_to_summary(r) for r in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = _encode_cursor(last[col], last["report_id"])
+    return items, next_cursor
+
+
+def load_report(report_id: str) -> Optional[AnalyzeRunResponse]:
+    with connect() as conn:
+        row = conn.execute("SELECT file_name FROM reports WHERE report_id = ?", (report_id,)).fetchone()
+    candidates = [settings.report_path / row["file_name"]] if row else list(_report_files(report_id))
+    for path in candidates:
+        if path.exists():
+            return read_report_file(path)
+    return None
+
+
+def reindex_reports() -> Dict[str, int]:
+    """리포트 폴더를 한 번 훑어 목록을 다시 만든다 (목록이 생기기 전에 저장된 리포트, 직접 지운 파일 반영)."""
+    indexed = failed = 0
+    seen = set()
+    known = manuscript_hashes()
+    for path in sorted(settings.report_path.glob("*.json*")):
+        if not path.name.endswith((".json", ".json.gz")):
+            continue
+        try:
+            resp = read_report_file(path)
+        except (OSError, ValueError):
+            failed += 1
+            continue
+        index_report(resp, path, known.get(resp.manuscript_id))
+        seen.add(resp.manuscript_id)
+        indexed += 1
+    with connect() as conn:
+        ids = [r["report_id"] for r in conn.execute("SELECT report_id FROM reports")]
+        removed = [(i,) for i in ids if i not in seen]
+        conn.executemany("DELETE FROM reports WHERE report_id = ?", removed)
+    return {"indexed": indexed, "failed": failed, "removed": len(removed)}
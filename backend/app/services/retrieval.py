@@ -0,0 +1,234 @@
+# app/services/retrieval.py
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import settings
+from ..models.schemas import EvidenceItem
+from .embeddings import Embedder, chunk_text, embed_chunks, get_embedder
+from .preprocess import extract_text
+
+
+def _topk(scores: np.ndarray, k: int) -> np.ndarray:
+    """각 행에서 점수가 높은 k개의 열 번호 (내림차순). argpartition으로 전체 정렬을 피한다."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+def _as_2d(q: np.ndarray) -> np.ndarray:
+    return np.asarray(q, dtype=np.float32).reshape(-1, q.shape[-1])
+
+
+# ---------- 정확 검색 ----------
+class ExactIndex:
+    """정규화된 벡터에 대한 내적(=코사인) 전수 검색. 행렬곱 한 번 + top-k."""
+
+    def __init__(self, vectors: np.ndarray, batch_rows: int = 262144) -> None:
+        self.vectors = vectors
+        self.batch_rows = batch_rows
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        q = _as_2d(queries)
+        n = len(self.vectors)
+        if n <= self.batch_rows:
+            scores = q @ np.asarray(self.vectors).T
+            ids = _topk(scores, k)
+            return np.take_along_axis(scores, ids, axis=1), ids
+        # memmap이 큰 경우: 블록 단위로 top-k를 구해 합친다 (메모리 일정)
+        best_s = np.full((len(q), 0), -np.inf, dtype=np.float32)
+        best_i = np.empty((len(q), 0), dtype=np.intp)
+        for start in range(0, n, self.batch_rows):
+            block = np.asarray(self.vectors[start:start + self.batch_rows])
+            s = q @ block.T
+            ids = _topk(s, k)
+            best_s = np.concatenate([best_s, np.take_along_axis(s, ids, axis=1)], axis=1)
+            best_i = np.concatenate([best_i, ids + start], axis=1)
+            keep = _topk(best_s, k)
+            best_s = np.take_along_axis(best_s, keep, axis=1)
+            best_i = np.take_along_axis(best_i, keep, axis=1)
+        return best_s, best_i
+
+
+# ---------- 근사 검색 (IVF) ----------
+class IVFIndex:
+    """
+    IVF(역파일) 근사 검색.
+    - k-means로 nlist개 중심을 잡고, 벡터를 가장 가까운 중심의 목록에 넣는다 (목록 순서대로 정렬해 저장)
+    - 검색 시 질의와 가까운 nprobe개 목록만 훑는다
+    파일: centroids.npy, vectors.npy(목록 순으로 정렬), ids.npy(원래 번호), offsets.npy → np.load(mmap_mode="r")
+    """
+
+    def __init__(self, centroids: np.ndarray, vectors: np.ndarray, ids: np.ndarray, offsets: np.ndarray) -> None:
+        self.centroids = centroids
+        self.vectors = vectors
+        self.ids = ids
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, batch: int = 65536) -> np.ndarray:
+        out = np.empty(len(vectors), dtype=np.int32)
+        for s in range(0, len(vectors), batch):
+            block = np.asarray(vectors[s:s + batch], dtype=np.float32)
+            out[s:s + batch] = np.argmax(block @ centroids.T, axis=1)
+        return out
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, nlist: int = 0, iters: int = 10, seed: int = 0) -> "IVFIndex":
+        n = len(vectors)
+        nlist = nlist or max(1, int(np.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(seed)
+
+        # 구형 k-means (정규화 벡터 → 내적 기준), 학습은 표본으로
+        sample = np.asarray(vectors[np.sort(rng.choice(n, size=min(n, nlist * 64), replace=False))], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iters):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=nlist)
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = (sums / np.maximum(norms, 1e-12)).astype(np.float32)
+
+        assign = cls._assign(vectors, centroids)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=nlist), out=offsets[1:])
+        return cls(centroids, np.asarray(vectors, dtype=np.float32)[order], order.astype(np.int64), offsets)
+
+    def search(self, queries: np.ndarray, k: int, nprobe: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+        q = _as_2d(queries)
+        nprobe = min(nprobe, self.nlist)
+        probes = _topk(q @ self.centroids.T, nprobe)
+        out_s = np.full((len(q), k), -np.inf, dtype=np.float32)
+        out_i = np.full((len(q), k), -1, dtype=np.int64)
+        for qi, lists in enumerate(probes):
+            rows = np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists])
+            if not len(rows):
+                continue
+            s = np.asarray(self.vectors[rows]) @ q[qi]
+            top = _topk(s[None, :], k)[0]
+            out_s[qi, :len(top)] = s[top]
+            out_i[qi, :len(top)] = self.ids[rows[top]]
+        return out_s, out_i
+
+    def save(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ("centroids", "vectors", "ids", "offsets"):
+            np.save(directory / f"{name}.npy", getattr(self, name))
+
+    @classmethod
+    def load(cls, directory: Path) -> "IVFIndex":
+        return cls(*(np.load(directory / f"{name}.npy", mmap_mode="r")
+                     for name in ("centroids", "vectors", "ids", "offsets")))
+
+
+# ---------- 장르/시장 가이드 코퍼스 ----------
+class GuideIndex:
+    """
+    corpus_path의 가이드 문서들을 청크 → 임베딩해서 chroma_path/guide 아래에 저장하고 검색한다.
+    - vectors.npy: 청크 벡터 (N, d), 시작할 때 memmap으로 연다
+    - chunks.jsonl: 청크별 {source_id, snippet}
+    - ivf/: 근사 검색용 IVF 인덱스
+    """
+
+    def __init__(self, directory: Path, embedder: Optional[Embedder] = None) -> None:
+        self.directory = directory
+        self.embedder = embedder or get_embedder()
+        self.meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+        self.vectors = np.load(directory / "vectors.npy", mmap_mode="r")
+        with open(directory / "chunks.jsonl", encoding="utf-8") as f:
+            self.chunks = [json.loads(line) for line in f]
+        self.exact = ExactIndex(self.vectors)
+        self.ivf = IVFIndex.load(directory / "ivf") if (directory / "ivf").exists() else None
+
+    @staticmethod
+    def default_dir() -> Path:
+        return settings.chroma_path / "guide"
+
+    @classmethod
+    def build(cls, corpus_dir: Optional[Path] = None, out_dir: Optional[Path] = None,
+              embedder: Optional[Embedder] = None) -> Dict[str, Any]:
+        """코퍼스 폴더 전체로 인덱스를 다시 만든다. 임베딩은 청크 캐시를 거치므로 바뀐 문서만 새로 계산."""
+        corpus_dir = corpus_dir or settings.corpus_path
+        out_dir = out_dir or cls.default_dir()
+        embedder = embedder or get_embedder()
+
+        chunks: List[Dict[str, str]] = []
+        texts: List[str] = []
+        for path in sorted(p for p in Path(corpus_dir).glob("*") if p.is_file()):
+            ext = path.suffix.lower().lstrip(".")
+            if ext not in settings.allowed_extensions:
+                continue
+            for c in chunk_text(extract_text(path.name, path.read_bytes())):
+                chunks.append({"source_id": path.stem, "snippet": c.strip()[:200]})
+                texts.append(c)
+        vectors, stats = embed_chunks(texts, embedder)
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+        np.save(out_dir / "vectors.npy", vectors.astype(np.float32))
+        with open(out_dir / "chunks.jsonl", "w", encoding="utf-8") as f:
+            for c in chunks:
+                f.write(json.dumps(c, ensure_ascii=False) + "\n")
+        if len(vectors):
+            IVFIndex.build(vectors, nlist=settings.rag_ivf_nlist).save(out_dir / "ivf")
+        meta = {"embedder": embedder.name, "dimension": embedder.dimension,
+                "documents": len({c["source_id"] for c in chunks}), "chunks": len(chunks),
+                "embedding": stats.as_dict()}
+        (out_dir / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        return meta
+
+    def search(self, query: str, top_k: Optional[int] = None, threshold: Optional[float] = None,
+               mode: Optional[str] = None) -> List[EvidenceItem]:
+        """질의와 비슷한 가이드 청크를 EvidenceItem으로 반환 (유사도 threshold 미만은 버림)"""
+        top_k = top_k or settings.rag_top_k
+        threshold = settings.rag_similarity_threshold if threshold is None else threshold
+        mode = mode or settings.rag_index_mode
+        if not len(self.vectors):
+            return []
+        q = self.embedder.embed([query])
+        if mode == "ivf" and self.ivf is not None:
+            scores, ids = self.ivf.search(q, top_k, settings.rag_ivf_nprobe)
+        else:
+            scores, ids = self.exact.search(q, top_k)
+        out = []
+        for s, i in zip(scores[0], ids[0]):
+            if i < 0 or s < threshold:
+                continue
+            c = self.chunks[int(i)]
+            out.append(EvidenceItem(source_id=c["source_id"], snippet=c["snippet"], score=float(s),
+                                    meta={"chunk": str(int(i)), "mode": mode}))
+        return out
+
+
+_guide: Optional[GuideIndex] = None
+
+
+def get_guide_index(reload: bool = False) -> Optional[GuideIndex]:
+    """저장된 가이드 인덱스를 (memmap으로) 연다. 아직 만들지 않았으면 None."""
+    global _guide
+    if _guide is None or reload:
+        d = GuideIndex.default_dir()
+        _guide = GuideIndex(d) if (d / "meta.json").exists() else None
+    return _guide
@@ -0,0 +1,157 @@
+# app/services/sketch.py
+
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import Iterable
+
+# numpy는 함수 안에서 import한다 (서버 시작 시 import 비용을 첫 분석으로 미룸)
+
+# ---------- HyperLogLog (서로 다른 값 개수 추정) ----------
+# 레지스터 2^HLL_P개(= 2KB)로 고정 → 원고가 아무리 길어도 메모리 일정.
+# 상대 표준오차 ≈ 1.04 / sqrt(2^HLL_P) ≈ 2.3%. 작은 개수는 linear counting으로 보정해서 거의 정확.
+# 레지스터끼리 칸별 max로 합치면 두 집합의 합집합 추정이 되므로 조각 통계처럼 merge할 수 있다.
+HLL_P = 11
+HLL_M = 1 << HLL_P
+_ALPHA = 0.7213 / (1 + 1.079 / HLL_M)
+_LOW_MASK = (1 << (64 - HLL_P)) - 1
+
+
+def _hash64(values: Iterable[str]):
+    import numpy as np
+
+    # 프로세스마다 달라지는 hash() 대신 blake2b → 워커/디스크 캐시 사이에서도 같은 값
+    blob = b"".join(hashlib.blake2b(v.encode("utf-8", "surrogatepass"), digest_size=8).digest() for v in values)
+    return np.frombuffer(blob, dtype="<u8")
+
+
+def hll_registers(values: Iterable[str]) -> bytes:
+    """값들의 HLL 레지스터 (값이 없으면 b"")"""
+    import numpy as np
+
+    h = _hash64(values)
+    if not len(h):
+        return b""
+    idx = (h >> np.uint64(64 - HLL_P)).astype(np.intp)
+    low = h & np.uint64(_LOW_MASK)
+    # rank = 하위 (64-p)비트에서 맨 앞 1비트의 위치 (모두 0이면 64-p+1)
+    bits = np.where(low > 0, np.frexp(low.astype(np.float64))[1], 0)
+    rank = (64 - HLL_P + 1 - bits).astype(np.uint8)
+    regs = np.zeros(HLL_M, dtype=np.uint8)
+    np.maximum.at(regs, idx, rank)
+    return regs.tobytes()
+
+
+def hll_union(a: bytes, b: bytes) -> bytes:
+    import numpy as np
+
+    if not a:
+        return b
+    if not b:
+        return a
+    return np.maximum(np.frombuffer(a, dtype=np.uint8), np.frombuffer(b, dtype=np.uint8)).tobytes()
+
+
+def hll_estimate(regs: bytes) -> float:
+    import numpy as np
+
+    if not regs:
+        return 0.0
+    r = np.frombuffer(regs, dtype=np.uint8)
+    est = _ALPHA * HLL_M * HLL_M / float(np.sum(np.ldexp(1.0, -r.astype(np.int32))))
+    zeros = int(np.count_nonzero(r == 0))
+    if est <= 2.5 * HLL_M and zeros:
+        est = HLL_M * math.log(HLL_M / zeros)
+    return est
+
+
+# ---------- MinHash (두 집합의 자카드 유사도 추정) ----------
+# 순열 하나로 MINHASH_BINS칸을 채우는 방식(one permutation hashing): 해시 상위 비트로 칸을 고르고
+# 칸마다 나머지 비트의 최솟값을 둔다. 빈 칸은 다음 칸 값을 빌려 채운다(densification).
+# 칸이 같은 비율 ≈ 자카드 유사도, 표준오차 ≈ sqrt(J(1-J)/MINHASH_BINS).
+# 칸별 min으로 합치면 합집합의 서명이 되므로 조각 단위로 나눠 만들어도 결과가 같다.
+MINHASH_BINS = 128
+_BIN_BITS = 7                         # 2^7 = MINHASH_BINS
+_VAL_BITS = 64 - _BIN_BITS
+_EMPTY = (1 << _VAL_BITS) - 1
+_ROLL = 0x100000001B3                 # 다항식 롤링 해시 밑
+
+
+def _mix64(z):
+    """splitmix64 마무리 단계 (uint64 배열, 제자리 아님)"""
+    import numpy as np
+
+    z = z ^ (z >> np.uint64(30))
+    z = z * np.uint64(0xBF58476D1CE4E5B9)
+    z = z ^ (z >> np.uint64(27))
+    z = z * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def shingle_hashes(text: str, k: int):
+    """text의 연속 k글자 조각마다 64비트 해시 (uint64 배열, 길이 len(text) - k + 1)"""
+    import numpy as np
+
+    cps = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32).astype(np.uint64)
+    n = len(cps) - k + 1
+    if n <= 0:
+        return np.empty(0, dtype=np.uint64)
+    h = np.zeros(n, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(k):
+            h = h * np.uint64(_ROLL) + cps[j:j + n]
+        return _mix64(h)
+
+
+def minhash_empty():
+    import numpy as np
+
+    return np.full(MINHASH_BINS, _EMPTY, dtype=np.uint64)
+
+
+def minhash_update(sig, hashes) -> None:
+    """sig(minhash_empty)에 해시들을 더한다 (제자리)."""
+    import numpy as np
+
+    if not len(hashes):
+        return
+    bins = (hashes >> np.uint64(_VAL_BITS)).astype(np.intp)
+    low = hashes & np.uint64(_EMPTY)
+    # 칸이 어느 정도 차면 대부분 지금 최솟값보다 크므로 먼저 걸러 내고 남은 것만 칸별 min
+    keep = low < sig[bins]
+    if keep.any():
+        np.minimum.at(sig, bins[keep], low[keep])
+
+
+def minhash_merge(sig, other) -> None:
+    """sig에 other(둘 다 minhash_empty 모양)를 칸별 min으로 합친다 (제자리) → 두 해시 집합 합집합의 칸"""
+    import numpy as np
+
+    np.minimum(sig, other, out=sig)
+
+
+def minhash_signature(sig) -> bytes:
+    """누적된 칸 → 저장용 서명 (uint32 × MINHASH_BINS). 해시가 하나도 없었으면 b"" """
+    import numpy as np
+
+    filled = np.flatnonzero(sig != np.uint64(_EMPTY))
+    if not len(filled):
+        return b""
+    # 빈 칸 i는 뒤쪽(원형)으로 가장 가까운 찬 칸 j의 값을 거리와 섞어서 쓴다
+    idx = np.arange(MINHASH_BINS)
+    pos = np.searchsorted(filled, idx) % len(filled)
+    src = filled[pos]
+    dist = ((src - idx) % MINHASH_BINS).astype(np.uint64)
+    with np.errstate(over="ignore"):
+        vals = np.where(dist == 0, sig[src], _mix64(sig[src] + dist))
+    return (vals >> np.uint64(_VAL_BITS - 32)).astype("<u4").tobytes()
+
+
+def minhash_similarity(a: bytes, b: bytes) -> float:
+    """두 서명의 추정 자카드 유사도 (0~1)"""
+    import numpy as np
+
+    if not a or not b:
+        return 0.0
+    return float(np.mean(np.frombuffer(a, dtype="<u4") == np.frombuffer(b, dtype="<u4")))
@@ -0,0 +1,305 @@
+# app/services/structure.py
+# 색인 만들기: (backend 폴더에서) python -m app.services.structure build
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import codecs
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..config import settings
+from .blobs import TEXT_EXTS, blob_file, blob_sidecar, read_bytes
+from .incremental import CHAPTER_MARK
+
+# numpy는 함수 안에서 import한다 (서버 시작 시 import 비용을 첫 사용으로 미룸)
+
+# ---------- 원고 구조 색인 ----------
+# 저장(persist)한 원고마다 blob 옆에 색인과 본문 위치 정보를 둔다.
+# - <sha1>.struct.npy: uint32 [1 + 화 + 문단 + 문장, 4]
+#     0행 = (화 수, 문단 수, 문장 수, 글자 수)
+#     나머지 = (글자 시작, 글자 끝, 바이트 시작, 바이트 끝). 화 → 문단 → 문장 순, 각각 시작 위치 순
+# - 텍스트(txt/md) 원고: <sha1>.struct.json = {"encoding", "offset"}. 바이트 위치는 blob(압축을 푼 원문) 안의 위치라
+#   본문을 따로 저장하지 않는다 (offset = 앞 BOM 바이트 수).
+# - PDF/DOCX, 또는 디코딩이 원문 바이트를 그대로 되살리지 못하는 텍스트: <sha1>.text = 추출한 텍스트 (UTF-8),
+#   바이트 위치는 이 파일 안의 위치. PDF/DOCX는 다시 추출하지 않고 이 파일을 읽으면 된다 (text_path).
+# 문단/문장 나누는 규칙은 분석(TextStats)과 같다: 문단 = 공백이 아닌 줄, 문장 = SENTENCE_END로 나눈 조각
+# (양끝 공백 제외, 문장 끝 부호 포함). 화 = 화/장 구분선(incremental.CHAPTER_MARK) 줄부터 다음 구분선 앞까지.
+# 색인은 np.load(mmap_mode="r")로 열어 필요한 행만 읽고, 본문은 바이트 위치로 그 구간만 읽는다.
+TEXT_SUFFIX = ".text"
+INDEX_SUFFIX = ".struct.npy"
+SOURCE_SUFFIX = ".struct.json"
+KINDS = ("chapter", "paragraph", "sentence")
+
+_PARAGRAPH = re.compile(r"^[^\S\n]*(\S(?:[^\n]*\S)?)", re.M)
+_SENTENCE = re.compile(r"[^\s.?!…][^.?!…]*[.?!…]*")
+_SENTENCE_ENDS = ".?!…"
+
+log = logging.getLogger(__name__)
+
+
+def _chapter_starts(text: str) -> List[int]:
+    starts = [m.start() + 1 for m in CHAPTER_MARK.finditer(text)]
+    if CHAPTER_MARK.match("\n" + text[:256]):  # 첫 줄이 구분선인 경우
+        starts.insert(0, 0)
+    return starts
+
+
+def build_structure(text: str, encoding: str = "utf-8", offset: int = 0):
+    """텍스트 → 색인 배열 (INDEX_SUFFIX 파일 내용). 바이트 위치는 encoding으로 쓴 본문의 offset 바이트 뒤부터."""
+    import numpy as np
+
+    chapters = _chapter_starts(text)
+    chapter_spans = list(zip(chapters, chapters[1:] + [len(text)]))
+    paragraph_spans = [m.span(1) for m in _PARAGRAPH.finditer(text)]
+    sentence_spans = [m.span() for m in _SENTENCE.finditer(text)]
+    if sentence_spans and text[sentence_spans[-1][1] - 1] not in _SENTENCE_ENDS:
+        # 끝 부호가 없는 마지막 문장만 뒤 공백이 딸려 온다
+        start, end = sentence_spans[-1]
+        sentence_spans[-1] = (start, start + len(text[start:end].rstrip()))
+
+    spans = np.array(chapter_spans + paragraph_spans + sentence_spans, dtype=np.int64).reshape(-1, 2)
+    # 글자 위치 → 바이트 위치: 글자별 바이트 수의 누적합
+    cps = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    if encoding == "utf-8":
+        widths = 1 + (cps >= 0x80).astype(np.int64) + (cps >= 0x800) + (cps >= 0x10000)
+    else:
+        # 글자마다 바이트 수가 정해진 인코딩(CP949 등)만 온다 (_blob_source): 나오는 글자 종류별로 한 번씩만 인코딩
+        kinds, which = np.unique(cps, return_inverse=True)
+        widths = np.array([len(chr(c).encode(encoding)) for c in kinds.tolist()], dtype=np.int64)[which]
+    byte_at = np.concatenate([[0], np.cumsum(widths)]) + offset
+
+    out = np.empty((1 + len(spans), 4), dtype=np.uint32)
+    out[0] = (len(chapter_spans), len(paragraph_spans), len(sentence_spans), len(text))
+    out[1:, :2] = spans
+    out[1:, 2:] = byte_at[spans]
+    return out
+
+
+def index_path(sha1: str) -> Path:
+    return blob_sidecar(sha1, INDEX_SUFFIX)
+
+
+def text_path(sha1: str) -> Optional[Path]:
+    """색인과 함께 저장된 추출 텍스트 (색인이 아직 없거나, 본문을 blob에서 바로 읽는 텍스트 원고면 None)"""
+    p = blob_sidecar(sha1, TEXT_SUFFIX)
+    return p if p.exists() and index_path(sha1).exists() else None
+
+
+def _blob_source(text: str, data: bytes, encoding: str) -> Optional[Dict[str, Any]]:
+    """
+    텍스트 원고의 blob(data)을 본문으로 바로 쓸 수 있으면 {"encoding", "offset"}.
+    디코딩이 원문 바이트를 그대로 되살리지 못하거나(잘못된 바이트를 바꿔 넣음 등)
+    글자마다 바이트 수가 정해지지 않는 인코딩(UTF-16/32: BOM·바이트 순서)이면 None.
+    """
+    name = codecs.lookup(encoding).name
+    if name.startswith(("utf-16", "utf-32")):
+        return None
+    offset = 0
+    if name == "utf-8-sig":
+        name = "utf-8"
+        offset = len(codecs.BOM_UTF8) if data.startswith(codecs.BOM_UTF8) else 0
+    try:
+        if text.encode(name) != data[offset:]:
+            return None
+    except UnicodeEncodeError:
+        return None
+    return {"encoding": name, "offset": offset}
+
+
+def _write_atomic(dest: Path, write) -> None:
+    # .blob- 로 시작하는 임시 파일은 중간에 죽어도 GC가 치운다
+    fd, tmp = tempfile.mkstemp(prefix=".blob-", suffix=".part", dir=dest.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, dest)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def extract_manuscript_text(name: str, path: Path, content_sha1: Optional[str] = None) -> str:
+    """blob(또는 원문 파일) 전체를 텍스트로 (형식은 name의 확장자로, content_sha1은 인코딩 캐시 키)"""
+    from .preprocess import extract_text, iter_docx_text, iter_pdf_text
+
+    ext = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    if ext == "pdf":
+        return "".join(iter_pdf_text(str(path)))
+    if ext == "docx":
+        return "".join(iter_docx_text(str(path)))
+    return extract_text(name, read_bytes(path), content_sha1)
+
+
+def ensure_structure(sha1: str, name: str, rebuild: bool = False) -> bool:
+    """
+    blob(sha1)의 구조 색인이 없으면 만든다. name은 확장자로 형식을 고르는 데만 쓴다.
+    새로 만들었으면 True, 이미 있거나 blob이 없으면 False.
+    """
+    import numpy as np
+
+    if index_path(sha1).exists() and not rebuild:
+        return False
+    from .preprocess import detect_encoding, extract_text
+
+    blob = blob_file(sha1)
+    if blob is None:
+        return False
+    ext = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    source = None
+    if ext in TEXT_EXTS:
+        data = read_bytes(blob)
+        text = extract_text(name, data, sha1)
+        source = _blob_source(text, data, detect_encoding(data, sha1))
+    else:
+        text = extract_manuscript_text(name, blob, sha1)
+    # 본문(위치 정보) 먼저, 색인은 마지막에 (색인이 보이면 본문도 다 쓰인 것)
+    # 다시 만들 때 다른 방식으로 남은 파일은 지운다 (.text가 있으면 그쪽을 읽으므로)
+    if source is not None:
+        blob_sidecar(sha1, TEXT_SUFFIX).unlink(missing_ok=True)
+        _write_atomic(blob_sidecar(sha1, SOURCE_SUFFIX), lambda f: f.write(json.dumps(source).encode("utf-8")))
+        structure = build_structure(text, source["encoding"], source["offset"])
+    else:
+        blob_sidecar(sha1, SOURCE_SUFFIX).unlink(missing_ok=True)
+        _write_atomic(blob_sidecar(sha1, TEXT_SUFFIX), lambda f: f.write(text.encode("utf-8", "surrogatepass")))
+        structure = build_structure(text)
+    _write_atomic(index_path(sha1), lambda f: np.save(f, structure))
+    return True
+
+
+def _has_body(sha1: str) -> bool:
+    if blob_sidecar(sha1, TEXT_SUFFIX).exists():
+        return True
+    return blob_sidecar(sha1, SOURCE_SUFFIX).exists() and blob_file(sha1) is not None
+
+
+class StructureIndex:
+    """원고 하나의 구조 색인 (memmap). 행 하나를 읽는 데 상수 시간, 위치로 찾는 데 log 시간."""
+
+    def __init__(self, sha1: str) -> None:
+        import numpy as np
+
+        self.sha1 = sha1
+        self.rows = np.load(index_path(sha1), mmap_mode="r")
+        header = [int(v) for v in self.rows[0]]
+        self.counts = dict(zip(KINDS, header[:3]))
+        self.num_chars = header[3]
+        self._offset = {"chapter": 1, "paragraph": 1 + header[0], "sentence": 1 + header[0] + header[1]}
+        # 본문: 추출 텍스트 파일(UTF-8)이 있으면 그것, 없으면 blob을 원래 인코딩 그대로
+        self._text = blob_sidecar(sha1, TEXT_SUFFIX)
+        self._encoding = "utf-8"
+        self._data: Optional[bytes] = None
+        if not self._text.exists():
+            self._text = blob_file(sha1)
+            self._encoding = json.loads(blob_sidecar(sha1, SOURCE_SUFFIX).read_text(encoding="utf-8"))["encoding"]
+
+    @classmethod
+    def open(cls, sha1: str) -> Optional["StructureIndex"]:
+        return cls(sha1) if index_path(sha1).exists() and _has_body(sha1) else None
+
+    def spans(self, kind: str):
+        """kind의 (글자 시작, 글자 끝, 바이트 시작, 바이트 끝) 배열 (memmap 보기, 복사 없음)"""
+        lo = self._offset[kind]
+        return self.rows[lo:lo + self.counts[kind]]
+
+    def find(self, kind: str, char_offset: int) -> Optional[int]:
+        """글자 위치 char_offset을 포함하는 kind 단위의 번호 (단위 사이 공백이면 바로 앞 단위, 없으면 None)"""
+        import numpy as np
+
+        starts = self.spans(kind)[:, 0]
+        i = int(np.searchsorted(starts, char_offset, side="right")) - 1
+        return i if i >= 0 else None
+
+    def within(self, kind: str, char_start: int, char_end: int) -> Tuple[int, int]:
+        """[char_start, char_end) 안에서 시작하는 kind 단위들의 번호 범위 [i, j)"""
+        import numpy as np
+
+        starts = self.spans(kind)[:, 0]
+        return int(np.searchsorted(starts, char_start)), int(np.searchsorted(starts, char_end))
+
+    def read_bytes_range(self, byte_start: int, byte_end: int) -> str:
+        if self._text.suffix == ".gz":
+            # 압축된 blob은 건너뛸 수 없어서 이 색인 객체가 살아 있는 동안 한 번만 풀어 둔다 (chapters처럼 여러 구간을 읽을 때)
+            if self._data is None:
+                self._data = read_bytes(self._text)
+            raw = self._data[byte_start:byte_end]
+        else:
+            # 본문은 그 구간만 읽는다 (파일을 열어 두지 않아서 Windows에서도 GC가 지울 수 있음)
+            with open(self._text, "rb") as f:
+                f.seek(byte_start)
+                raw = f.read(max(0, byte_end - byte_start))
+        return raw.decode(self._encoding, "surrogatepass" if self._encoding == "utf-8" else "strict")
+
+    def span(self, kind: str, index: int) -> Dict[str, Any]:
+        if not 0 <= index < self.counts[kind]:
+            raise IndexError(f"{kind} {index} out of range")
+        cs, ce, bs, be = (int(v) for v in self.spans(kind)[index])
+        return {"kind": kind, "index": index, "char_start": cs, "char_end": ce,
+                "byte_start": bs, "byte_end": be, "text": self.read_bytes_range(bs, be)}
+
+    def chapters(self) -> List[Dict[str, Any]]:
+        """화마다 제목(구분선 줄)과 글자/바이트 범위, 그 안의 문단/문장 번호 범위"""
+        out = []
+        for i, (cs, ce, bs, be) in enumerate(self.spans("chapter").tolist()):
+            paragraphs = self.within("paragraph", cs, ce)  # 첫 문단 = 구분선 줄
+            out.append({"index": i, "title": self.span("paragraph", paragraphs[0])["text"],
+                        "char_start": cs, "char_end": ce, "byte_start": bs, "byte_end": be,
+                        "paragraphs": paragraphs, "sentences": self.within("sentence", cs, ce)})
+        return out
+
+
+# ---------- 저장할 때 백그라운드로 ----------
+_pending: Set[asyncio.Task] = set()
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    _pending.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        log.warning("구조 색인 생성 실패: %s", task.exception())
+
+
+def schedule_structure(sha1: str, name: str) -> None:
+    """(이벤트 루프에서) 색인 생성을 워커에 맡기고 기다리지 않는다. structure_index가 꺼져 있으면 아무것도 안 함."""
+    from .workers import run_blocking
+
+    if not settings.structure_index or index_path(sha1).exists():
+        return
+    task = asyncio.create_task(run_blocking(ensure_structure, sha1, name))
+    _pending.add(task)
+    task.add_done_callback(_log_failure)
+
+
+def build_missing(rebuild: bool = False) -> Dict[str, int]:
+    """저장된 원고 중 색인이 없는 것(rebuild면 전부)을 만든다."""
+    from .manuscripts import stored_manuscripts
+
+    stats = {"built": 0, "skipped": 0, "failed": 0}
+    for info in stored_manuscripts():
+        try:
+            stats["built" if ensure_structure(info["content_sha1"], info["name"], rebuild) else "skipped"] += 1
+        except Exception as e:
+            log.warning("%s: %s", info["name"], e)
+            stats["failed"] += 1
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m app.services.structure")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="저장된 원고 중 구조 색인이 없는 것을 만듦")
+    b.add_argument("--rebuild", action="store_true", help="이미 있는 색인도 다시 만듦")
+    args = ap.parse_args(argv)
+    print(json.dumps(build_missing(args.rebuild), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# app/services/warmup.py
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Any, Dict
+
+from ..config import settings
+
+# 서버는 무거운 것 없이 먼저 뜨고(/health 응답 가능), 나머지는 시작 직후 백그라운드 스레드에서 준비한다.
+# 준비가 끝나기 전에 들어온 요청은 각 모듈이 처음 쓸 때 알아서 불러오므로 결과는 같고 조금 느릴 뿐이다.
+status: Dict[str, Any] = {"state": "pending", "steps": {}, "error": None}
+
+_SAMPLE = "제 1화 워밍업\n“준비됐어?” 그녀가 물었다. 황궁의 등불이 흔들렸다.\n"
+
+
+def _worker_warm_up() -> int:
+    """(분석 워커 프로세스에서 실행) 파서 import와 분석기 준비를 미리 해 둔다."""
+    from .analysis import rule_based_analyze
+    from .preprocess import preload_parsers
+
+    preload_parsers()
+    rule_based_analyze(_SAMPLE)
+    return os.getpid()
+
+
+def _step(name: str, fn) -> None:
+    t0 = time.perf_counter()
+    fn()
+    status["steps"][name] = round((time.perf_counter() - t0) * 1000, 1)
+
+
+def _warm_pool() -> None:
+    from .workers import get_pool
+
+    pool = get_pool()
+    if pool is not None:
+        for f in [pool.submit(_worker_warm_up) for _ in range(settings.worker_count)]:
+            f.result()
+
+
+def _warm_guide_index() -> None:
+    from .retrieval import get_guide_index
+
+    get_guide_index()
+
+
+def _open_baselines() -> None:
+    from .baselines import get_baselines
+
+    get_baselines()
+
+
+def _sweep_disk_caches() -> None:
+    from .cache import result_cache
+    from .incremental import segment_cache
+
+    result_cache.sweep_disk()
+    segment_cache.sweep_disk()
+
+
+def prepare() -> Dict[str, Any]:
+    """
+    (스레드에서 실행) 사용자/시스템 폴더를 만들고 디스크 캐시에서 만료된 파일을 지운 뒤, warmup_on_startup이면
+    파서 import → 분석기(장르 오토마톤, numpy) → 워커 프로세스 → 장르 기준 분포(memmap)
+    → (임베딩 사용 시) 가이드 인덱스 순으로 준비한다.
+    """
+    status["state"] = "running"
+    try:
+        _step("dirs", settings.ensure_dirs)
+        _step("disk_caches", _sweep_disk_caches)
+        if settings.warmup_on_startup:
+            from .analysis import rule_based_analyze
+            from .preprocess import preload_parsers
+
+            _step("parsers", preload_parsers)
+            _step("analyzer", lambda: rule_based_analyze(_SAMPLE))
+            _step("workers", _warm_pool)
+            _step("baselines", _open_baselines)
+            if settings.enable_embeddings:
+                _step("guide_index", _warm_guide_index)
+        status["state"] = "done"
+    except Exception as e:
+        # 워밍업 실패는 서버를 멈추지 않는다 (첫 요청에서 다시 시도됨)
+        status["state"] = "failed"
+        status["error"] = f"{type(e).__name__}: {e}"
+    return status
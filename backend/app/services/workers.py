@@ -0,0 +1,387 @@
+# app/services/workers.py
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from multiprocessing.connection import Connection
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, Iterator, Optional, Tuple
+
+from ..config import settings
+from .analysis import PIPELINE, rule_based_analyze
+from .blobs import read_bytes
+from .incremental import incremental_analyze
+from .metrics import RequestTimer
+from .preprocess import extract_text, iter_docx_text, iter_pdf_text, shutdown_page_pool
+
+
+class ExtractionError(Exception):
+    """워커에서 텍스트 추출에 실패했을 때 (라우트에서 400으로 변환)"""
+
+
+class AnalysisBusy(Exception):
+    """동시 분석 수와 대기열이 모두 찬 경우 (라우트에서 429로 변환)"""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"analysis queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+# ---------- 워커 프로세스에서 실행되는 함수 (피클 가능한 최상위 함수여야 함) ----------
+def _guard_extraction(stream: Iterable[str]) -> Iterator[str]:
+    # 스트림은 분석 도중에 추출되므로 추출 오류를 여기서 ExtractionError로 바꾼다
+    try:
+        yield from stream
+    except Exception as e:
+        raise ExtractionError(str(e)) from None
+
+
+def _timed_stream(stream: Iterable[str], timings: Dict[str, float]) -> Iterator[str]:
+    # 다음 조각을 꺼내는 데 걸린 시간만 extract로 센다 (나머지는 분석)
+    it = iter(stream)
+    while True:
+        t0 = time.perf_counter()
+        try:
+            piece = next(it)
+        except StopIteration:
+            return
+        finally:
+            timings["extract"] = timings.get("extract", 0.0) + time.perf_counter() - t0
+        yield piece
+
+
+def _add_pipeline_timings(timings: Dict[str, float], stages: Dict[str, float]) -> None:
+    # 분석 파이프라인 단계는 analyze 안의 내역이라 "analyze.<단계>"로 (queue를 셀 때 빼야 함: top_level)
+    for stage, seconds in stages.items():
+        timings[f"analyze.{stage}"] = timings.get(f"analyze.{stage}", 0.0) + seconds
+
+
+def top_level(timings: Dict[str, float]) -> float:
+    """단계별 초 중 내역("analyze.<단계>")을 뺀 합"""
+    return sum(seconds for stage, seconds in timings.items() if "." not in stage)
+
+
+def analyze_file(filename: str, path: str, incremental: bool = False,
+                 timings: Optional[Dict[str, float]] = None,
+                 content_sha1: Optional[str] = None,
+                 progress: Optional[Connection] = None) -> Dict[str, Any]:
+    """
+    임시 파일 경로만 넘겨받아 워커 쪽에서 읽는다 (업로드 바이트를 프로세스 간에 복사하지 않음).
+    PDF(페이지 범위 병렬 추출)와 DOCX(문단 스트리밍)는 추출되는 순서대로 바로 분석한다.
+    timings를 주면 extract/analyze 초와 파이프라인 단계별 초(analyze.<단계>)를 채운다.
+    content_sha1: 원문(path 내용)의 SHA-1 → extract_text의 인코딩 캐시 키 (원문을 다시 해시하지 않음)
+    progress: 파이프라인 단계가 끝날 때마다 단계 이름을 보낼 연결 (run_blocking_reporting이 넘김)
+    """
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if timings is None:
+        timings = {}
+    on_stage = progress.send if progress is not None else None
+    stages: Dict[str, float] = {}
+    started = time.perf_counter()
+    if ext in ("pdf", "docx"):
+        stream = _guard_extraction(iter_pdf_text(path) if ext == "pdf" else iter_docx_text(path))
+        stream = _timed_stream(stream, timings)
+        # 증분 분석은 구간을 나눌 전체 문자열이 필요
+        result = (incremental_analyze("".join(stream), stages, on_stage) if incremental
+                  else rule_based_analyze(stream, stages, on_stage))
+    else:
+        data = read_bytes(path)  # 저장소의 텍스트 원문은 gzip일 수 있음
+        try:
+            text = extract_text(filename, data, content_sha1)
+        except Exception as e:
+            raise ExtractionError(str(e)) from None
+        timings["extract"] = time.perf_counter() - started
+        result = (incremental_analyze(text, stages, on_stage) if incremental
+                  else rule_based_analyze(text, stages, on_stage))
+    timings["analyze"] = time.perf_counter() - started - timings.get("extract", 0.0)
+    _add_pipeline_timings(timings, stages)
+    return result
+
+
+def analyze_file_timed(filename: str, path: str, incremental: bool = False,
+                       content_sha1: Optional[str] = None,
+                       progress: Optional[Connection] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """analyze_file + 워커 안에서 잰 단계별 초 (프로세스 풀 너머로 돌려주기 위한 형태)"""
+    timings: Dict[str, float] = {}
+    return analyze_file(filename, path, incremental, timings, content_sha1, progress), timings
+
+
+# 점진 분석 부분: 파이프라인의 훑기 단계 산출물을 나눠 각각 다른 워커에서 동시에 만든다 (텍스트 원고만).
+# 합쳐서(combine_parts) 나머지 계산 단계를 돌리면 analyze_file과 같은 결과.
+# 서명은 가장 빨리 끝나는 장르 어휘 세기에 붙여서 워커 수를 늘리지 않는다.
+ANALYSIS_PARTS: Dict[str, Tuple[str, ...]] = {
+    "stats": ("text_stats",),
+    "dialogue": ("dialogue",),
+    "genres": ("genre_hits", "shingles"),
+}
+# PDF/DOCX는 추출이 분석보다 비싸서 나누지 않는다: 워커 하나가 한 번 추출하며 모든 부분을 한 번에 훑음
+WHOLE_PART = {"all": tuple(out for outputs in ANALYSIS_PARTS.values() for out in outputs)}
+
+
+def analyze_part(filename: str, path: str, outputs: Tuple[str, ...],
+                 content_sha1: Optional[str] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    (점진 분석용) analyze_file의 일부만 한다: 훑기 단계 산출물 outputs(ANALYSIS_PARTS의 값) → {산출물: 값}
+    반환: (결과, extract/analyze 초 + 파이프라인 단계별 초)
+    """
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    if ext in ("pdf", "docx"):
+        stream = _guard_extraction(iter_pdf_text(path) if ext == "pdf" else iter_docx_text(path))
+        source: Any = _timed_stream(stream, timings)
+    else:
+        try:
+            source = extract_text(filename, read_bytes(path), content_sha1)
+        except Exception as e:
+            raise ExtractionError(str(e)) from None
+        timings["extract"] = time.perf_counter() - started
+    stages: Dict[str, float] = {}
+    out = PIPELINE.run(source, outputs, timings=stages)
+    timings["analyze"] = time.perf_counter() - started - timings.get("extract", 0.0)
+    _add_pipeline_timings(timings, stages)
+    return out, timings
+
+
+def combine_parts(parts: Dict[str, Dict[str, Any]], timer: Optional[RequestTimer] = None) -> Dict[str, Any]:
+    """
+    analyze_part 결과들(part → 결과)로 나머지 계산 단계를 돌려 rule_based_analyze와 같은 모양의 결과를 만든다.
+    아직 없는 산출물은 빈 원고를 훑은 값으로 채운다 (그 산출물에 기대는 섹션은 보내지 말 것: report.SECTION_NEEDS).
+    timer를 주면 계산 단계별 시간을 analyze.<단계>로 더한다.
+    """
+    given: Dict[str, Any] = {}
+    for out in parts.values():
+        given.update(out)
+    stages: Dict[str, float] = {}
+    result = PIPELINE.run(None, ("result",), given, stages)["result"]
+    if timer is not None:
+        for stage, seconds in stages.items():
+            timer.add(f"analyze.{stage}", seconds)
+    return result
+
+
+# ---------- 프로세스 풀 ----------
+_pool: Optional[Executor] = None
+_pool_lock = threading.Lock()  # 시작 직후 워밍업 스레드와 첫 요청이 동시에 만들 수 있음
+
+
+def get_pool() -> Optional[Executor]:
+    """worker_count개 프로세스 풀을 처음 쓸 때 만든다. worker_count <= 0이면 None(스레드에서 실행)."""
+    global _pool
+    if _pool is None and settings.worker_count > 0:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=settings.worker_count)
+    return _pool
+
+
+def start_pool() -> None:
+    """
+    워커 프로세스를 지금 띄운다 (앱 시작 시, 다른 스레드가 움직이기 전에 호출).
+    fork 방식에서는 다른 스레드가 모듈 import 잠금 등을 쥔 채로 fork되면 자식이 그 잠금에서 멈추므로,
+    무거운 모듈을 처음 쓸 때 import하는 구조에서는 풀을 백그라운드 워밍업보다 먼저 만들어 둬야 한다.
+    """
+    pool = get_pool()
+    if pool is not None:
+        pool.submit(os.getpid)  # fork 방식은 첫 submit에서 worker_count개를 모두 띄운다
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+    shutdown_page_pool()
+
+
+# ---------- 입장 제어 ----------
+class AdmissionGate:
+    """
+    동시에 돌아가는 분석 워커 자리를 max_concurrent개로 제한한다. 분석 하나는 보통 한 자리,
+    워커 여러 개에 나눠 도는 분석(iter_analysis_parts)은 쓰는 워커 수만큼 자리를 잡는다 (slots).
+    자리가 없으면 최대 queue_size개 요청까지 timeout초 동안 온 순서대로 기다리게 하고,
+    대기열도 차 있거나 시간이 지나면 바로 AnalysisBusy를 던진다.
+    """
+
+    def __init__(self, max_concurrent: int, queue_size: int, timeout: float, retry_after: int) -> None:
+        self.max_concurrent = max(1, max_concurrent)
+        self.queue_size = max(0, queue_size)
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.running = 0  # 잡혀 있는 자리 수
+        self.waiting = 0
+        self.rejected = 0
+        self._cond: Optional[asyncio.Condition] = None
+        self._line: Deque[object] = deque()  # 기다리는 요청 (온 순서)
+
+    def _condition(self) -> asyncio.Condition:
+        # 이벤트 루프 안에서 처음 쓸 때 만든다
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def acquire(self, slots: int = 1) -> int:
+        """
+        자리 slots개(max_concurrent를 넘으면 max_concurrent개)를 한꺼번에 잡고 잡은 수를 돌려준다.
+        나눠 잡지 않으므로 여러 자리를 기다리는 요청끼리 서로 막히지 않고, 줄 맨 앞만 잡아서 큰 요청도 밀리지 않는다.
+        """
+        slots = min(max(1, slots), self.max_concurrent)
+        cond = self._condition()
+        async with cond:
+            if self._line or self.running + slots > self.max_concurrent:
+                if self.waiting >= self.queue_size:
+                    self.rejected += 1
+                    raise AnalysisBusy(self.retry_after)
+                ticket = object()
+                self._line.append(ticket)
+                self.waiting += 1
+                try:
+                    await asyncio.wait_for(
+                        cond.wait_for(lambda: self._line[0] is ticket and self.running + slots <= self.max_concurrent),
+                        timeout=self.timeout)
+                except asyncio.TimeoutError:
+                    self.rejected += 1
+                    raise AnalysisBusy(self.retry_after) from None
+                finally:
+                    self.waiting -= 1
+                    self._line.remove(ticket)
+                    cond.notify_all()  # 다음 차례가 확인하도록
+            self.running += slots
+        return slots
+
+    async def release(self, slots: int = 1) -> None:
+        cond = self._condition()
+        async with cond:
+            self.running -= slots
+            cond.notify_all()
+
+    @asynccontextmanager
+    async def slots(self, n: int) -> AsyncIterator[int]:
+        """async with gate.slots(n) as held: ... (held = 실제로 잡은 자리 수)"""
+        held = await self.acquire(n)
+        try:
+            yield held
+        finally:
+            await self.release(held)
+
+    async def __aenter__(self) -> "AdmissionGate":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "max_concurrent": self.max_concurrent,
+            "queue_size": self.queue_size,
+        }
+
+
+gate = AdmissionGate(
+    max_concurrent=settings.max_concurrent_analyses,
+    queue_size=settings.analysis_queue_size,
+    timeout=settings.analysis_queue_timeout_seconds,
+    retry_after=settings.retry_after_seconds,
+)
+
+
+async def run_blocking(fn, *args):
+    """fn(*args)를 프로세스 풀(없으면 스레드)에서 실행한다. 입장 제어 없음 (작업 큐 등 이미 줄 세운 경우)"""
+    pool = get_pool()
+    if pool is None:
+        return await asyncio.to_thread(fn, *args)
+    return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+
+async def run_blocking_reporting(fn, *args, on_progress: Callable[[Any], Awaitable[None]],
+                                 poll_interval: float = 0.1):
+    """
+    run_blocking(fn, *args, conn)처럼 실행하되, fn이 마지막 인자 conn으로 send한 것마다 on_progress(값)를 기다린다.
+    연결 객체는 프로세스 풀 인자로도 넘어간다. 받는 쪽은 이벤트 루프에서 poll_interval초마다 막히지 않게 확인
+    (add_reader는 Windows 기본 루프에서 안 되므로). fn이 끝나면 남은 것까지 다 전달한 뒤 결과를 돌려준다.
+    """
+    recv, send = multiprocessing.Pipe(duplex=False)
+    task = asyncio.ensure_future(run_blocking(fn, *args, send))
+    try:
+        while True:
+            finished = task.done()  # 끝난 걸 먼저 확인해야 그 전에 보낸 것을 빠짐없이 읽음
+            while recv.poll():
+                await on_progress(recv.recv())
+            if finished:
+                return task.result()
+            await asyncio.wait({task}, timeout=poll_interval)
+    finally:
+        task.cancel()
+        recv.close()
+        send.close()
+
+
+async def run_in_pool(fn, *args):
+    """입장 제어를 거친 뒤 fn(*args)를 프로세스 풀(없으면 스레드)에서 실행한다."""
+    async with gate:
+        return await run_blocking(fn, *args)
+
+
+async def run_analysis(filename: str, path: str, incremental: bool = False,
+                       timer: Optional[RequestTimer] = None,
+                       content_sha1: Optional[str] = None) -> Dict[str, Any]:
+    """
+    timer를 주면 extract/analyze와, 나머지 대기 시간(입장 대기 + 프로세스 왕복)을 queue로 기록한다.
+    content_sha1: 라우트가 업로드를 받으며 계산한 SHA-1 (워커가 인코딩 캐시 키로 그대로 씀)
+    """
+    if timer is None:
+        return await run_in_pool(analyze_file, filename, path, incremental, None, content_sha1)
+    t0 = time.perf_counter()
+    result, timings = await run_in_pool(analyze_file_timed, filename, path, incremental, content_sha1)
+    for stage, seconds in timings.items():
+        timer.add(stage, seconds)
+    timer.add("queue", max(0.0, time.perf_counter() - t0 - top_level(timings)))
+    return result
+
+
+async def iter_analysis_parts(filename: str, path: str,
+                              timer: Optional[RequestTimer] = None,
+                              content_sha1: Optional[str] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    (점진 분석) 텍스트 원고는 ANALYSIS_PARTS를 워커들에 동시에 맡기고, 끝나는 순서대로 (part, 결과)를 내보낸다.
+    입장 제어에서는 쓰는 워커 수만큼 자리를 잡는다 (자리가 모자라게 설정돼 있으면 그만큼만 동시에).
+    PDF/DOCX는 워커 하나가 한 번 추출하며 전부 훑어 WHOLE_PART 하나로 내보낸다 (총 시간이 /files/analyze/quick과 같음).
+    timer에는 부분들 중 가장 오래 걸린 extract/analyze(와 파이프라인 단계별 초)와, 나머지 대기 시간을 queue로 기록한다.
+    """
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    parts = WHOLE_PART if ext in ("pdf", "docx") else ANALYSIS_PARTS
+    pending: Dict[asyncio.Future, str] = {}
+    t0 = time.perf_counter()
+    async with gate.slots(len(parts)) as held:
+        spent: Dict[str, float] = {"extract": 0.0, "analyze": 0.0}
+        queued = list(parts)
+        try:
+            while queued or pending:
+                while queued and len(pending) < held:
+                    part = queued.pop(0)
+                    fut = asyncio.ensure_future(run_blocking(analyze_part, filename, path, parts[part], content_sha1))
+                    pending[fut] = part
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for fut in done:
+                    part = pending.pop(fut)
+                    out, timings = fut.result()
+                    for stage, seconds in timings.items():
+                        spent[stage] = max(spent.get(stage, 0.0), seconds)
+                    yield part, out
+        finally:
+            for fut in pending:
+                fut.cancel()
+        if timer is not None:
+            for stage, seconds in spent.items():
+                timer.add(stage, seconds)
+            timer.add("queue", max(0.0, time.perf_counter() - t0 - top_level(spent)))
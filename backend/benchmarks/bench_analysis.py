@@ -0,0 +1,92 @@
+# benchmarks/bench_analysis.py
+# 실행: (backend 폴더에서) python -m benchmarks.bench_analysis [크기MB ...]
+"""
+rule_based_analyze 단일 패스 스캐너와 기존(여러 번 훑는) 구현의 속도/최대 메모리 비교.
+- same work: 기존 구현이 하던 일(기본 통계 + 장르 어휘)만 파이프라인으로 돌린 것 → 기존 대비 배율은 이것으로
+- full: rule_based_analyze 전체 (대사/화자, 유사 원고 서명 등 기존에 없던 단계 포함이라 기존보다 느릴 수 있음)
+기본 통계가 기존 구현과 완전히 같은지도 함께 확인한다 (장르 추정은 bench_genre 참고).
+파서/장르 어휘/numpy 준비는 재기 전에 한 번 돌려서 뺀다.
+"""
+from __future__ import annotations
+
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+from app.services.analysis import PIPELINE, rule_based_analyze
+
+
+def _legacy_stats(text: str) -> dict:
+    """기존 rule_based_analyze의 0) 기본 통계 + 장르 키워드 부분 (속도 비교 기준)."""
+    paragraphs = [p for p in text.split("\n") if p.strip()]
+    sentences = [s.strip() for s in re.split(r"[.?!…]+", text) if s.strip()]
+    total_chars = sum(len(s) for s in sentences)
+    quote_chars = sum(ch == "“" or ch == "”" or ch == '"' for ch in text)
+    lower = text.lower()
+    genre_label = "미분류"
+    if any(k in lower for k in ["황제", "공작", "기사", "마법"]):
+        genre_label = "판타지(추정)"
+    if any(k in lower for k in ["왕자", "사랑", "키스", "데이트"]):
+        genre_label = "로맨스(추정)"
+    return {
+        "num_paragraphs": len(paragraphs),
+        "num_sentences": len(sentences),
+        "avg_sentence_len": total_chars / len(sentences) if sentences else 0,
+        "quote_ratio": quote_chars / total_chars if total_chars else 0,
+    }, genre_label
+
+
+_WORDS = ["그는", "천천히", "고개를", "들었다", "창밖에는", "비가", "내리고", "있었다",
+          "황제의", "명령이", "떨어졌다", "그녀는", "웃었다", "아무도", "몰랐다"]
+
+
+def make_text(n_chars: int, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    out, size = [], 0
+    while size < n_chars:
+        sent = " ".join(rnd.choice(_WORDS) for _ in range(rnd.randint(3, 12)))
+        if rnd.random() < 0.3:
+            sent = f"“{sent}”"
+        sent += rnd.choice([".", ".", "?", "!", "…"])
+        sent += "\n" if rnd.random() < 0.25 else " "
+        out.append(sent)
+        size += len(sent)
+    return "".join(out)
+
+
+def _measure(fn, text):
+    # 시간은 tracemalloc 없이, 최대 메모리는 따로 한 번 더 돌려서 잰다
+    t0 = time.perf_counter()
+    res = fn(text)
+    dt = time.perf_counter() - t0
+    tracemalloc.start()
+    fn(text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return res, dt, peak
+
+
+def _same_work(text: str) -> dict:
+    """기존 구현과 같은 범위: 기본 통계 + 장르 어휘 (대사/서명 단계는 돌지 않음)"""
+    return PIPELINE.run(text, ("stats", "genre"))
+
+
+def main(sizes_mb) -> None:
+    rule_based_analyze(make_text(1000))  # 준비 비용(import, 어휘 오토마톤)은 빼고 잰다
+    print(f"{'MB':>6} {'legacy s':>10} {'same work s':>12} {'vs legacy':>9} {'full s':>8} "
+          f"{'legacy peak MB':>15} {'full peak MB':>13}")
+    for mb in sizes_mb:
+        text = make_text(int(mb * 1024 * 1024 / 3))  # 한글 1자 ≈ 3바이트(UTF-8)
+        old, t_old, m_old = _measure(_legacy_stats, text)
+        same, t_same, _ = _measure(_same_work, text)
+        new, t_new, m_new = _measure(rule_based_analyze, text)
+        assert {k: same["stats"][k] for k in old[0]} == old[0], "결과 불일치"
+        assert {k: new["stats"][k] for k in old[0]} == old[0], "결과 불일치"
+        print(f"{mb:>6} {t_old:>10.3f} {t_same:>12.3f} {t_old / t_same:>8.1f}x {t_new:>8.3f} "
+              f"{m_old / 2**20:>15.1f} {m_new / 2**20:>13.1f}")
+
+
+if __name__ == "__main__":
+    main([float(x) for x in sys.argv[1:]] or [1, 5, 20])
@@ -0,0 +1,34 @@
+# benchmarks/bench_dialogue.py
+# 실행: (backend 폴더에서) python -m benchmarks.bench_dialogue [백만 자 ...]
+"""
+대사 추출/화자 추정(scan_dialogue)이 원고 길이에 선형으로 늘어나는지,
+최대 메모리가 원고 길이와 상관없이 일정한지 잰다. (원고는 조각 이터레이터로 넣음)
+"""
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+
+from app.services.analysis import iter_chunks
+from app.services.dialogue import scan_dialogue
+from benchmarks.corpus import CorpusSpec, generate
+
+
+def main(sizes_mchars) -> None:
+    print(f"{'chars':>12} {'s':>8} {'Mchar/s':>8} {'peak MB':>8} {'speakers':>9} {'attributed':>11}")
+    for m in sizes_mchars:
+        text = generate(CorpusSpec(size_bytes=int(m * 3_000_000)))  # 한글 1자 ≈ 3바이트(UTF-8)
+        t0 = time.perf_counter()
+        res = scan_dialogue(iter_chunks(text))
+        dt = time.perf_counter() - t0
+        tracemalloc.start()
+        scan_dialogue(iter_chunks(text))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{len(text):>12,} {dt:>8.3f} {len(text) / dt / 1e6:>8.2f} {peak / 2**20:>8.2f} "
+              f"{res['num_speakers']:>9} {res['attributed_ratio']:>11.1%}")
+
+
+if __name__ == "__main__":
+    main([float(x) for x in sys.argv[1:]] or [0.5, 2, 8])
@@ -0,0 +1,109 @@
+# benchmarks/bench_docx.py
+# 실행: (backend 폴더에서) python -m benchmarks.bench_docx [문단 수 ...]
+"""
+DOCX 추출: python-docx(Document(...).paragraphs) vs document.xml 스트리밍 파싱(iter_docx_paragraphs).
+서식이 많은(run마다 글꼴/굵게/색 지정) 긴 원고를 만들어 시간과 최대 RSS를 비교하고 결과가 같은지 확인한다.
+lxml 메모리는 tracemalloc에 잡히지 않으므로 측정마다 새 프로세스에서 최대 RSS를 본다. Unix 전용.
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from .bench_analysis import make_text
+from .bench_pdf import peak_rss_mb
+
+_CT = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+       '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+       '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+       '<Default Extension="xml" ContentType="application/xml"/>'
+       '<Override PartName="/word/document.xml" '
+       'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+       '</Types>')
+_RELS = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+         '<Relationship Id="rId1" '
+         'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+         'Target="word/document.xml"/></Relationships>')
+_RPR = ('<w:rPr><w:rFonts w:ascii="Batang" w:eastAsia="Batang" w:hAnsi="Batang"/>{b}'
+        '<w:color w:val="{c}"/><w:sz w:val="22"/><w:szCs w:val="22"/><w:lang w:eastAsia="ko-KR"/></w:rPr>')
+
+
+def make_docx(path: str, paragraphs: int, seed: int = 0) -> None:
+    rnd = random.Random(seed)
+    words = make_text(paragraphs * 120, seed).split(" ")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CT)
+        zf.writestr("_rels/.rels", _RELS)
+        with zf.open("word/document.xml", "w") as f:
+            f.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    b'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>')
+            pos = 0
+            for _ in range(paragraphs):
+                runs = []
+                for _ in range(rnd.randint(4, 16)):  # 단어마다 서식이 바뀌는 원고
+                    w = words[pos % len(words)].replace("\n", "")
+                    pos += 1
+                    rpr = _RPR.format(b="<w:b/>" if rnd.random() < 0.3 else "", c=f"{rnd.randrange(1 << 24):06X}")
+                    runs.append(f'<w:r>{rpr}<w:t xml:space="preserve">{w} </w:t></w:r>')
+                f.write(('<w:p><w:pPr><w:spacing w:after="0" w:line="360"/><w:ind w:firstLine="200"/></w:pPr>'
+                         + "".join(runs) + "</w:p>").encode("utf-8"))
+            f.write(b"<w:sectPr/></w:body></w:document>")
+
+
+def _run_one(mode: str, path: str) -> None:
+    t0 = time.perf_counter()
+    if mode == "python-docx":
+        import docx
+        paras = [p.text for p in docx.Document(path).paragraphs]
+    else:
+        from app.services.preprocess import iter_docx_paragraphs
+        paras = list(iter_docx_paragraphs(path))
+    wall = time.perf_counter() - t0
+    rss = peak_rss_mb()
+    import hashlib
+    digest = hashlib.sha1("\n".join(paras).encode("utf-8")).hexdigest()
+    print(json.dumps({"wall": wall, "rss_mb": rss, "paragraphs": len(paras), "sha1": digest}))
+
+
+def _measure(mode: str, path: str) -> dict:
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_docx", "--run", mode, path],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _baseline_rss() -> float:
+    # 모듈을 불러오기만 했을 때의 RSS (비교용)
+    out = subprocess.run([sys.executable, "-c", "import docx, app.services.preprocess, benchmarks.bench_pdf as b;"
+                          "print(b.peak_rss_mb())"],
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip())
+
+
+def main(counts) -> None:
+    print(f"import만 했을 때 RSS {_baseline_rss():.1f} MB")
+    print(f"{'paras':>7} {'docx MB':>8} {'python-docx s':>14} {'stream s':>9} {'speedup':>8} "
+          f"{'python-docx RSS':>16} {'stream RSS':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in counts:
+            path = os.path.join(tmp, f"bench-{n}.docx")
+            make_docx(path, n)
+            a = _measure("python-docx", path)
+            b = _measure("stream", path)
+            assert (a["paragraphs"], a["sha1"]) == (b["paragraphs"], b["sha1"]), "결과 불일치"
+            print(f"{n:>7} {Path(path).stat().st_size / 2**20:>8.1f} {a['wall']:>14.2f} {b['wall']:>9.2f} "
+                  f"{a['wall'] / b['wall']:>7.1f}x {a['rss_mb']:>16.1f} {b['rss_mb']:>11.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--run":
+        _run_one(sys.argv[2], sys.argv[3])
+    else:
+        main([int(x) for x in sys.argv[1:]] or [2000, 20000, 100000])
@@ -0,0 +1,92 @@
+# benchmarks/bench_duplicates.py
+# 실행: (backend 폴더에서) python -m benchmarks.bench_duplicates [서명 수 ...]
+"""
+유사 원고 색인(duplicates.py)을 임시 DB에 서명 N개로 채우는 시간/크기와,
+조회 한 번(원고 전체 서명 하나) 지연(p50/p99), 일부 칸을 바꿔 심어 둔 유사 서명의 재현율을 잰다.
+서명 칸을 비율 f만큼 바꾸면 추정 자카드 유사도는 1 - f.
+끝으로 합성 원고 하나를 훑어 서명을 만드는 시간(scan_shingles)을 따로 잰다.
+"""
+from __future__ import annotations
+
+import base64
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.config import settings
+
+QUERIES = 200
+SIMILARITIES = (0.9, 0.7, 0.6, 0.5)
+
+
+def _query(sig) -> dict:
+    return {"doc": base64.b64encode(sig.astype("<u4").tobytes()).decode("ascii"), "chapters": []}
+
+
+def _fill(n: int, rng) -> "object":
+    """임의 서명 n개를 한 번에 넣는다 (index_signatures를 n번 부르는 대신 executemany)"""
+    from app.services.db import connect
+    from app.services.duplicates import WHOLE, band_keys
+    from app.services.sketch import MINHASH_BINS
+
+    sigs = rng.integers(0, 1 << 32, size=(n, MINHASH_BINS), dtype="u8").astype("<u4")
+    for lo in range(0, n, 10_000):
+        part = sigs[lo:lo + 10_000]
+        keys = band_keys(part).tolist()
+        with connect() as conn:
+            conn.executemany("INSERT INTO minhash_items VALUES (?, ?, ?, NULL, ?)",
+                             [(lo + i + 1, f"{lo + i:040x}", WHOLE, s.tobytes()) for i, s in enumerate(part)])
+            conn.executemany("INSERT OR IGNORE INTO minhash_buckets VALUES (?, ?)",
+                             [(k, lo + i + 1) for i, row in enumerate(keys) for k in row])
+    return sigs
+
+
+def main(sizes) -> None:
+    import numpy as np
+
+    from app.services import db
+    from app.services.analysis import iter_chunks
+    from app.services.duplicates import find_matches, scan_shingles
+    from benchmarks.corpus import CorpusSpec, generate
+
+    rng = np.random.default_rng(0)
+    print(f"{'items':>8} {'build s':>8} {'DB MB':>6} {'p50 ms':>7} {'p99 ms':>7}  recall@sim (threshold "
+          f"{settings.near_duplicate_threshold})")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            settings.db_file = str(Path(tmp) / "bench.db")  # 절대 경로는 그대로 쓰임
+            db._ready = False  # 새 DB 파일이므로 테이블을 다시 만들게 한다
+
+            t0 = time.perf_counter()
+            sigs = _fill(n, rng)
+            build = time.perf_counter() - t0
+            size = sum(p.stat().st_size for p in Path(tmp).iterdir()) / 1e6
+
+            recall, latencies = {}, []
+            for sim in SIMILARITIES:
+                hits = 0
+                for _ in range(QUERIES):
+                    target = int(rng.integers(n))
+                    q = sigs[target].copy()
+                    slots = rng.choice(q.size, size=round(q.size * (1 - sim)), replace=False)
+                    q[slots] = rng.integers(0, 1 << 32, size=slots.size, dtype="u8")
+                    t0 = time.perf_counter()
+                    found = find_matches(_query(q))
+                    latencies.append(time.perf_counter() - t0)
+                    hits += any(m["content_sha1"] == f"{target:040x}" for m in found)
+                recall[sim] = hits / QUERIES
+            latencies.sort()
+            print(f"{n:>8,} {build:>8.2f} {size:>6.1f} {statistics.median(latencies) * 1e3:>7.2f} "
+                  f"{latencies[int(len(latencies) * 0.99)] * 1e3:>7.2f}  "
+                  + " ".join(f"{sim:.1f}:{r:.0%}" for sim, r in recall.items()))
+
+    text = generate(CorpusSpec(size_bytes=10_000_000))
+    t0 = time.perf_counter()
+    scan_shingles(iter_chunks(text))
+    print(f"scan_shingles 10MB: {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or [10_000, 100_000])
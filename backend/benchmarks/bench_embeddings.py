@@ -0,0 +1,40 @@
+# benchmarks/bench_embeddings.py
+# 실행: (backend 폴더에서) python -m benchmarks.bench_embeddings [화 수]
+"""
+청크 나누기 + 배치 임베딩 + 청크 임베딩 캐시의 처리량(chunks/sec)과 캐시 적중률.
+모델 없이 돌 수 있도록 HashingEmbedder를 쓰고, 임시 폴더에 저장소를 만든다.
+1) 처음 임베딩  2) 같은 원고 다시  3) 1% 수정본  4) 다른 원고와 화 일부를 공유하는 경우
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+from pathlib import Path
+
+from app.config import settings
+from app.services.embeddings import EmbeddingStore, HashingEmbedder, embed_text
+from benchmarks.bench_incremental import make_serial
+
+
+def main(chapters: int) -> None:
+    embedder = HashingEmbedder(settings.embedding_dimension)
+    with tempfile.TemporaryDirectory() as d:
+        store = EmbeddingStore.for_embedder(embedder, Path(d))
+        parts = make_serial(chapters)
+        text = "".join(parts)
+
+        edited = list(parts)
+        for i in range(0, chapters, 100):
+            edited[i] = edited[i].replace("그는", "그녀는", 1)
+        other = make_serial(chapters // 2, seed_offset=10_000) + parts[: chapters // 2]
+
+        runs = [("first", text), ("same", text), ("1% edit", "".join(edited)), ("shared", "".join(other))]
+        print(f"{'run':>8} {'chunks':>7} {'hit rate':>9} {'chunks/s':>10} {'ms':>8}")
+        for name, t in runs:
+            _, _, st = embed_text(t, embedder, store)
+            print(f"{name:>8} {st.chunks:>7} {st.hit_rate:>9.1%} {st.chunks_per_sec:>10.0f} {st.seconds * 1000:>8.1f}")
+        print(f"store rows={len(store)} size={store.path.stat().st_size / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
@@ -0,0 +1,57 @@
+# benchmarks/bench_encoding.py
+# 실행: (backend 폴더에서) python -m benchmarks.bench_encoding [크기KB ...]
+"""
+.txt 인코딩 판별: 기존(파일 전체 chardet.detect) vs 단계별 판별(decode_text).
+한글 원고를 UTF-8 / UTF-8(BOM) / CP949 / EUC-KR로 저장한 말뭉치에서
+- 시간: 기존, 새 방식(캐시 없음), 새 방식(같은 내용 재판별 = 캐시 적중)
+- 정확도: 원문과 똑같이 복원했는지, 기존 결과와 같은지
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+import chardet
+
+from app.services.preprocess import decode_text, encoding_cache
+
+from .bench_analysis import make_text
+
+# CP949 확장 한글(EUC-KR에 없는 글자)이 섞인 원고도 하나 넣는다
+_CP949_ONLY = " 똠방각하 뷁 쌰갸 "
+
+
+def legacy_decode(data: bytes) -> str:
+    enc = chardet.detect(data).get("encoding") or "utf-8"
+    return data.decode(enc, errors="replace")
+
+
+def corpus(size_kb: int):
+    base = make_text(size_kb * 1024 // 3)
+    for enc in ("utf-8", "utf-8-sig", "cp949", "euc-kr"):
+        yield enc, base, base.encode(enc)
+    ext = base[: len(base) // 2] + _CP949_ONLY + base[len(base) // 2:]
+    yield "cp949(확장)", ext, ext.encode("cp949")
+
+
+def _time(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main(sizes_kb) -> None:
+    print(f"{'KB':>6} {'encoding':>12} {'legacy ms':>10} {'new ms':>8} {'cached ms':>10} "
+          f"{'speedup':>8} {'legacy ok':>9} {'new ok':>7} {'same':>5}")
+    for kb in sizes_kb:
+        for enc, text, data in corpus(kb):
+            old, t_old = _time(legacy_decode, data)
+            encoding_cache.clear()
+            new, t_new = _time(decode_text, data)
+            _, t_hit = _time(decode_text, data)
+            print(f"{kb:>6} {enc:>12} {t_old * 1000:>10.1f} {t_new * 1000:>8.1f} {t_hit * 1000:>10.1f} "
+                  f"{t_old / t_new:>7.0f}x {str(old == text):>9} {str(new == text):>7} {str(new == old):>5}")
+
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or [10, 100, 1024, 5120])
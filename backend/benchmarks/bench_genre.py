@@ -0,0 +1,71 @@
+# benchmarks/bench_genre.py
+# 실행: (backend 폴더에서) python -m benchmarks.bench_genre [원고MB]
+"""
+장르 어휘 매칭 처리량을 어휘 수별로 잰다.
+장르 4개 × 어휘 N개짜리 합성 어휘로 GenreMatcher와 어휘마다 본문을 한 번씩 훑는 방식(str.find)을 비교한다.
+GenreMatcher는 어휘 수에 따라 구현이 바뀐다 (impl: pyahocorasick / 어휘가 적으면 regex / 많으면 순수 파이썬 오토마톤).
+두 방식의 장르별 횟수도 맞춰 본다.
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+
+from app.services import genre as genre_mod
+from app.services.genre import GenreMatcher, load_lexicons
+from app.config import settings
+
+from .bench_analysis import make_text
+
+_SYLLABLES = [chr(c) for c in range(0xAC00, 0xAC00 + 2000, 7)]
+
+
+def make_lexicons(per_genre: int, seed: int = 0) -> dict:
+    rnd = random.Random(seed)
+    base = load_lexicons(settings.genre_lexicon_path)
+    out = {}
+    for g, terms in base.items():
+        extra = {"".join(rnd.choice(_SYLLABLES) for _ in range(rnd.randint(2, 5)))
+                 for _ in range(max(0, per_genre - len(terms)))}
+        out[g] = list(dict.fromkeys([*terms, *extra]))[:per_genre]
+    return out
+
+
+def naive_counts(text: str, lexicons: dict) -> list:
+    # 겹치는 등장까지 세기 위해 find로 한 칸씩 전진
+    counts = []
+    for terms in lexicons.values():
+        n = 0
+        for t in terms:
+            i = text.find(t)
+            while i >= 0:
+                n += 1
+                i = text.find(t, i + 1)
+        counts.append(n)
+    return counts
+
+
+def main(mb: float) -> None:
+    text = make_text(int(mb * 1024 * 1024 / 3)).lower()
+    print(f"원고 {len(text):,}자, pyahocorasick={'있음' if genre_mod.ahocorasick is not None else '없음'}")
+    print(f"{'어휘/장르':>9} {'impl':>13} {'build s':>8} {'match s':>8} {'match 자/s':>12} {'naive s':>9}")
+    for per_genre in (4, 100, 1000, 10000, 50000):
+        lex = make_lexicons(per_genre)
+        t0 = time.perf_counter()
+        m = GenreMatcher(lex)
+        t_build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        got = m.count(text)
+        t_match = time.perf_counter() - t0
+        if per_genre <= 1000:
+            t0 = time.perf_counter()
+            assert naive_counts(text, lex) == got, "결과 불일치"
+            naive = f"{time.perf_counter() - t0:>9.3f}"
+        else:
+            naive = f"{'-':>9}"
+        print(f"{per_genre:>9} {m.impl:>13} {t_build:>8.3f} {t_match:>8.3f} {len(text) / t_match:>12,.0f} {naive}")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 2)
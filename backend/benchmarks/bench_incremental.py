@@ -0,0 +1,65 @@
+# benchmarks/bench_incremental.py
+# 실행: (backend 폴더에서) python -m benchmarks.bench_incremental [화 수] [수정 비율]
+"""
+300화짜리 연재 원고를 전체 분석한 뒤, 일부 화만 고쳐서 다시 분석할 때
+증분 분석(incremental_analyze, 바뀐 구간만 훑음)이 전체 분석 대비 얼마나 드는지 처음부터 끝까지 잰다.
+결과가 rule_based_analyze와 같은지도 확인한다. (메모리 캐시만 사용)
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+
+from app.services.analysis import rule_based_analyze
+from app.services.cache import ResultCache
+from app.services.incremental import incremental_analyze
+from benchmarks.bench_analysis import make_text
+
+
+def make_serial(chapters: int, chars_per_chapter: int = 5000, seed_offset: int = 0) -> list:
+    out = []
+    for i in range(chapters):
+        body = make_text(chars_per_chapter, seed=seed_offset + i).replace("\n", "\n\n")
+        out.append(f"제 {i + 1}화\n\n{body}\n")
+    return out
+
+
+def _timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    res = fn(*args, **kwargs)
+    return res, time.perf_counter() - t0
+
+
+def main(chapters: int, edit_ratio: float) -> None:
+    parts = make_serial(chapters)
+    text = "".join(parts)
+    cache = ResultCache(max_items=1_000_000, ttl_seconds=0)
+
+    full, t_full = _timed(rule_based_analyze, text)
+    cold, t_cold = _timed(incremental_analyze, text, cache=cache)
+    assert cold == full, "증분 결과 불일치 (처음)"
+
+    rnd = random.Random(1)
+    for i in rnd.sample(range(chapters), max(1, int(chapters * edit_ratio))):
+        p = parts[i]
+        k = len(p) // 2
+        parts[i] = p[:k] + " 그녀는 사랑을 몰랐다." + p[k:]
+    edited = "".join(parts)
+
+    full2, t_full2 = _timed(rule_based_analyze, edited)
+    timings: dict = {}
+    warm, t_warm = _timed(incremental_analyze, edited, timings, cache=cache)
+    assert warm == full2, "증분 결과 불일치 (수정 후)"
+
+    print(f"chars={len(edited):,} cached entries={cache.stats()['items']}")
+    print(f"full analyze          : {t_full2 * 1000:8.1f} ms")
+    print(f"incremental (cold)    : {t_cold * 1000:8.1f} ms")
+    print(f"incremental ({edit_ratio:.0%} edit): {t_warm * 1000:8.1f} ms  "
+          f"segments={timings['segments'] * 1000:.1f} ms ({t_warm / t_full2:.1%} of full)")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    r = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+    main(n, r)
@@ -0,0 +1,76 @@
+# benchmarks/bench_pdf.py
+# 실행: (backend 폴더에서) python -m benchmarks.bench_pdf [페이지 수 ...]
+"""
+PDF 분석: 순차 추출(전체 텍스트를 만든 뒤 분석) vs 페이지 범위 병렬 스트리밍 추출.
+페이지 수별 wall time과 최대 RSS(본 프로세스 + 추출 프로세스)를 비교하고 결과가 같은지 확인한다.
+각 측정은 새 파이썬 프로세스에서 돌린다 (최대 RSS가 프로세스 단위 최댓값이라서). Unix 전용.
+"""
+from __future__ import annotations
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .load_health import make_pdf
+
+
+def peak_rss_mb() -> float:
+    """이 프로세스의 최대 RSS. ru_maxrss는 exec 이전(fork한 부모) 값까지 이어받으므로 리눅스에서는 VmHWM을 본다."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_one(mode: str, path: str) -> None:
+    from app.services.analysis import rule_based_analyze
+    from app.services.preprocess import extract_text, shutdown_page_pool
+    from app.services.workers import analyze_file
+
+    t0 = time.perf_counter()
+    if mode == "serial":
+        result = rule_based_analyze(extract_text(path, Path(path).read_bytes()))
+    else:
+        result = analyze_file(Path(path).name, path)
+    wall = time.perf_counter() - t0
+    shutdown_page_pool()
+    child_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    print(json.dumps({"wall": wall, "rss_mb": peak_rss_mb(), "child_rss_mb": child_kb / 1024,
+                      "result": result}, ensure_ascii=False))
+
+
+def _measure(mode: str, path: str) -> dict:
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_pdf", "--run", mode, path],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(page_counts) -> None:
+    print(f"CPU {os.cpu_count()}개")
+    print(f"{'pages':>6} {'serial s':>9} {'stream s':>9} {'speedup':>8} "
+          f"{'serial RSS MB':>14} {'stream RSS MB':>14} {'page procs RSS MB':>18}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in page_counts:
+            path = os.path.join(tmp, f"bench-{pages}.pdf")
+            Path(path).write_bytes(make_pdf(pages))
+            s = _measure("serial", path)
+            p = _measure("stream", path)
+            assert s["result"] == p["result"], "결과 불일치"
+            print(f"{pages:>6} {s['wall']:>9.2f} {p['wall']:>9.2f} {s['wall'] / p['wall']:>7.1f}x "
+                  f"{s['rss_mb']:>14.1f} {p['rss_mb']:>14.1f} {p['child_rss_mb']:>18.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--run":
+        _run_one(sys.argv[2], sys.argv[3])
+    else:
+        main([int(x) for x in sys.argv[1:]] or [50, 200, 500])
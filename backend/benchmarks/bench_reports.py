@@ -0,0 +1,78 @@
+# benchmarks/bench_reports.py
+# 실행: (backend 폴더에서) python -m benchmarks.bench_reports [리포트 수]
+"""
+리포트 목록 조회 속도: 임시 DB에 리포트 N건을 넣고 첫 페이지 / 커서로 깊은 페이지 /
+점수·날짜 필터 / 제목 검색 시간을 잰다. 리포트 하나의 JSON(indent=2)과 압축 형식 크기도 비교한다.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from app.config import settings
+
+
+def _ms(fn, repeat: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main(n: int) -> None:
+    tmp = tempfile.mkdtemp()
+    settings.db_file = str(Path(tmp) / "bench.db")  # 첫 연결 전에 바꿔야 함
+    from app.services.db import connect
+    from app.services.report import build_response, list_reports
+    from app.services.analysis import rule_based_analyze
+    from .bench_analysis import make_text
+
+    rnd = random.Random(0)
+    start = datetime(2025, 1, 1)
+    rows = []
+    for i in range(n):
+        rid = f"{rnd.getrandbits(40):010x}-{i:07d}"
+        scores = [round(rnd.uniform(50, 95), 2) for _ in range(5)]
+        at = (start + timedelta(seconds=i * 37)).isoformat(timespec="milliseconds")
+        rows.append((rid, rid, f"원고 {i}화.txt", f"{rnd.getrandbits(160):040x}", sum(scores) / 5, *scores,
+                     at, f"{rid}.json", 4000))
+    t0 = time.perf_counter()
+    with connect() as conn:
+        conn.executemany("INSERT INTO reports VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    print(f"리포트 {n:,}건 넣기: {time.perf_counter() - t0:.2f}s")
+
+    def walk(pages: int, **kw):
+        cursor = None
+        for _ in range(pages):
+            _, cursor = list_reports(limit=50, cursor=cursor, **kw)
+
+    _, mid_cursor = list_reports(limit=n // 2)
+    cases = {
+        "첫 페이지 (최신순 50건)": lambda: list_reports(limit=50),
+        "중간 페이지 (커서, 최신순)": lambda: list_reports(limit=50, cursor=mid_cursor),
+        "20페이지 연속 넘기기": lambda: walk(20),
+        "총점순 첫 페이지": lambda: list_reports(limit=50, sort="score"),
+        "총점 80~90 + 날짜 범위": lambda: list_reports(limit=50, min_score=80, max_score=90,
+                                                 since=datetime(2025, 2, 1), until=datetime(2025, 3, 1)),
+        "제목 검색 (드문 값)": lambda: list_reports(limit=50, q=f"원고 {n - 7}화"),
+    }
+    for name, fn in cases.items():
+        print(f"  {name:<24} {_ms(fn):8.2f} ms")
+
+    resp = build_response(rule_based_analyze(make_text(20000)), "bench", "bench.txt", 10)
+    data = resp.model_dump(mode="json")
+    pretty = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    packed = gzip.compress(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6, mtime=0)
+    print(f"리포트 1건 크기: indent=2 JSON {len(pretty):,}B → 압축 {len(packed):,}B ({len(packed) / len(pretty):.0%})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
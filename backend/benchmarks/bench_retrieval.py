@@ -0,0 +1,70 @@
+# benchmarks/bench_retrieval.py
+# 실행: (backend 폴더에서) python -m benchmarks.bench_retrieval [벡터 수 ...] [--dim 384] [--queries 100]
+"""
+가이드 검색 인덱스의 재현율(recall@k) 대비 질의 지연시간.
+군집 구조가 있는 정규화 랜덤 벡터를 만들고, ExactIndex 결과를 정답으로 IVFIndex(nprobe별)를 비교한다.
+벡터는 임시 .npy(memmap)에 블록 단위로 만들어 100만 개에서도 메모리를 아낀다.
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.services.retrieval import ExactIndex, IVFIndex
+
+
+def make_vectors(path: Path, n: int, dim: int, n_centers: int = 1000, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_centers, dim)).astype(np.float32)
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(n, dim))
+    for s in range(0, n, 100_000):
+        m = min(100_000, n - s)
+        v = centers[rng.integers(0, n_centers, m)] + 0.6 * rng.standard_normal((m, dim)).astype(np.float32)
+        out[s:s + m] = v / np.linalg.norm(v, axis=1, keepdims=True)
+    out.flush()
+    return np.load(path, mmap_mode="r")
+
+
+def _per_query_ms(fn, queries) -> tuple:
+    t0 = time.perf_counter()
+    res = [fn(q) for q in queries]
+    return res, (time.perf_counter() - t0) * 1000 / len(queries)
+
+
+def run(n: int, dim: int, n_queries: int, k: int = 10) -> None:
+    with tempfile.TemporaryDirectory() as d:
+        vectors = make_vectors(Path(d) / "v.npy", n, dim)
+        queries = np.asarray(vectors[np.random.default_rng(1).choice(n, n_queries, replace=False)])
+        queries = queries + 0.05 * np.random.default_rng(2).standard_normal(queries.shape).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        exact = ExactIndex(vectors)
+        truth, exact_ms = _per_query_ms(lambda q: exact.search(q, k)[1][0], queries)
+
+        t0 = time.perf_counter()
+        ivf = IVFIndex.build(vectors)
+        ivf.save(Path(d) / "ivf")
+        build_s = time.perf_counter() - t0
+        ivf = IVFIndex.load(Path(d) / "ivf")  # 실제 사용처럼 memmap으로 다시 연다
+
+        print(f"\nn={n:,} dim={dim} nlist={ivf.nlist} build={build_s:.1f}s")
+        print(f"  {'index':<14} {'recall@' + str(k):>10} {'ms/query':>10}")
+        print(f"  {'exact':<14} {1.0:>10.3f} {exact_ms:>10.2f}")
+        for nprobe in (1, 4, 8, 16, 32):
+            got, ms = _per_query_ms(lambda q: ivf.search(q, k, nprobe)[1][0], queries)
+            recall = np.mean([len(set(g) & set(t)) / k for g, t in zip(got, truth)])
+            print(f"  {'ivf nprobe=' + str(nprobe):<14} {recall:>10.3f} {ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("sizes", nargs="*", type=int, default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=100)
+    args = ap.parse_args()
+    for n in args.sizes:
+        run(n, args.dim, args.queries)
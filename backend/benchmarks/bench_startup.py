@@ -0,0 +1,123 @@
+# benchmarks/bench_startup.py
+# 실행: (backend 폴더에서) python -m benchmarks.bench_startup [--runs 5] [--import-budget-ms 1500] [--health-budget-ms 3000]
+"""
+백엔드 콜드 스타트 측정 (Electron 셸이 백엔드를 기다리는 시간).
+- import: 새 파이썬 프로세스에서 `import app.main`에 걸린 시간, 그 시점에 이미 불러온 무거운 모듈
+- health: uvicorn 프로세스를 띄운 뒤 첫 /health 200까지, 백그라운드 워밍업이 끝날 때까지(warmup == done)
+각 항목의 중앙값이 예산을 넘으면 종료 코드 1.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+# 시작 경로에서 import되면 안 되는 모듈 (처음 쓸 때 불러와야 함)
+HEAVY_MODULES = ("numpy", "pypdf", "chardet", "lxml", "docx", "reportlab", "sentence_transformers", "torch")
+
+_IMPORT_PROBE = f"""
+import json, sys, time
+t0 = time.perf_counter()
+import app.main
+t = time.perf_counter() - t0
+print(json.dumps({{"ms": t * 1000, "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import() -> Dict:
+    out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE], cwd=BACKEND,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _get_json(url: str) -> Optional[Dict]:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as r:
+            return json.loads(r.read()) if r.status == 200 else None
+    except OSError:
+        return None
+
+
+def measure_health(timeout: float = 60.0) -> Tuple[float, Optional[float]]:
+    """(첫 /health까지 ms, warmup 완료까지 ms). 워밍업이 timeout 안에 안 끝나면 두 번째는 None."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                             "--log-level", "warning"], cwd=BACKEND,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        first = warm = None
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError("uvicorn이 종료됨")
+            body = _get_json(url)
+            now = (time.perf_counter() - started) * 1000
+            if body is not None:
+                first = first or now
+                if body.get("warmup") in ("done", "failed"):
+                    warm = now
+                    break
+            time.sleep(0.005 if first is None else 0.05)
+        if first is None:
+            raise RuntimeError("/health 응답 없음")
+        return first, warm
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.bench_startup")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--import-budget-ms", type=float, default=1500)
+    ap.add_argument("--health-budget-ms", type=float, default=3000)
+    args = ap.parse_args(argv)
+
+    imports = [measure_import() for _ in range(args.runs)]
+    healths = [measure_health() for _ in range(args.runs)]
+    import_ms = statistics.median(r["ms"] for r in imports)
+    health_ms = statistics.median(h[0] for h in healths)
+    warm = [h[1] for h in healths if h[1] is not None]
+    heavy = sorted({m for r in imports for m in r["heavy"]})
+
+    print(f"CPU {os.cpu_count()}개, {args.runs}회 중앙값")
+    print(f"{'import app.main':<16} {import_ms:>8.0f} ms  (예산 {args.import_budget_ms:.0f} ms)")
+    print(f"{'first /health':<16} {health_ms:>8.0f} ms  (예산 {args.health_budget_ms:.0f} ms)")
+    print(f"{'warmup done':<16} " + (f"{statistics.median(warm):>8.0f} ms" if warm else "  (시간 초과)"))
+    print(f"시작 시 불러온 무거운 모듈: {', '.join(heavy) or '없음'}")
+
+    failed = []
+    if import_ms > args.import_budget_ms:
+        failed.append("import")
+    if health_ms > args.health_budget_ms:
+        failed.append("health")
+    if heavy:
+        failed.append("heavy imports")
+    if failed:
+        print(f"예산 초과: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
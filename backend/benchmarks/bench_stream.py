@@ -0,0 +1,80 @@
+# benchmarks/bench_stream.py
+# 실행: (backend 폴더에서) python -m benchmarks.bench_stream [크기MB ...]
+"""
+/files/analyze/quick(한 번에 응답)과 /files/analyze/stream(SSE, 섹션별)의
+첫 결과까지 걸린 시간(TTFR)과 전체 시간을 비교한다.
+ASGI 테스트 클라이언트는 응답을 다 모은 뒤 돌려주므로 uvicorn을 실제로 띄워서 잰다 (프로세스 풀 포함).
+업로드마다 내용을 조금씩 바꿔서 결과 캐시에 걸리지 않게 한다.
+"""
+from __future__ import annotations
+
+import socket
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from app.main import app
+from benchmarks.corpus import CorpusSpec, generate, make_file
+
+FORMATS = ("txt-utf8", "docx", "pdf")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _quick(client: httpx.Client, name: str, data: bytes) -> float:
+    t0 = time.perf_counter()
+    client.post("/files/analyze/quick", files={"file": (name, data)}).raise_for_status()
+    return time.perf_counter() - t0
+
+
+def _stream(client: httpx.Client, name: str, data: bytes):
+    """(첫 section까지 초, result까지 초, section 이벤트 순서)"""
+    t0 = time.perf_counter()
+    first, order = None, []
+    with client.stream("POST", "/files/analyze/stream", files={"file": (name, data)}) as r:
+        r.raise_for_status()
+        event = None
+        for line in r.iter_lines():
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: ") and event == "section":
+                first = first if first is not None else time.perf_counter() - t0
+                order.append(line.split('"label":"', 1)[1].split('"', 1)[0])
+            elif line.startswith("data: ") and event in ("result", "error"):
+                break
+    return first, time.perf_counter() - t0, order
+
+
+def main(sizes_mb) -> None:
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=600) as client:
+            print(f"{'format':>9} {'MB':>5} {'quick s':>8} {'TTFR s':>7} {'stream s':>9}  order")
+            for mb in sizes_mb:
+                text = generate(CorpusSpec(size_bytes=int(mb * 1_000_000)))
+                for i, fmt in enumerate(FORMATS):
+                    name, data = make_file(fmt, text + f"\n{i}-quick")
+                    quick = _quick(client, name, data)
+                    name, data = make_file(fmt, text + f"\n{i}-stream")
+                    first, total, order = _stream(client, name, data)
+                    print(f"{fmt:>9} {len(data) / 1e6:>5.1f} {quick:>8.2f} {first:>7.2f} {total:>9.2f}  "
+                          f"{','.join(order)}")
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+if __name__ == "__main__":
+    main([float(x) for x in sys.argv[1:]] or [2, 8])
@@ -0,0 +1,61 @@
+# benchmarks/bench_structure.py
+# 실행: (backend 폴더에서) python -m benchmarks.bench_structure [크기MB ...]
+"""
+구조 색인(structure.py)을 만드는 시간/크기와,
+문장 하나를 꺼내는 데 (a) 색인 memmap + 구간 읽기 vs (b) 원문 전체를 읽어 다시 나누기 시간을 비교한다.
+"""
+from __future__ import annotations
+
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.config import settings
+from app.services.structure import StructureIndex, ensure_structure, index_path
+from benchmarks.corpus import CorpusSpec, generate
+
+LOOKUPS = 200
+
+
+def main(sizes_mb) -> None:
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.blob_dir = tmp  # 임시 저장소 (절대 경로는 그대로 쓰임)
+        print(f"{'MB':>5} {'sentences':>10} {'build s':>8} {'index KB':>9} {'open ms':>8} "
+              f"{'span us':>8} {'resplit ms':>11}")
+        for mb in sizes_mb:
+            text = generate(CorpusSpec(size_bytes=int(mb * 1_000_000)))
+            sha1 = f"{int(mb * 1000):040d}"
+            blob = Path(settings.blob_path) / sha1[:2] / sha1
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            blob.write_bytes(text.encode("utf-8"))
+
+            t0 = time.perf_counter()
+            ensure_structure(sha1, "x.txt", rebuild=True)
+            build = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            index = StructureIndex(sha1)
+            opened = time.perf_counter() - t0
+            n = index.counts["sentence"]
+            picks = [random.randrange(n) for _ in range(LOOKUPS)]
+            t0 = time.perf_counter()
+            for i in picks:
+                index.span("sentence", i)
+            span_s = (time.perf_counter() - t0) / LOOKUPS
+
+            t0 = time.perf_counter()
+            for i in picks[:5]:
+                sentences = [s.strip() for s in re.split(r"[.?!…]+", blob.read_text(encoding="utf-8")) if s.strip()]
+                sentences[i]
+            resplit = (time.perf_counter() - t0) / 5
+            print(f"{len(text.encode()) / 1e6:>5.1f} {n:>10,} {build:>8.3f} "
+                  f"{index_path(sha1).stat().st_size / 1024:>9.0f} {opened * 1e3:>8.2f} "
+                  f"{span_s * 1e6:>8.1f} {resplit * 1e3:>11.1f}")
+
+
+if __name__ == "__main__":
+    main([float(x) for x in sys.argv[1:]] or [1, 10])
@@ -0,0 +1,149 @@
+# benchmarks/corpus.py
+"""
+벤치마크용 합성 웹소설 원고 생성기 (같은 seed면 항상 같은 원고).
+- 화 구분선("제 N화"), 서술 문단, 대사 문단(“…”) 비율 조절
+- 목표 크기(UTF-8 바이트)까지 생성: 10KB ~ 50MB
+- txt(여러 인코딩) / docx / pdf 바이트로 내보내기
+"""
+from __future__ import annotations
+
+import io
+import random
+import zipfile
+from dataclasses import dataclass
+from typing import List
+from xml.sax.saxutils import escape
+
+_NAMES = ["레온", "이안", "세린", "카엘", "아리아", "유진", "도윤", "하린", "루카스", "에블린"]
+_PLACES = ["황궁", "마탑", "북부 영지", "수도", "기사단 훈련장", "카페", "학원", "던전 입구", "별궁", "시장"]
+_NOUNS = ["검", "편지", "반지", "지도", "약속", "비밀", "소문", "계약서", "목걸이", "기억",
+          "마법", "황제", "공작", "왕자", "사랑", "길드", "헌터", "스킬", "무공", "문파"]
+_ADVS = ["천천히", "조용히", "갑자기", "결국", "다시", "애써", "잠시", "문득", "끝내", "여전히"]
+_VERBS = ["고개를 들었다", "웃었다", "숨을 골랐다", "걸음을 멈췄다", "입술을 깨물었다",
+          "창밖을 바라보았다", "손을 내밀었다", "대답하지 않았다", "눈을 감았다", "돌아섰다"]
+_DESC = ["비가 내리고 있었다", "바람이 차가웠다", "종소리가 울렸다", "등불이 흔들렸다",
+         "발소리가 가까워졌다", "아무도 그 사실을 몰랐다", "하늘이 붉게 물들었다"]
+_LINES = ["정말 괜찮겠어?", "그건 약속이 아니었잖아.", "지금 가야 해.", "날 믿어.", "왜 이제야 말하는 거죠?",
+          "그럴 리가 없어!", "조금만 더 기다려 줘.", "이번엔 내가 지킬게.", "…미안해.", "다 끝났어."]
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    size_bytes: int                 # 목표 크기 (UTF-8 기준)
+    seed: int = 0
+    dialogue_ratio: float = 0.35    # 문단 중 대사 문단 비율
+    chapter_bytes: int = 15_000     # 대략 한 화 분량 (웹소설 한 화 ≈ 5천 자)
+
+
+def _josa(word: str, with_final: str, without_final: str) -> str:
+    # 마지막 글자에 받침이 있으면 은/이/을, 없으면 는/가/를
+    code = ord(word[-1]) - 0xAC00
+    return word + (with_final if 0 <= code < 11172 and code % 28 else without_final)
+
+
+def _sentence(rnd: random.Random) -> str:
+    kind = rnd.random()
+    if kind < 0.4:
+        return f"{_josa(rnd.choice(_NAMES), '은', '는')} {rnd.choice(_ADVS)} {rnd.choice(_VERBS)}."
+    if kind < 0.7:
+        return f"{rnd.choice(_PLACES)}에는 {rnd.choice(_DESC)}."
+    if kind < 0.9:
+        return (f"{rnd.choice(_NAMES)}의 {rnd.choice(_NOUNS)}에 얽힌 {_josa(rnd.choice(_NOUNS), '을', '를')} "
+                f"떠올리자 {rnd.choice(_ADVS)} {rnd.choice(_VERBS)}.")
+    return f"{rnd.choice(_ADVS)}, {rnd.choice(_DESC)}…"
+
+
+def generate(spec: CorpusSpec) -> str:
+    """spec 크기만큼 원고 문자열을 만든다 (줄 = 문단, 화 사이 빈 줄)."""
+    rnd = random.Random(spec.seed)
+    out: List[str] = []
+    size = 0
+    chapter = 0
+    chapter_left = 0
+    while size < spec.size_bytes:
+        if chapter_left <= 0:
+            chapter += 1
+            chapter_left = int(spec.chapter_bytes * rnd.uniform(0.8, 1.2))
+            para = f"{'' if chapter == 1 else chr(10)}제 {chapter}화 {rnd.choice(_NOUNS)}의 {rnd.choice(_NOUNS)}\n"
+        elif rnd.random() < spec.dialogue_ratio:
+            para = f"“{rnd.choice(_LINES)}” {_josa(rnd.choice(_NAMES), '이', '가')} 말했다.\n" if rnd.random() < 0.3 \
+                else f"“{' '.join(rnd.choice(_LINES) for _ in range(rnd.randint(1, 2)))}”\n"
+        else:
+            para = " ".join(_sentence(rnd) for _ in range(rnd.randint(1, 4))) + "\n"
+        n = len(para.encode("utf-8"))
+        out.append(para)
+        size += n
+        chapter_left -= n
+    return "".join(out)
+
+
+# ---------- 파일 형식 ----------
+def to_txt(text: str, encoding: str = "utf-8") -> bytes:
+    return text.encode(encoding)
+
+
+_DOCX_CT = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '</Types>')
+_DOCX_RELS = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+              '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+              '<Relationship Id="rId1" '
+              'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+              'Target="word/document.xml"/></Relationships>')
+
+
+def to_docx(text: str) -> bytes:
+    """줄마다 문단 하나. 대사 문단은 기울임 run으로 (서식이 섞인 원고 흉내)."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _DOCX_CT)
+        zf.writestr("_rels/.rels", _DOCX_RELS)
+        with zf.open("word/document.xml", "w") as f:
+            f.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    b'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>')
+            for line in text.split("\n"):
+                rpr = "<w:rPr><w:i/></w:rPr>" if line.startswith("“") else ""
+                f.write(f'<w:p><w:r>{rpr}<w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>'.encode("utf-8"))
+            f.write(b"<w:sectPr/></w:body></w:document>")
+    return buf.getvalue()
+
+
+def to_pdf(text: str, chars_per_line: int = 45, lines_per_page: int = 55) -> bytes:
+    """reportlab으로 A4 PDF (한글 CID 글꼴). 긴 줄은 chars_per_line자로 나눠 찍는다."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    from reportlab.pdfgen import canvas
+
+    pdfmetrics.registerFont(UnicodeCIDFont("HYSMyeongJo-Medium"))
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    c.setFont("HYSMyeongJo-Medium", 10)
+    y = 0
+    for para in text.split("\n"):
+        for i in range(0, max(len(para), 1), chars_per_line):
+            if y >= lines_per_page:
+                c.showPage()
+                c.setFont("HYSMyeongJo-Medium", 10)
+                y = 0
+            c.drawString(40, 800 - y * 14, para[i:i + chars_per_line])
+            y += 1
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def make_file(fmt: str, text: str) -> "tuple[str, bytes]":
+    """fmt: txt-utf8 | txt-utf8-sig | txt-cp949 | txt-euc-kr | docx | pdf → (파일 이름, 바이트)"""
+    if fmt.startswith("txt-"):
+        enc = {"utf8": "utf-8", "utf8-sig": "utf-8-sig"}.get(fmt[4:], fmt[4:])
+        return f"corpus-{fmt}.txt", to_txt(text, enc)
+    if fmt == "docx":
+        return "corpus.docx", to_docx(text)
+    if fmt == "pdf":
+        return "corpus.pdf", to_pdf(text)
+    raise ValueError(f"unknown format: {fmt}")
@@ -0,0 +1,91 @@
+# benchmarks/load_health.py
+# 실행: (backend 폴더에서) python -m benchmarks.load_health [PDF 경로] [동시 업로드 수]
+"""
+PDF 분석 요청이 여러 개 도는 동안 /health 응답 시간이 유지되는지 확인하는 부하 테스트.
+PDF 경로를 주지 않으면 reportlab으로 긴 한글 PDF를 하나 만든다.
+업로드마다 내용을 조금씩 바꿔서 결과 캐시에 걸리지 않게 한다.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import statistics
+import sys
+import time
+
+import httpx
+
+from app.main import app
+
+
+def make_pdf(pages: int = 150) -> bytes:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    from reportlab.pdfgen import canvas
+
+    pdfmetrics.registerFont(UnicodeCIDFont("HYSMyeongJo-Medium"))
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    line = "“황제의 명령이다.” 그는 천천히 고개를 들었다. 창밖에는 비가 내리고 있었다."
+    for p in range(pages):
+        c.setFont("HYSMyeongJo-Medium", 10)
+        for i in range(60):
+            c.drawString(40, 800 - i * 13, f"{p}-{i} {line}")
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+async def _ping_health(client: httpx.AsyncClient, stop: asyncio.Event, out: list) -> None:
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        r = await client.get("/health")
+        r.raise_for_status()
+        out.append((time.perf_counter() - t0) * 1000)
+        await asyncio.sleep(0.01)
+
+
+def _summary(xs: list) -> str:
+    xs = sorted(xs)
+    p99 = xs[min(len(xs) - 1, int(len(xs) * 0.99))]
+    return f"n={len(xs):4d} p50={statistics.median(xs):7.2f}ms p99={p99:7.2f}ms max={xs[-1]:7.2f}ms"
+
+
+async def main(pdf: bytes, uploads: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=600) as client:
+        # 1) 부하 없을 때
+        idle: list = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(_ping_health(client, stop, idle))
+        await asyncio.sleep(1.0)
+        stop.set()
+        await task
+
+        # 2) PDF 분석이 도는 동안
+        loaded: list = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(_ping_health(client, stop, loaded))
+
+        async def upload(i: int) -> int:
+            body = pdf + f"\n% {i}\n".encode()  # PDF 끝의 주석 → 해시만 달라짐
+            r = await client.post("/files/analyze/quick", files={"file": (f"load{i}.pdf", body)})
+            return r.status_code
+
+        t0 = time.perf_counter()
+        codes = await asyncio.gather(*(upload(i) for i in range(uploads)))
+        wall = time.perf_counter() - t0
+        stop.set()
+        await task
+
+    print(f"uploads={uploads} wall={wall:.2f}s status={sorted(set(codes))} "
+          f"429s={codes.count(429)}")
+    print(f"/health idle  : {_summary(idle)}")
+    print(f"/health loaded: {_summary(loaded)}")
+
+
+if __name__ == "__main__":
+    data = open(sys.argv[1], "rb").read() if len(sys.argv) > 1 else make_pdf()
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    asyncio.run(main(data, n))
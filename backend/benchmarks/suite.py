@@ -0,0 +1,248 @@
+# benchmarks/suite.py
+# 실행: (backend 폴더에서)
+#   python -m benchmarks.suite                       # 기본 매트릭스 → benchmarks/results/<시각>-<커밋>.json
+#   python -m benchmarks.suite --quick               # 1MB 이하, 반복 1회 (빠른 확인용)
+#   python -m benchmarks.suite --sizes 100k,1m --formats txt-utf8,docx --repeat 5
+#   python -m benchmarks.suite --compare old.json new.json [--threshold 0.15]
+"""
+합성 원고(benchmarks.corpus)로 분석 파이프라인 전체를 잰다.
+- 단계: extract(extract_text_from_upload) / analyze(rule_based_analyze) / route(/files/analyze/quick, TestClient)
+- 크기(10KB ~ 50MB) × 형식(txt 여러 인코딩, docx, pdf) 조합마다 중앙값/최솟값 시간, 처리량(MB/s),
+  tracemalloc 최대 할당량(시간 측정과 별도로 한 번 더 실행)을 기록한다.
+- 결과는 커밋/환경 정보와 함께 JSON으로 저장 → --compare로 두 커밋을 비교해 느려진 항목을 찾는다 (있으면 종료 코드 1).
+route 단계의 분석은 워커 프로세스에서 돌기 때문에 메모리는 본 프로세스 몫(업로드 수신/응답)만 잡힌다.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .bench_pdf import peak_rss_mb
+from .corpus import CorpusSpec, generate, make_file
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+KB, MB = 1024, 1024 * 1024
+SIZES = {"10k": 10 * KB, "100k": 100 * KB, "1m": MB, "10m": 10 * MB, "50m": 50 * MB}
+# 형식별 최대 크기 (pdf 생성/추출은 느려서 작은 것만)
+FORMAT_MAX = {"txt-utf8": 50 * MB, "txt-utf8-sig": MB, "txt-cp949": 10 * MB, "txt-euc-kr": MB,
+              "docx": 10 * MB, "pdf": MB}
+DEFAULT_FORMATS = ["txt-utf8", "txt-cp949", "docx", "pdf"]
+STAGES = ["extract", "analyze", "route"]
+
+
+# ---------- 측정 ----------
+def _time(fn: Callable[[], Any], repeat: int) -> List[float]:
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def _peak_alloc_mb(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / MB
+    finally:
+        tracemalloc.stop()
+
+
+class _Route:
+    """/files/analyze/quick 호출기. 결과 캐시를 매번 비워 실제 분석까지 재게 한다."""
+
+    def __init__(self) -> None:
+        from fastapi.testclient import TestClient
+        from app.config import settings
+        from app.main import app
+        from app.services.cache import result_cache
+
+        settings.max_upload_size_mb = max(settings.max_upload_size_mb, 64)
+        self._cache = result_cache
+        self._cm = TestClient(app)
+        self.client = self._cm.__enter__()
+        self.call("warmup.txt", "워밍업 원고입니다.".encode("utf-8"))  # 워커 프로세스 풀을 미리 띄운다
+
+    def call(self, name: str, data: bytes) -> None:
+        self._cache.clear()
+        r = self.client.post("/files/analyze/quick", files={"file": (name, data)})
+        if r.status_code != 200:
+            raise RuntimeError(f"{name}: HTTP {r.status_code} {r.text[:200]}")
+
+    def close(self) -> None:
+        self._cm.__exit__(None, None, None)
+
+
+def _stage_fn(stage: str, name: str, data: bytes, text: Optional[str],
+              route: Optional[_Route]) -> Callable[[], Any]:
+    from app.services.analysis import rule_based_analyze
+    from app.services.preprocess import encoding_cache, extract_text_from_upload
+
+    if stage == "extract":
+        def fn():
+            encoding_cache.clear()  # 인코딩 판별 캐시도 비워서 매번 처음 보는 파일처럼
+            return asyncio.run(extract_text_from_upload(name, data))
+        return fn
+    if stage == "analyze":
+        return lambda: rule_based_analyze(text)
+    return lambda: route.call(name, data)
+
+
+def run_case(fmt: str, size_label: str, repeat: int, stages: List[str],
+             route: Optional[_Route]) -> List[Dict[str, Any]]:
+    source = generate(CorpusSpec(SIZES[size_label]))
+    name, data = make_file(fmt, source)
+    text: Optional[str] = None
+    rows = []
+    for stage in stages:
+        if stage == "route" and route is None:
+            continue
+        if stage == "analyze" and text is None:
+            from app.services.preprocess import extract_text
+            text = extract_text(name, data)
+        fn = _stage_fn(stage, name, data, text, route)
+        fn()  # 워밍업 (지연 import, 오토마톤 생성 등을 측정에서 뺀다)
+        times = _time(fn, repeat)
+        med = statistics.median(times)
+        rows.append({
+            "case": f"{fmt}/{size_label}", "format": fmt, "size": size_label,
+            "source_bytes": SIZES[size_label], "file_bytes": len(data), "stage": stage,
+            "repeat": repeat, "seconds_median": med, "seconds_min": min(times),
+            "mb_per_s": SIZES[size_label] / MB / med if med else None,  # 원고(UTF-8) 기준 처리량
+            "peak_alloc_mb": _peak_alloc_mb(fn),
+        })
+    return rows
+
+
+# ---------- 메타데이터 ----------
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True,
+                              cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def environment() -> Dict[str, Any]:
+    from app.config import settings
+
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "worker_count": settings.worker_count,
+        "pdf_extract_workers": settings.pdf_extract_workers,
+    }
+
+
+# ---------- 실행 / 비교 ----------
+def run(formats: List[str], sizes: List[str], repeat: int, stages: List[str],
+        out_dir: Path) -> Path:
+    env = environment()
+    route = _Route() if "route" in stages else None
+    results: List[Dict[str, Any]] = []
+    print(f"commit {env['commit']}{' (dirty)' if env['dirty'] else ''}, CPU {env['cpu_count']}개, 반복 {repeat}회")
+    print(f"{'case':<20} {'stage':<8} {'median s':>9} {'min s':>9} {'MB/s':>8} {'peak alloc MB':>14}")
+    try:
+        for fmt in formats:
+            for size in sizes:
+                if SIZES[size] > FORMAT_MAX.get(fmt, 0):
+                    continue
+                for row in run_case(fmt, size, repeat, stages, route):
+                    results.append(row)
+                    print(f"{row['case']:<20} {row['stage']:<8} {row['seconds_median']:>9.4f} "
+                          f"{row['seconds_min']:>9.4f} {row['mb_per_s'] or 0:>8.2f} {row['peak_alloc_mb']:>14.1f}")
+    finally:
+        if route is not None:
+            route.close()
+    env["peak_rss_mb"] = peak_rss_mb()
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = out_dir / f"{stamp}-{env['commit']}.json"
+    path.write_text(json.dumps({"environment": env, "results": results}, ensure_ascii=False, indent=2),
+                    encoding="utf-8")
+    print(f"저장: {path}")
+    return path
+
+
+def _load(path: str) -> Tuple[Dict[str, Any], Dict[Tuple[str, str], Dict[str, Any]]]:
+    doc = json.loads(Path(path).read_text(encoding="utf-8"))
+    return doc["environment"], {(r["case"], r["stage"]): r for r in doc["results"]}
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> int:
+    """두 결과 파일의 중앙값 시간을 비교. threshold(비율)보다 느려진 항목이 있으면 1."""
+    old_env, old = _load(old_path)
+    new_env, new = _load(new_path)
+    print(f"{old_env['commit']} → {new_env['commit']} (느려짐 기준 +{threshold:.0%})")
+    for key in ("python", "cpu_count", "worker_count"):
+        if old_env.get(key) != new_env.get(key):
+            print(f"  주의: 환경이 다름 {key}: {old_env.get(key)} → {new_env.get(key)}")
+    print(f"{'case':<20} {'stage':<8} {'old s':>9} {'new s':>9} {'change':>8}")
+    regressions = 0
+    for key in sorted(old.keys() & new.keys()):
+        a, b = old[key]["seconds_median"], new[key]["seconds_median"]
+        change = b / a - 1 if a else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  ← 느려짐"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  빨라짐"
+        print(f"{key[0]:<20} {key[1]:<8} {a:>9.4f} {b:>9.4f} {change:>+8.1%}{flag}")
+    only = len(old.keys() ^ new.keys())
+    print(f"느려진 항목 {regressions}개" + (f" (한쪽에만 있는 항목 {only}개는 비교 안 함)" if only else ""))
+    return 1 if regressions else 0
+
+
+def _csv(s: str) -> List[str]:
+    return [x.strip() for x in s.split(",") if x.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    ap.add_argument("--formats", type=_csv, default=DEFAULT_FORMATS,
+                    help=f"쉼표로 구분 ({', '.join(FORMAT_MAX)})")
+    ap.add_argument("--sizes", type=_csv, default=list(SIZES), help=f"쉼표로 구분 ({', '.join(SIZES)})")
+    ap.add_argument("--stages", type=_csv, default=STAGES, help=f"쉼표로 구분 ({', '.join(STAGES)})")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--quick", action="store_true", help="1MB 이하, 반복 1회")
+    ap.add_argument("--out", type=Path, default=RESULTS_DIR)
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    ap.add_argument("--threshold", type=float, default=0.15, help="느려짐으로 볼 비율 (기본 0.15 = 15%%)")
+    args = ap.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+    for s in args.sizes:
+        if s not in SIZES:
+            ap.error(f"unknown size: {s}")
+    for f in args.formats:
+        if f not in FORMAT_MAX:
+            ap.error(f"unknown format: {f}")
+    sizes, repeat = args.sizes, args.repeat
+    if args.quick:
+        sizes, repeat = [s for s in sizes if SIZES[s] <= MB], 1
+    run(args.formats, sizes, repeat, args.stages, args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,7 @@
 import { useState } from "react";
 import FileInlinePicker from "../components/FileInlinePicker";
 
-type Metric = { name: string; value: number; unit?: string | null; zscore?: number | null; note?: string | null };
+type Metric = { name: string; value: number; unit?: string | null; zscore?: number | null; percentile?: number | null; note?: string | null };
 type EvidenceItem = { source_id: string; snippet: string; score?: number | null; meta?: any };
 type SectionScore = { label: string; score: number; metrics: Metric[]; evidences?: EvidenceItem[] };
 type AnalyzeRunResponse = {
@@ -25,6 +25,28 @@ type QuickAnalyzeProps = {
 
 const API = import.meta.env.VITE_API_BASE as string;
 
+// /files/analyze/stream 응답(text/event-stream)을 이벤트 단위로 읽는다
+async function readEvents(r: Response, onEvent: (event: string, data: any) => void) {
+  const reader = r.body!.pipeThrough(new TextDecoderStream()).getReader();
+  let buf = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buf += value;
+    let cut;
+    while ((cut = buf.indexOf("\n\n")) >= 0) {
+      const block = buf.slice(0, cut);
+      buf = buf.slice(cut + 2);
+      let event = "message", data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+}
+
 export default function QuickAnalyze({
   defaultPersist = true,
   defaultSaveReport = false,
@@ -35,12 +57,14 @@ export default function QuickAnalyze({
   const [saveReport, setSaveReport] = useState(defaultSaveReport);
   const [loading, setLoading] = useState(false);
   const [resp, setResp] = useState<AnalyzeRunResponse | null>(null);
+  // 최종 응답 전에 먼저 도착한 섹션들 (같은 label이 다시 오면 바꿔 끼움)
+  const [sections, setSections] = useState<SectionScore[]>([]);
   const [error, setError] = useState<string | null>(null);
 
   async function onSubmit(e: React.FormEvent) {
     e.preventDefault();
     if (!file) return;
-    setLoading(true); setError(null); setResp(null);
+    setLoading(true); setError(null); setResp(null); setSections([]);
 
     const fd = new FormData();
     fd.append("file", file);
@@ -48,9 +72,19 @@ export default function QuickAnalyze({
     fd.append("save_report", String(saveReport));
 
     try {
-      const r = await fetch(`${API}/files/analyze/quick`, { method: "POST", body: fd });
+      const r = await fetch(`${API}/files/analyze/stream`, { method: "POST", body: fd });
       if (!r.ok) throw new Error(`${r.status} ${r.statusText}: ${await r.text()}`);
-      setResp(await r.json());
+      let failed: string | null = null;
+      await readEvents(r, (event, data) => {
+        if (event === "section") {
+          setSections((prev) => [...prev.filter((s) => s.label !== data.label), data]);
+        } else if (event === "result") {
+          setResp(data);
+        } else if (event === "error") {
+          failed = `${data.status}: ${data.detail}`;
+        }
+      });
+      if (failed) throw new Error(failed);
     } catch (err: any) {
       setError(err?.message ?? String(err));
     } finally {
@@ -88,25 +122,34 @@ export default function QuickAnalyze({
 
       {error && <pre style={{ color: "crimson", marginTop: 12, whiteSpace: "pre-wrap" }}>{error}</pre>}
 
-      {resp && (
+      {(resp || sections.length > 0) && (
         <div style={{ marginTop: 16 }}>
-          <div style={{ fontWeight: 600 }}>총점: {resp.total_score}</div>
-          {resp.title && <div>제목: {resp.title}</div>}
-          {resp.manuscript_id && <div>manuscript_id: {resp.manuscript_id}</div>}
-
-          <div style={{ marginTop: 12 }}>
-            <strong>강점</strong>
-            <ul>{resp.strengths.map((s, i) => <li key={i}>{s}</li>)}</ul>
-            <strong>개선점</strong>
-            <ul>{resp.improvements.map((s, i) => <li key={i}>{s}</li>)}</ul>
-          </div>
-
-          {resp.sections.map((sec, i) => (
+          {resp ? (
+            <>
+              <div style={{ fontWeight: 600 }}>총점: {resp.total_score}</div>
+              {resp.title && <div>제목: {resp.title}</div>}
+              {resp.manuscript_id && <div>manuscript_id: {resp.manuscript_id}</div>}
+
+              <div style={{ marginTop: 12 }}>
+                <strong>강점</strong>
+                <ul>{resp.strengths.map((s, i) => <li key={i}>{s}</li>)}</ul>
+                <strong>개선점</strong>
+                <ul>{resp.improvements.map((s, i) => <li key={i}>{s}</li>)}</ul>
+              </div>
+            </>
+          ) : (
+            <div style={{ color: "#6b7280" }}>나머지 항목 분석 중… ({sections.length}/5)</div>
+          )}
+
+          {(resp ? resp.sections : sections).map((sec, i) => (
             <div key={i} style={{ border: "1px solid #e5e7eb", borderRadius: 8, padding: 12, marginTop: 8 }}>
               <div style={{ fontWeight: 600 }}>{sec.label} — {sec.score}</div>
               <ul style={{ margin: 0 }}>
                 {sec.metrics.map((m, j) => (
-                  <li key={j}>{m.name}: {m.value}{m.unit ? ` ${m.unit}` : ""}</li>
+                  <li key={j}>
+                    {m.name}: {m.value}{m.unit ? ` ${m.unit}` : ""}
+                    {m.percentile != null ? ` (백분위 ${m.percentile}, z ${m.zscore ?? "-"})` : ""}
+                  </li>
                 ))}
               </ul>
             </div>